@@ -1,4 +1,6 @@
+import os
 import xml.etree.ElementTree as ET
+import numpy as np
 import pybullet as p
 import logging
 
@@ -8,30 +10,63 @@ class FileLoader:
         self.logger = logging.getLogger(__name__)
 
     def load_file(self, file_path):
-        """Load a file into the simulation."""
+        """Load a file into the simulation and return the bodies it spawned. Raises RuntimeError."""
         try:
-            if file_path.endswith('.urdf'):
-                self.simulation.load_robot(file_path)
-            elif file_path.endswith('.xml'):
-                self._parse_xml(file_path)
-            else:
-                raise ValueError("Unsupported file format")
+            groups = self.plan_file(file_path)
+            bodies = self.simulation.load_robots(groups)
+            if groups and not bodies:
+                raise ValueError("no robots were loaded")
             self.logger.info(f"Successfully loaded file: {file_path}")
+            return bodies
         except Exception as e:
             self.logger.error(f"Failed to load file {file_path}: {e}")
             raise RuntimeError(f"Failed to load file {file_path}: {e}")
 
+    def plan_file(self, file_path):
+        """The spawn groups a scene file asks for, without touching the physics world.
+
+        A group is a dict of one 'urdf' path with (n, 3) 'positions', (n, 4) 'orientations'
+        and per-instance 'overrides', which Simulation.load_robots spawns in bulk.
+        """
+        if file_path.endswith('.urdf'):
+            return [spawn_group(file_path, [(0, 0, 1)])]
+        elif file_path.endswith('.xml'):
+            return self._parse_xml(file_path)
+        else:
+            raise ValueError("Unsupported file format")
+
     def _parse_xml(self, file_path):
-        """Parse an XML file and load any referenced URDF files."""
+        """Parse an XML scene into spawn groups.
+
+        ``<robot urdf=".." position="x y z" rpy="r p y"/>`` places one robot, and
+        ``<instances urdf=".." layout="grid|array|random" ...>`` places many copies of one URDF,
+        with ``<override index="i" .../>`` children changing the pose, colour (``rgba``) or
+        ``mass`` of single copies, or dropping them with ``skip="true"``.
+        """
         try:
             tree = ET.parse(file_path)
             root = tree.getroot()
-            
-            for element in root.findall('robot'):
+            directory = os.path.dirname(os.path.abspath(file_path))
+
+            groups = []
+            for element in root:
+                if element.tag not in ('robot', 'instances'):
+                    continue
                 urdf_path = element.get('urdf')
-                if urdf_path:
-                    self.simulation.load_robot(urdf_path)
+                if not urdf_path:
+                    continue
+                # Relative paths are taken from the scene file's directory when the file exists there.
+                local_path = os.path.join(directory, urdf_path)
+                if not os.path.isabs(urdf_path) and os.path.isfile(local_path):
+                    urdf_path = local_path
+                if element.tag == 'robot':
+                    positions = [_vector(element.get('position'), (0, 0, 1))]
+                    orientations = [_orientation(element)]
+                else:
+                    positions, orientations = _layout(element)
+                groups.append(_with_overrides(urdf_path, positions, orientations, element.findall('override')))
             self.logger.info(f"Successfully parsed XML file: {file_path}")
+            return groups
         except ET.ParseError as e:
             self.logger.error(f"Error parsing XML file {file_path}: {e}")
             raise ValueError(f"Error parsing XML file {file_path}: {e}")
@@ -39,6 +74,15 @@ class FileLoader:
             self.logger.error(f"Unexpected error parsing XML file {file_path}: {e}")
             raise
 
+    def validate_urdf(self, urdf_path):
+        """Check that a URDF parses, and return the resolved paths of the mesh files it uses."""
+        # Parsed through the simulation's cache, so the load that follows does not parse it again.
+        model = self.simulation.urdf_cache.model(urdf_path)
+        meshes = self.simulation.urdf_cache.mesh_paths(model)
+        if len(meshes) < len(model['meshes']):
+            self.logger.warning(f"{len(model['meshes']) - len(meshes)} meshes referenced by {urdf_path} were not found")
+        return meshes
+
     def load_initial_data(self):
         """Load initial data for the simulation. Placeholder method."""
         initial_data = {
@@ -48,6 +92,88 @@ class FileLoader:
         return initial_data
 
     def load_multiple_files(self, file_paths):
-        """Load multiple files into the simulation."""
+        """Load multiple files into the simulation in one batch."""
+        groups = []
         for file_path in file_paths:
-            self.load_file(file_path)
\ No newline at end of file
+            groups.extend(self.plan_file(file_path))
+        self.simulation.load_robots(groups)
+
+def spawn_group(urdf_path, positions, orientations=None, overrides=None):
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    if orientations is None:
+        orientations = np.tile([0.0, 0.0, 0.0, 1.0], (len(positions), 1))
+    return {
+        'urdf': urdf_path,
+        'positions': positions,
+        'orientations': np.asarray(orientations, dtype=float).reshape(-1, 4),
+        'overrides': overrides or {},
+    }
+
+def _layout(element):
+    """Positions and orientations of every copy in an <instances> element."""
+    layout = element.get('layout', 'grid')
+    origin = np.array(_vector(element.get('origin'), (0, 0, 0)))
+    if layout == 'grid':
+        counts = [int(v) for v in element.get('count', '1 1 1').split()] + [1, 1]
+        spacing = np.array(_vector(element.get('spacing'), (1, 1, 1)))
+        indices = np.indices(counts[:3]).reshape(3, -1).T
+        positions = origin + indices * spacing
+    elif layout == 'array':
+        count = int(element.get('count', 1))
+        step = np.array(_vector(element.get('spacing'), (1, 0, 0)))
+        positions = origin + np.arange(count)[:, None] * step
+    elif layout == 'random':
+        count = int(element.get('count', 1))
+        rng = np.random.default_rng(int(element.get('seed')) if element.get('seed') else None)
+        low = np.array(_vector(element.get('min'), (-1, -1, 0)))
+        high = np.array(_vector(element.get('max'), (1, 1, 0)))
+        positions = origin + rng.uniform(low, high, size=(count, 3))
+    else:
+        raise ValueError(f"Unknown instance layout: {layout}")
+
+    orientations = np.tile(_orientation(element), (len(positions), 1))
+    if element.get('yaw') == 'random':
+        rng = np.random.default_rng(int(element.get('seed')) + 1 if element.get('seed') else None)
+        yaw = rng.uniform(-np.pi, np.pi, size=len(positions))
+        orientations = np.array([p.getQuaternionFromEuler((0, 0, angle)) for angle in yaw])
+    return positions, orientations
+
+def _with_overrides(urdf_path, positions, orientations, elements):
+    """Apply <override> children: pose changes now, colour and mass at spawn time, skips by removal."""
+    positions = np.array(positions, dtype=float)
+    orientations = np.array(orientations, dtype=float)
+    overrides = {}
+    skipped = set()
+    for override in elements:
+        index = int(override.get('index'))
+        if not 0 <= index < len(positions):
+            raise ValueError(f"Override index {index} is outside the {len(positions)} instances")
+        if override.get('skip') == 'true':
+            skipped.add(index)
+            continue
+        if override.get('position'):
+            positions[index] = _vector(override.get('position'), (0, 0, 0))
+        if override.get('rpy') or override.get('orientation'):
+            orientations[index] = _orientation(override)
+        changes = {}
+        if override.get('rgba'):
+            changes['rgba'] = _vector(override.get('rgba'), (1, 1, 1, 1))
+        if override.get('mass'):
+            changes['mass'] = float(override.get('mass'))
+        if changes:
+            overrides[index] = changes
+    if skipped:
+        kept = [i for i in range(len(positions)) if i not in skipped]
+        renumbered = {old: new for new, old in enumerate(kept)}
+        overrides = {renumbered[i]: changes for i, changes in overrides.items() if i in renumbered}
+        positions, orientations = positions[kept], orientations[kept]
+    return spawn_group(urdf_path, positions, orientations, overrides)
+
+def _orientation(element):
+    """A quaternion from an rpy (radians) or xyzw orientation attribute."""
+    if element.get('rpy'):
+        return p.getQuaternionFromEuler(_vector(element.get('rpy'), (0, 0, 0)))
+    return _vector(element.get('orientation'), (0, 0, 0, 1))
+
+def _vector(text, default):
+    return tuple(float(v) for v in text.split()) if text else tuple(default)
@@ -0,0 +1,32 @@
+import collections
+import logging
+
+
+class QueueLogHandler(logging.Handler):
+    """Collects log records from any thread; the GUI drains them in batches on its own timer.
+
+    Emitting only appends to a bounded deque, so a thread logging at physics rate never waits on
+    the GUI. Once the deque is full the oldest records are dropped and counted.
+    """
+
+    def __init__(self, capacity=10000, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = collections.deque(maxlen=capacity)
+        self.dropped = 0
+
+    def emit(self, record):
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append(record)
+
+    def drain(self, limit=None):
+        """Pop up to `limit` records, oldest first, with the count dropped since the last drain."""
+        count = len(self.records) if limit is None else min(limit, len(self.records))
+        records = []
+        for _ in range(count):
+            try:
+                records.append(self.records.popleft())
+            except IndexError:
+                break
+        dropped, self.dropped = self.dropped, 0
+        return records, dropped
@@ -0,0 +1,143 @@
+import logging
+import os
+import struct
+import numpy as np
+import pybullet as p
+import pyqtgraph.opengl as gl
+from physics_engine.file_hash import content_hash
+
+
+class MeshCache:
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        # Geometry key -> MeshData, shared by every body and reload that uses it.
+        self.meshes = {}
+        # id(MeshData) -> (bounds centre, bounding radius, box hull), for level-of-detail drawing.
+        self.hulls = {}
+        self._failed = set()
+
+    def get(self, geometry_type, dimensions, mesh_file=None):
+        """MeshData for a PyBullet visual shape, or None if it cannot be drawn."""
+        key = self._key(geometry_type, dimensions, mesh_file)
+        if key is None or key in self._failed:
+            return None
+        mesh = self.meshes.get(key)
+        if mesh is None:
+            try:
+                mesh = self._build(geometry_type, dimensions, mesh_file)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Cannot load visual mesh {mesh_file}: {e}")
+                mesh = None
+            if mesh is None:
+                self._failed.add(key)
+                return None
+            self.meshes[key] = mesh
+        return mesh
+
+    def hull(self, mesh):
+        """(centre, radius, box MeshData) bounding a cached mesh in its own frame."""
+        hull = self.hulls.get(id(mesh))
+        if hull is None or hull[3] is not mesh:
+            vertices = mesh.vertexes()
+            lower, upper = vertices.min(axis=0), vertices.max(axis=0)
+            centre = (lower + upper) / 2
+            box = box_mesh(upper - lower)
+            box = gl.MeshData(vertexes=box.vertexes() + centre, faces=box.faces())
+            hull = self.hulls[id(mesh)] = (centre, float(np.linalg.norm(upper - lower)) / 2, box, mesh)
+        return hull[:3]
+
+    def _key(self, geometry_type, dimensions, mesh_file):
+        dimensions = tuple(round(float(value), 6) for value in dimensions)
+        if geometry_type == p.GEOM_MESH:
+            try:
+                return ('mesh', content_hash(mesh_file), dimensions)
+            except OSError as e:
+                self.logger.warning(f"Cannot read visual mesh {mesh_file}: {e}")
+                return None
+        if geometry_type in (p.GEOM_BOX, p.GEOM_SPHERE, p.GEOM_CYLINDER, p.GEOM_CAPSULE):
+            return (geometry_type, dimensions)
+        return None
+
+    def _build(self, geometry_type, dimensions, mesh_file):
+        if geometry_type == p.GEOM_BOX:
+            return box_mesh(dimensions)
+        if geometry_type == p.GEOM_SPHERE:
+            return gl.MeshData.sphere(rows=10, cols=20, radius=dimensions[0])
+        if geometry_type in (p.GEOM_CYLINDER, p.GEOM_CAPSULE):
+            length, radius = dimensions[0], dimensions[1]
+            if geometry_type == p.GEOM_CAPSULE:
+                length += 2 * radius  # drawn as a cylinder spanning the capsule's caps
+            return cylinder_mesh(radius, length)
+        vertices, faces = load_mesh_file(mesh_file)
+        return gl.MeshData(vertexes=vertices * np.asarray(dimensions, dtype=float), faces=faces)
+
+
+def box_mesh(extents):
+    """A box centred on the origin with the given full extents."""
+    half = np.asarray(extents, dtype=float) / 2
+    corners = np.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=float) * half
+    faces = np.array([
+        [0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5],
+        [0, 4, 5], [0, 5, 1], [2, 3, 7], [2, 7, 6],
+        [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3],
+    ])
+    return gl.MeshData(vertexes=corners, faces=faces)
+
+
+def cylinder_mesh(radius, length, cols=20):
+    """A z-aligned cylinder centred on the origin, as URDF defines it."""
+    mesh = gl.MeshData.cylinder(rows=1, cols=cols, radius=[radius, radius], length=length)
+    vertices = mesh.vertexes() - np.array([0.0, 0.0, length / 2])
+    return gl.MeshData(vertexes=vertices, faces=mesh.faces())
+
+
+def load_mesh_file(path):
+    """Read an OBJ or STL file into (vertices, triangle faces) arrays."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.obj':
+        return _load_obj(path)
+    if extension == '.stl':
+        return _load_stl(path)
+    raise ValueError(f"Unsupported mesh format: {extension}")
+
+
+def _load_obj(path):
+    vertices = []
+    faces = []
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            if line.startswith('v '):
+                vertices.append([float(value) for value in line.split()[1:4]])
+            elif line.startswith('f '):
+                # OBJ indices are 1-based, may be negative, and may carry /texture/normal parts.
+                indices = []
+                for token in line.split()[1:]:
+                    index = int(token.split('/')[0])
+                    indices.append(index - 1 if index > 0 else len(vertices) + index)
+                for i in range(1, len(indices) - 1):
+                    faces.append([indices[0], indices[i], indices[i + 1]])
+    if not faces:
+        raise ValueError("OBJ file has no faces")
+    return np.array(vertices, dtype=float), np.array(faces, dtype=np.int64)
+
+
+def _load_stl(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) >= 84:
+        count = struct.unpack_from('<I', data, 80)[0]
+        if len(data) == 84 + count * 50:
+            record = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+            triangles = np.frombuffer(data, dtype=record, count=count, offset=84)['vertices']
+            return _index_triangles(triangles.reshape(-1, 3).astype(float))
+    points = [[float(value) for value in line.split()[1:4]]
+              for line in data.decode('ascii', errors='replace').splitlines() if line.strip().startswith('vertex')]
+    if not points:
+        raise ValueError("STL file has no triangles")
+    return _index_triangles(np.array(points, dtype=float))
+
+
+def _index_triangles(points):
+    """Share identical corners between triangles."""
+    vertices, inverse = np.unique(points, axis=0, return_inverse=True)
+    return vertices, inverse.reshape(-1, 3)
@@ -1,45 +1,221 @@
+import time
 import pyqtgraph.opengl as gl
-import pybullet as p
 import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QMatrix4x4
+from PyQt5.QtWidgets import QLabel
+from gui.mesh_cache import MeshCache
+from physics_engine.transforms import pose_matrices
+
+# Shared by every renderer so reloading a robot, or loading it many times, parses its meshes once.
+SHARED_MESH_CACHE = MeshCache()
+
+# Level of detail per visual, lowest first.
+CULLED, POINT, HULL, FULL = 0, 1, 2, 3
+
+class BodyItems:
+    """The retained GL items drawing one body; only their model matrices change per frame."""
+
+    def __init__(self, view_widget, visual_shapes, mesh_cache, positions):
+        self.view_widget = view_widget
+        self.items = []
+        # Box hulls, created the first time a visual drops to the hull level.
+        self.hull_meshes = []
+        self.hull_items = []
+        rows = []
+        local_positions = []
+        local_orientations = []
+        centres = []
+        radii = []
+        colors = []
+        for shape in visual_shapes:
+            mesh = mesh_cache.get(shape['geometry_type'], shape['dimensions'], shape['mesh_file'])
+            if mesh is None:
+                continue
+            item = gl.GLMeshItem(meshdata=mesh, color=tuple(shape['color']), smooth=False, shader='shaded')
+            view_widget.addItem(item)
+            self.items.append(item)
+            centre, radius, hull = mesh_cache.hull(mesh)
+            self.hull_meshes.append(hull)
+            self.hull_items.append(None)
+            centres.append(centre)
+            radii.append(radius)
+            colors.append(shape['color'])
+            rows.append(shape['link_index'] + 1)
+            local_positions.append(shape['position'])
+            local_orientations.append(shape['orientation'])
+        self.rows = np.array(rows, dtype=int)
+        self.local_frames = pose_matrices(np.reshape(local_positions, (-1, 3)), np.reshape(local_orientations, (-1, 4)))
+        self.local_centres = np.reshape(centres, (-1, 3))
+        self.radii = np.array(radii, dtype=float)
+        self.colors = np.reshape(colors, (-1, 4)).astype(float)
+        self.levels = np.full(len(self.items), FULL)
+        self.world = np.empty((len(self.items), 4, 4))
+        self.centres = np.empty((len(self.items), 3))
+
+        # Bodies without drawable geometry (or replayed without a physics world) fall back to link points.
+        self.points = None
+        if not self.items:
+            self.points = gl.GLScatterPlotItem(pos=np.asarray(positions), size=0.1, color=(1, 0, 0, 1), pxMode=False)
+            view_widget.addItem(self.points)
+
+    def update(self, positions, orientations):
+        """Recompute every visual's world transform and bounding-sphere centre."""
+        if self.points is not None:
+            self.points.setData(pos=np.asarray(positions))
+            return
+        self.world = pose_matrices(positions[self.rows], orientations[self.rows]) @ self.local_frames
+        self.centres = np.einsum('nij,nj->ni', self.world[:, :3, :3], self.local_centres) + self.world[:, :3, 3]
+
+    def apply(self, levels):
+        """Show each visual at its level of detail; hidden visuals skip their transform upload."""
+        for i in np.flatnonzero(levels != self.levels):
+            self.items[i].setVisible(levels[i] == FULL)
+            if levels[i] == HULL and self.hull_items[i] is None:
+                self.hull_items[i] = gl.GLMeshItem(meshdata=self.hull_meshes[i], color=tuple(self.colors[i]),
+                                                   smooth=False, shader='shaded')
+                self.view_widget.addItem(self.hull_items[i])
+            if self.hull_items[i] is not None:
+                self.hull_items[i].setVisible(levels[i] == HULL)
+        self.levels = levels
+        for i in np.flatnonzero(levels >= HULL):
+            item = self.items[i] if levels[i] == FULL else self.hull_items[i]
+            item.setTransform(QMatrix4x4(*self.world[i].ravel()))
+
+    def remove(self):
+        for item in self.items + [item for item in self.hull_items if item is not None]:
+            self.view_widget.removeItem(item)
+        if self.points is not None:
+            self.view_widget.removeItem(self.points)
 
 class ObjectRenderer:
-    def __init__(self, simulation):
+    # Apparent size (bounding radius over camera distance) below which a visual drops to a box hull, then a point.
+    HULL_SIZE = 0.02
+    POINT_SIZE = 0.004
+
+    def __init__(self, simulation, mesh_cache=None, interpolate=True):
         self.simulation = simulation
+        self.source = simulation
+        # Blend live poses between physics steps so frames between steps still move.
+        self.interpolate = interpolate
+        # The live snapshot whose final pose is already on screen; redrawing it would change nothing.
+        self._settled = None
+        self._drawn_view = None
+        self.mesh_cache = mesh_cache if mesh_cache is not None else SHARED_MESH_CACHE
         self.view_widget = gl.GLViewWidget()
+        # Every visual at the point level is drawn by this one item.
+        self.lod_points = gl.GLScatterPlotItem(pos=np.zeros((0, 3)), size=4, pxMode=True)
+        self.view_widget.addItem(self.lod_points)
+        self.overlay = QLabel(self.view_widget)
+        self.overlay.setStyleSheet("color: white; background-color: rgba(0, 0, 0, 120); padding: 2px;")
+        self.overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.overlay.move(8, 8)
         self.init_view()
 
     def init_view(self):
         self.view_widget.opts['distance'] = 20
         grid = gl.GLGridItem()
         self.view_widget.addItem(grid)
-        self.robot_items = []
+        # Retained items per body, updated in place every frame.
+        self.body_items = {}
+
+    def set_source(self, source):
+        """Draw from a different data source, e.g. a recorded log instead of live physics."""
+        self._clear_robot()
+        self.source = source
+        self._settled = None
 
     def render_robot(self):
-        if self.simulation.robot is not None:
-            self._clear_robot()
-            self._render_robot()
+        snapshots = getattr(self.source, 'snapshots', None)
+        if snapshots is not None:
+            # Check settling before reading the poses: if a newer snapshot lands in between, it is
+            # not the one marked settled and simply gets drawn next frame.
+            previous, latest = snapshots.pair()
+            now = time.perf_counter()
+            if latest is not None and (not self.interpolate or previous is None
+                                       or now >= 2 * latest.wall_time - previous.wall_time):
+                self._settled = latest
+        poses = self.source.get_link_poses(interpolated=self.interpolate)
+        for body in [body for body in self.body_items if body not in poses]:
+            self.body_items.pop(body).remove()
+        for body, (positions, orientations) in poses.items():
+            items = self.body_items.get(body)
+            if items is None:
+                items = self.body_items[body] = BodyItems(
+                    self.view_widget, self.source.get_visual_shapes(body), self.mesh_cache, positions)
+            items.update(positions, orientations)
+
+    def apply_level_of_detail(self):
+        """Cull and pick a level of detail for every visual of every body in one vectorized pass."""
+        bodies = [items for items in self.body_items.values() if items.items]
+        if not bodies:
+            self.lod_points.setData(pos=np.zeros((0, 3)))
+            self._show_counts(np.zeros(0, dtype=int))
+            return
+        centres = np.concatenate([items.centres for items in bodies])
+        radii = np.concatenate([items.radii for items in bodies])
+        levels = self.detail_levels(centres, radii)
+        splits = np.cumsum([len(items.items) for items in bodies])[:-1]
+        for items, body_levels in zip(bodies, np.split(levels, splits)):
+            items.apply(body_levels)
+        points = levels == POINT
+        colors = np.concatenate([items.colors for items in bodies])
+        self.lod_points.setData(pos=centres[points], color=colors[points])
+        self._show_counts(levels)
+
+    def detail_levels(self, centres, radii):
+        """Level per bounding sphere: culled outside the view frustum, otherwise by apparent size."""
+        widget = self.view_widget
+        if widget.width() == 0 or widget.height() == 0:
+            return np.full(len(radii), FULL)
+        clip = _to_array(widget.projectionMatrix()) @ _to_array(widget.viewMatrix())
+        # The six frustum planes, read off the combined clip matrix (Gribb-Hartmann).
+        planes = np.array([clip[3] + clip[0], clip[3] - clip[0], clip[3] + clip[1],
+                           clip[3] - clip[1], clip[3] + clip[2], clip[3] - clip[2]])
+        planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+        inside = (centres @ planes[:, :3].T + planes[:, 3] >= -radii[:, None]).all(axis=1)
+
+        camera = widget.cameraPosition()
+        distances = np.linalg.norm(centres - np.array([camera.x(), camera.y(), camera.z()]), axis=1)
+        size = radii / np.maximum(distances, 1e-6)
+        levels = np.where(size >= self.HULL_SIZE, FULL, np.where(size >= self.POINT_SIZE, HULL, POINT))
+        levels[~inside] = CULLED
+        return levels
+
+    def _show_counts(self, levels):
+        counts = np.bincount(levels, minlength=FULL + 1)
+        self.overlay.setText(f"Drawn {len(levels) - counts[CULLED]} (mesh {counts[FULL]}, hull {counts[HULL]}, "
+                             f"point {counts[POINT]}) | Culled {counts[CULLED]}")
+        self.overlay.adjustSize()
+
+    def _view_key(self):
+        widget = self.view_widget
+        return tuple(widget.viewMatrix().data()), widget.width(), widget.height(), widget.opts['fov']
 
     def _clear_robot(self):
-        for item in self.robot_items:
-            self.view_widget.removeItem(item)
-        self.robot_items = []
-
-    def _render_robot(self):
-        for link_index in range(p.getNumJoints(self.simulation.robot)):
-            link_state = p.getLinkState(self.simulation.robot, link_index)
-            pos, orn = link_state[4], link_state[5]
-            self._draw_sphere(pos)
-
-    def _draw_sphere(self, pos):
-        pos = np.array(pos)
-        sphere = gl.GLScatterPlotItem(pos=[pos], size=0.1, color=(1, 0, 0, 1))
-        self.view_widget.addItem(sphere)
-        self.robot_items.append(sphere)
-    
+        for items in self.body_items.values():
+            items.remove()
+        self.body_items = {}
+        self.lod_points.setData(pos=np.zeros((0, 3)))
+
     def update_view(self):
-        self.render_robot()
+        view = self._view_key()
+        snapshots = getattr(self.source, 'snapshots', None)
+        if snapshots is not None and snapshots.latest() is not None and snapshots.latest() is self._settled:
+            if view == self._drawn_view:
+                return
+        else:
+            self.render_robot()
+        # Culling follows the camera too, so it is redone when only the view has moved.
+        self.apply_level_of_detail()
+        self._drawn_view = view
         self.view_widget.update()
 
     def reset_view(self):
         self._clear_robot()
-        self.init_view()
\ No newline at end of file
+        self._settled = None
+        self.init_view()
+
+def _to_array(matrix):
+    """A QMatrix4x4 as a row-major NumPy array."""
+    return np.array(matrix.data(), dtype=float).reshape(4, 4).T
@@ -0,0 +1,101 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt5.QtCore import QObject, pyqtSignal
+from physics_engine.file_hash import content_hash
+
+
+class SceneLoadTask(QObject):
+    """Loads scene files off the GUI thread: parse, validate and pre-read in parallel, then commit once.
+
+    Scene files and each distinct URDF are parsed on a thread pool, and every referenced mesh is
+    hashed once so the renderer's mesh cache and the URDF cache find it warm. Only the final step touches
+    the physics world, through a single `Simulation.load_robots` batch. Signals are emitted from
+    the loading thread and arrive on the GUI thread as queued calls.
+    """
+
+    # (done, total, message) for a progress bar.
+    progress = pyqtSignal(int, int, str)
+    # (bodies loaded, error messages); empty bodies with no errors means the load was cancelled.
+    finished = pyqtSignal(list, list)
+
+    def __init__(self, file_loader, file_paths, max_workers=None):
+        super().__init__()
+        self.file_loader = file_loader
+        self.file_paths = list(file_paths)
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.logger = logging.getLogger(__name__)
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="SceneLoader", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Stop at the next checkpoint; bodies already committed in this batch are removed."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _run(self):
+        try:
+            bodies, errors = self._load()
+        except Exception as e:
+            self.logger.error(f"Scene loading failed: {e}")
+            bodies, errors = [], [str(e)]
+        self.finished.emit(bodies, errors)
+
+    def _load(self):
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            groups = []
+            plans = {pool.submit(self.file_loader.plan_file, path): path for path in self.file_paths}
+            for done, future in enumerate(as_completed(plans), 1):
+                if self.cancelled:
+                    return [], []
+                try:
+                    groups.extend(future.result())
+                except Exception as e:
+                    errors.append(f"{plans[future]}: {e}")
+                self.progress.emit(done, len(plans), f"Parsed {os.path.basename(plans[future])}")
+
+            # Many instances of one robot share a single validation and mesh read.
+            urdfs = {group['urdf'] for group in groups}
+            validations = {pool.submit(self.file_loader.validate_urdf, urdf): urdf for urdf in urdfs}
+            invalid = set()
+            meshes = set()
+            for done, future in enumerate(as_completed(validations), 1):
+                if self.cancelled:
+                    return [], []
+                urdf = validations[future]
+                try:
+                    meshes.update(future.result())
+                except Exception as e:
+                    invalid.add(urdf)
+                    errors.append(f"{urdf}: {e}")
+                self.progress.emit(done, len(validations), f"Validated {os.path.basename(urdf)}")
+
+            reads = [pool.submit(content_hash, mesh) for mesh in meshes]
+            for done, future in enumerate(as_completed(reads), 1):
+                if self.cancelled:
+                    return [], []
+                try:
+                    future.result()
+                except OSError as e:
+                    self.logger.warning(f"Cannot pre-read mesh: {e}")
+                self.progress.emit(done, len(reads), "Reading meshes")
+
+        groups = [group for group in groups if group['urdf'] not in invalid]
+        count = sum(len(group['positions']) for group in groups)
+        simulation = self.file_loader.simulation
+        if groups and not simulation.engine.connected:
+            return [], errors + ["Start the simulation before loading robots"]
+        self.progress.emit(0, count, f"Adding {count} robots to the world")
+        bodies = simulation.load_robots(groups, cancelled=self._cancelled.is_set)
+        if bodies:
+            self.progress.emit(count, count, f"Loaded {len(bodies)} robots")
+        return bodies, errors
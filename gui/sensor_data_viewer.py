@@ -1,10 +1,12 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QLabel
-from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTableView, QHeaderView, QLabel
+from PyQt5.QtCore import QTimer, QSize
+from gui.sensor_table_model import SensorTableModel, THUMBNAIL_WIDTH
 
 class SensorDataViewer(QWidget):
     def __init__(self, simulation):
         super().__init__()
         self.simulation = simulation
+        self.source = simulation
         self.init_ui()
         self.init_timer()
 
@@ -13,23 +15,26 @@ class SensorDataViewer(QWidget):
         self.sensor_label = QLabel('Sensor Data')
         layout.addWidget(self.sensor_label)
 
-        self.table_widget = QTableWidget()
-        self.table_widget.setColumnCount(2)
-        self.table_widget.setHorizontalHeaderLabels(['Sensor', 'Value'])
-        layout.addWidget(self.table_widget)
+        self.model = SensorTableModel(self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setIconSize(QSize(THUMBNAIL_WIDTH, THUMBNAIL_WIDTH))
+        self.table_view.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table_view.verticalHeader().setVisible(False)
+        layout.addWidget(self.table_view)
 
         self.setLayout(layout)
 
     def init_timer(self):
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_data)
-        self.timer.start(1000)  # Update every second
+        self.timer.start(33)  # ~30 Hz; rows without a new reading cost one timestamp comparison
 
-    def update_data(self):
-        self.table_widget.setRowCount(0)  # Clear existing data
+    def set_source(self, source):
+        """Show readings from a different data source, e.g. a recorded log."""
+        self.source = source
+        self.model.clear()
+        self.update_data()
 
-        sensor_data = self.simulation.get_sensor_data()
-        for i, (sensor, value) in enumerate(sensor_data.items()):
-            self.table_widget.insertRow(i)
-            self.table_widget.setItem(i, 0, QTableWidgetItem(sensor))
-            self.table_widget.setItem(i, 1, QTableWidgetItem(str(value)))
\ No newline at end of file
+    def update_data(self):
+        self.model.refresh(self.source)
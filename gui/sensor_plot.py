@@ -0,0 +1,167 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QComboBox, QListWidget, QListWidgetItem, QLabel
+from PyQt5.QtCore import Qt, QTimer
+
+# Vector channels up to this length are offered as one trace per component.
+MAX_TRACE_COMPONENTS = 6
+COMPONENT_NAMES = ('x', 'y', 'z', 'w')
+
+
+class SensorPlotPanel(QWidget):
+    """Rolling time series of sensor channels and a polar view of one lidar scan."""
+
+    WINDOWS = [('10 s', 10.0), ('1 min', 60.0), ('10 min', 600.0), ('1 h', 3600.0)]
+    # Samples handed to each curve per frame, whatever the window length.
+    MAX_POINTS = 2000
+
+    def __init__(self, simulation, parent=None):
+        super().__init__(parent)
+        self.simulation = simulation
+        self.source = simulation
+        self.channel_shapes = {}
+        # (sensor, channel, component) -> PlotDataItem, kept while the trace stays selected.
+        self.curves = {}
+        self._beam_angles = {}
+        self.init_ui()
+        self.init_timer()
+
+    def init_ui(self):
+        layout = QHBoxLayout()
+
+        controls = QVBoxLayout()
+        controls.addWidget(QLabel('Window'))
+        self.window_combo = QComboBox()
+        for label, _ in self.WINDOWS:
+            self.window_combo.addItem(label)
+        controls.addWidget(self.window_combo)
+
+        controls.addWidget(QLabel('Channels'))
+        self.channel_list = QListWidget()
+        self.channel_list.itemChanged.connect(self.update_curves)
+        controls.addWidget(self.channel_list)
+
+        controls.addWidget(QLabel('Lidar'))
+        self.lidar_combo = QComboBox()
+        controls.addWidget(self.lidar_combo)
+        layout.addLayout(controls, 1)
+
+        self.plots = pg.GraphicsLayoutWidget()
+        self.trace_plot = self.plots.addPlot(row=0, col=0, title='Sensor traces')
+        self.trace_plot.setLabel('bottom', 'Sim time', units='s')
+        self.trace_plot.addLegend()
+        self.trace_plot.setClipToView(True)
+        self.lidar_plot = self.plots.addPlot(row=1, col=0, title='Lidar scan')
+        self.lidar_plot.setAspectLocked(True)
+        self.lidar_plot.showGrid(x=True, y=True)
+        self.lidar_points = pg.ScatterPlotItem(size=3, pen=None, brush=pg.mkBrush(0, 200, 255))
+        self.lidar_plot.addItem(self.lidar_points)
+        layout.addWidget(self.plots, 3)
+
+        self.setLayout(layout)
+
+    def init_timer(self):
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_plots)
+        self.timer.start(50)  # 20 Hz
+
+    def set_source(self, source):
+        """Plot from a different data source, e.g. a recorded log."""
+        self.source = source
+        self.channel_shapes = {}
+        self.channel_list.clear()
+        self.lidar_combo.clear()
+        self.update_curves()
+        self.lidar_points.setData(x=[], y=[])
+
+    def refresh_channels(self):
+        """Offer newly recorded channels; selections already made are kept."""
+        shapes = self.source.get_sensor_channels()
+        if shapes == self.channel_shapes:
+            return
+        self.channel_shapes = shapes
+        listed = {self.channel_list.item(i).data(Qt.UserRole) for i in range(self.channel_list.count())}
+        lidars = {self.lidar_combo.itemText(i) for i in range(self.lidar_combo.count())}
+        self.channel_list.blockSignals(True)
+        for name, channels in shapes.items():
+            for channel, shape in channels.items():
+                if channel == 'ranges' and len(shape) == 2 and name not in lidars:
+                    self.lidar_combo.addItem(name)
+                for component in _trace_components(shape):
+                    key = (name, channel, component)
+                    if key in listed:
+                        continue
+                    item = QListWidgetItem(_trace_label(key))
+                    item.setData(Qt.UserRole, key)
+                    item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                    item.setCheckState(Qt.Unchecked)
+                    self.channel_list.addItem(item)
+        self.channel_list.blockSignals(False)
+
+    def update_curves(self):
+        """Create curves for newly checked traces and drop unchecked ones."""
+        # Colours follow the list position, so a trace keeps its colour while others come and go.
+        selected = {}
+        for i in range(self.channel_list.count()):
+            item = self.channel_list.item(i)
+            if item.checkState() == Qt.Checked:
+                selected[item.data(Qt.UserRole)] = i
+        for key in [key for key in self.curves if key not in selected]:
+            self.trace_plot.removeItem(self.curves.pop(key))
+        for key in [key for key in selected if key not in self.curves]:
+            pen = pg.mkPen(pg.intColor(selected[key], hues=12), width=1)
+            self.curves[key] = self.trace_plot.plot(name=_trace_label(key), pen=pen)
+
+    def update_plots(self):
+        if not self.isVisible():
+            return
+        self.refresh_channels()
+        seconds = self.WINDOWS[self.window_combo.currentIndex()][1]
+        # One trace fetch per channel serves all of its components.
+        traces = {}
+        for (name, channel, component), curve in self.curves.items():
+            if (name, channel) not in traces:
+                traces[(name, channel)] = self.source.get_sensor_trace(name, channel, seconds, self.MAX_POINTS)
+            times, values = traces[(name, channel)]
+            curve.setData(times, values if component is None else values[:, component])
+        self.update_lidar()
+
+    def update_lidar(self):
+        name = self.lidar_combo.currentText()
+        reading = self.source.get_sensor_data().get(name) if name else None
+        if not reading or reading.get('ranges') is None:
+            return
+        ranges = np.asarray(reading['ranges'])
+        # The middle channel is the one closest to the sensor's horizontal plane.
+        scan = ranges[ranges.shape[0] // 2]
+        angles = self._angles(name, len(scan))
+        hit = np.isfinite(scan)
+        self.lidar_points.setData(x=scan[hit] * np.cos(angles[hit]), y=scan[hit] * np.sin(angles[hit]))
+
+    def _angles(self, name, beams):
+        """Beam azimuths, from the live sensor's field of view when it is known."""
+        angles = self._beam_angles.get((name, beams))
+        if angles is None:
+            fov = 360.0
+            for sensor in getattr(self.source, 'sensors', ()):
+                if sensor.name == name:
+                    fov = getattr(sensor, 'horizontal_fov', fov)
+            angles = np.radians(np.linspace(-fov / 2, fov / 2, beams, endpoint=fov < 360.0))
+            self._beam_angles[(name, beams)] = angles
+        return angles
+
+
+def _trace_components(shape):
+    if len(shape) == 0:
+        return [None]
+    if len(shape) == 1 and shape[0] <= MAX_TRACE_COMPONENTS:
+        return list(range(shape[0]))
+    return []
+
+
+def _trace_label(key):
+    name, channel, component = key
+    if component is None:
+        return f"{name}/{channel}"
+    suffix = COMPONENT_NAMES[component] if component < len(COMPONENT_NAMES) else str(component)
+    return f"{name}/{channel}.{suffix}"
@@ -0,0 +1,132 @@
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QImage, QPixmap
+
+# Arrays up to this many elements are shown in full; larger ones as shape and statistics.
+MAX_INLINE_VALUES = 6
+THUMBNAIL_WIDTH = 64
+
+
+class SensorTableModel(QAbstractTableModel):
+    """One row per sensor, keyed by name; only rows whose reading has a new timestamp are reformatted."""
+
+    HEADERS = ['Sensor', 'Value']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.stamps = []
+        self.summaries = []
+        self.thumbnails = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if column == 0:
+            return self.names[row] if role == Qt.DisplayRole else None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.summaries[row]
+        if role == Qt.DecorationRole:
+            return self.thumbnails[row]
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self.names, self.stamps, self.summaries, self.thumbnails = [], [], [], []
+        self.endResetModel()
+
+    def refresh(self, source):
+        """Pull new readings from a data source, touching only the rows that changed."""
+        stamps = source.get_sensor_timestamps()
+        names = list(stamps)
+        if names[:len(self.names)] != self.names:
+            self.clear()
+        if len(names) > len(self.names):
+            first = len(self.names)
+            self.beginInsertRows(QModelIndex(), first, len(names) - 1)
+            for name in names[first:]:
+                self.names.append(name)
+                self.stamps.append(None)
+                self.summaries.append('no data')
+                self.thumbnails.append(None)
+            self.endInsertRows()
+
+        changed = [row for row, name in enumerate(names) if stamps[name] != self.stamps[row]]
+        if not changed:
+            return
+        readings = source.get_sensor_data()
+        for row in changed:
+            name = names[row]
+            self.stamps[row] = stamps[name]
+            summary, thumbnail = summarize_reading(readings.get(name))
+            if summary == self.summaries[row] and thumbnail is None and self.thumbnails[row] is None:
+                continue
+            self.summaries[row] = summary
+            self.thumbnails[row] = thumbnail
+            index = self.index(row, 1)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.ToolTipRole, Qt.DecorationRole])
+
+
+def summarize_reading(reading):
+    """A bounded one-line summary of a sensor reading, plus a thumbnail if it holds an image."""
+    if reading is None:
+        return 'no data', None
+    if not isinstance(reading, dict):
+        return summarize_value(reading), None
+    thumbnail = None
+    parts = []
+    for key, value in reading.items():
+        if thumbnail is None and _is_image(value):
+            thumbnail = image_thumbnail(value)
+        parts.append(f"{key}: {summarize_value(value)}")
+    return '; '.join(parts), thumbnail
+
+
+def summarize_value(value):
+    """Small arrays in full, large ones as shape, dtype and finite min/max/mean."""
+    if value is None:
+        return 'none'
+    array = np.asarray(value)
+    if array.dtype.kind not in 'iuf':
+        text = str(value)
+        return text if len(text) <= 80 else text[:77] + '...'
+    if array.ndim == 0:
+        return f"{array.item():.4g}"
+    if array.size <= MAX_INLINE_VALUES:
+        return '(' + ', '.join(f"{v:.3g}" for v in array.ravel()) + ')'
+    shape = 'x'.join(str(n) for n in array.shape)
+    if _is_image(array):
+        return f"{shape} {'RGB' if array.shape[2] == 3 else 'RGBA'} image"
+    finite = array[np.isfinite(array)] if array.dtype.kind == 'f' else array.ravel()
+    if not finite.size:
+        return f"{shape} {array.dtype} (no finite values)"
+    text = f"{shape} {array.dtype} min {finite.min():.3g} max {finite.max():.3g} mean {finite.mean():.3g}"
+    if finite.size < array.size:
+        text += f" ({array.size - finite.size} non-finite)"
+    return text
+
+
+def image_thumbnail(image, width=THUMBNAIL_WIDTH):
+    """A small QPixmap of an (h, w, 3|4) uint8 image, subsampled in NumPy before Qt sees it."""
+    step = max(1, image.shape[1] // width)
+    small = np.ascontiguousarray(image[::step, ::step, :3])
+    height, columns = small.shape[:2]
+    qimage = QImage(small.data, columns, height, 3 * columns, QImage.Format_RGB888)
+    # QImage borrows the buffer, so copy it before `small` goes away.
+    return QPixmap.fromImage(qimage.copy())
+
+
+def _is_image(value):
+    return isinstance(value, np.ndarray) and value.dtype == np.uint8 and value.ndim == 3 and value.shape[2] in (3, 4)
@@ -1,11 +1,20 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout, QSlider, QGridLayout
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout, QSlider, QGridLayout, QFileDialog, QMessageBox,
+    QDoubleSpinBox
+)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from physics_engine.replay import ReplaySource
 
 class SimulationControls(QWidget):
+    # Emitted with the Simulation or a ReplaySource whenever views should switch what they show.
+    source_changed = pyqtSignal(object)
+
     def __init__(self, simulation):
         super().__init__()
         self.simulation = simulation
+        self.replay = None
         self.init_ui()
+        self.init_timer()
 
     def init_ui(self):
         layout = QGridLayout()
@@ -22,21 +31,158 @@ class SimulationControls(QWidget):
         self.reset_button.clicked.connect(self.simulation.reset)
         layout.addWidget(self.reset_button, 0, 2)
 
+        self.pause_button = QPushButton('Pause')
+        self.pause_button.setCheckable(True)
+        self.pause_button.toggled.connect(self.toggle_pause)
+        layout.addWidget(self.pause_button, 1, 0)
+
+        self.step_button = QPushButton('Step')
+        self.step_button.clicked.connect(lambda: self.simulation.step_n(1))
+        layout.addWidget(self.step_button, 1, 1)
+
+        self.rate_label = QLabel('0 steps/s')
+        layout.addWidget(self.rate_label, 1, 2)
+
         self.speed_label = QLabel('Simulation Speed:')
-        layout.addWidget(self.speed_label, 1, 0, 1, 2)
+        layout.addWidget(self.speed_label, 2, 0, 1, 2)
 
         self.speed_slider = QSlider(Qt.Horizontal)
         self.speed_slider.setRange(1, 100)
         self.speed_slider.setValue(50)
         self.speed_slider.valueChanged.connect(self.update_speed)
-        layout.addWidget(self.speed_slider, 2, 0, 1, 3)
+        layout.addWidget(self.speed_slider, 3, 0, 1, 3)
+
+        self.speed_value_label = QLabel('1.00x')
+        layout.addWidget(self.speed_value_label, 2, 2)
+
+        self.record_button = QPushButton('Record')
+        self.record_button.setCheckable(True)
+        self.record_button.toggled.connect(self.toggle_recording)
+        layout.addWidget(self.record_button, 4, 0)
+
+        self.open_log_button = QPushButton('Open Log')
+        self.open_log_button.clicked.connect(self.open_log)
+        layout.addWidget(self.open_log_button, 4, 1)
+
+        self.live_button = QPushButton('Live')
+        self.live_button.clicked.connect(self.go_live)
+        layout.addWidget(self.live_button, 4, 2)
+
+        self.play_button = QPushButton('Play')
+        self.play_button.setCheckable(True)
+        self.play_button.toggled.connect(self.toggle_playback)
+        layout.addWidget(self.play_button, 5, 0)
+
+        self.replay_speed = QDoubleSpinBox()
+        self.replay_speed.setRange(0.1, 10.0)
+        self.replay_speed.setSingleStep(0.1)
+        self.replay_speed.setValue(1.0)
+        self.replay_speed.setSuffix('x')
+        self.replay_speed.valueChanged.connect(self.update_replay_speed)
+        layout.addWidget(self.replay_speed, 5, 1)
+
+        self.replay_label = QLabel('')
+        layout.addWidget(self.replay_label, 5, 2)
 
-        self.speed_value_label = QLabel('50')
-        layout.addWidget(self.speed_value_label, 1, 2)
+        self.seek_slider = QSlider(Qt.Horizontal)
+        self.seek_slider.sliderMoved.connect(self.seek)
+        layout.addWidget(self.seek_slider, 6, 0, 1, 3)
 
+        self.set_replay_enabled(False)
         self.setLayout(layout)
 
+    def init_timer(self):
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_rate)
+        self.timer.start(100)
+
+    def toggle_pause(self, paused):
+        if paused:
+            self.simulation.pause()
+            self.pause_button.setText('Resume')
+        else:
+            self.simulation.resume()
+            self.pause_button.setText('Pause')
+
+    def toggle_recording(self, recording):
+        if recording:
+            path, _ = QFileDialog.getSaveFileName(self, "Record Simulation Log", "",
+                                                  "HermiSim Logs (*.hslog);;All Files (*)")
+            if not path:
+                self.record_button.blockSignals(True)
+                self.record_button.setChecked(False)
+                self.record_button.blockSignals(False)
+                return
+            self.simulation.start_recording(path)
+            self.record_button.setText('Stop Recording')
+        else:
+            self.simulation.stop_recording()
+            self.record_button.setText('Record')
+
+    def open_log(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Simulation Log", "",
+                                              "HermiSim Logs (*.hslog);;All Files (*)")
+        if not path:
+            return
+        try:
+            replay = ReplaySource(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to open log: {e}")
+            return
+        self.close_replay()
+        self.replay = replay
+        self.seek_slider.setRange(replay.first_step, replay.last_step)
+        self.seek_slider.setValue(replay.first_step)
+        self.set_replay_enabled(True)
+        self.source_changed.emit(replay)
+
+    def go_live(self):
+        self.close_replay()
+        self.set_replay_enabled(False)
+        self.source_changed.emit(self.simulation)
+
+    def close_replay(self):
+        if self.replay is not None:
+            self.replay.close()
+            self.replay = None
+
+    def set_replay_enabled(self, enabled):
+        for widget in (self.live_button, self.play_button, self.replay_speed, self.seek_slider):
+            widget.setEnabled(enabled)
+        if not enabled:
+            self.play_button.setChecked(False)
+            self.replay_label.setText('')
+
+    def toggle_playback(self, playing):
+        if self.replay is None:
+            return
+        if playing:
+            self.replay.play()
+            self.play_button.setText('Pause')
+        else:
+            self.replay.pause()
+            self.play_button.setText('Play')
+
+    def seek(self, step):
+        if self.replay is not None:
+            self.replay.seek(step)
+
+    def update_replay_speed(self, speed):
+        if self.replay is not None:
+            self.replay.set_speed(speed)
+
     def update_speed(self):
-        speed = self.speed_slider.value()
+        # The slider midpoint maps to real time.
+        speed = self.speed_slider.value() / 50.0
         self.simulation.set_speed(speed)
-        self.speed_value_label.setText(str(speed))
\ No newline at end of file
+        self.speed_value_label.setText(f'{speed:.2f}x')
+
+    def update_rate(self):
+        self.rate_label.setText(f'{self.simulation.steps_per_second:.0f} steps/s')
+        if self.replay is not None:
+            step = self.replay.current_step
+            if not self.seek_slider.isSliderDown():
+                self.seek_slider.setValue(step)
+            self.replay_label.setText(f'Step {step} / {self.replay.last_step}')
+            if not self.replay.playing and self.play_button.isChecked():
+                self.play_button.setChecked(False)
@@ -1,15 +1,48 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QPushButton
+import collections
+import logging
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QComboBox, QLineEdit
+from PyQt5.QtCore import QTimer
+from gui.log_handler import QueueLogHandler
+
+LEVELS = [('Debug', logging.DEBUG), ('Info', logging.INFO), ('Warning', logging.WARNING), ('Error', logging.ERROR)]
 
 class LogTab(QWidget):
+    # Lines kept for re-filtering, and lines the viewer holds before discarding the oldest.
+    MAX_ENTRIES = 20000
+    MAX_LINES = 5000
+    # Records formatted per flush; anything beyond waits for the next tick.
+    FLUSH_LIMIT = 2000
+
     def __init__(self):
         super().__init__()
+        self.entries = collections.deque(maxlen=self.MAX_ENTRIES)
+        self.handler = QueueLogHandler()
+        self.handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        logging.getLogger().addHandler(self.handler)
         self.init_ui()
+        self.init_timer()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
 
-        self.log_viewer = QTextEdit()
+        filters = QHBoxLayout()
+        self.level_combo = QComboBox()
+        for label, _ in LEVELS:
+            self.level_combo.addItem(label)
+        self.level_combo.setCurrentIndex(1)
+        self.level_combo.currentIndexChanged.connect(self.refilter)
+        filters.addWidget(self.level_combo)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('Search logs')
+        self.search_edit.textChanged.connect(self.refilter)
+        filters.addWidget(self.search_edit)
+        layout.addLayout(filters)
+
+        self.log_viewer = QPlainTextEdit()
         self.log_viewer.setReadOnly(True)
+        self.log_viewer.setUndoRedoEnabled(False)
+        self.log_viewer.setMaximumBlockCount(self.MAX_LINES)
         layout.addWidget(self.log_viewer)
 
         self.clear_button = QPushButton('Clear Logs')
@@ -18,8 +51,47 @@ class LogTab(QWidget):
 
         self.setLayout(layout)
 
+    def init_timer(self):
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(100)
+
     def add_log(self, message):
-        self.log_viewer.append(message)
+        self.append_entries([(logging.INFO, message)])
+
+    def flush(self):
+        """Move queued records into the viewer in one append."""
+        records, dropped = self.handler.drain(self.FLUSH_LIMIT)
+        entries = [(record.levelno, self.handler.format(record)) for record in records]
+        if dropped:
+            entries.append((logging.WARNING, f"... {dropped} log messages dropped"))
+        if entries:
+            self.append_entries(entries)
+
+    def append_entries(self, entries):
+        self.entries.extend(entries)
+        lines = [text for level, text in entries if self._matches(level, text)]
+        if not lines:
+            return
+        scrollbar = self.log_viewer.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        self.log_viewer.appendPlainText('\n'.join(lines))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def refilter(self):
+        """Rebuild the viewer from the kept entries after the level or search text changes."""
+        lines = [text for level, text in self.entries if self._matches(level, text)]
+        self.log_viewer.setPlainText('\n'.join(lines[-self.MAX_LINES:]))
+        scrollbar = self.log_viewer.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
 
     def clear_logs(self):
+        self.entries.clear()
         self.log_viewer.clear()
+
+    def _matches(self, level, text):
+        if level < LEVELS[self.level_combo.currentIndex()][1]:
+            return False
+        search = self.search_edit.text()
+        return not search or search.lower() in text.lower()
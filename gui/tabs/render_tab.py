@@ -1,4 +1,5 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout
+from PyQt5.QtCore import Qt, QTimer
 from gui.object_renderer import ObjectRenderer
 
 class RenderTab(QWidget):
@@ -6,6 +7,7 @@ class RenderTab(QWidget):
         super().__init__()
         self.simulation = simulation
         self.init_ui()
+        self.init_timer()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -15,5 +17,15 @@ class RenderTab(QWidget):
 
         self.setLayout(layout)
 
+    def init_timer(self):
+        # Frames are paced here, independently of the physics rate; poses come from the published snapshots.
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.update_render)
+        self.timer.start(16)  # capped at ~60 FPS
+
+    def set_source(self, source):
+        self.renderer.set_source(source)
+
     def update_render(self):
-        self.renderer.render_robot()
\ No newline at end of file
+        self.renderer.update_view()
@@ -1,5 +1,6 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QAction, QFileDialog, QMessageBox
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QAction, QFileDialog, QMessageBox, QProgressDialog
 from gui.styles import apply_styles
 from gui.tabs.render_tab import RenderTab
 from gui.tabs.simulation_tab import SimulationTab
@@ -8,6 +9,7 @@ from gui.tabs.sensor_tab import SensorTab
 from gui.simulation_controls import SimulationControls
 from gui.object_renderer import ObjectRenderer
 from gui.file_loader import FileLoader
+from gui.scene_loader import SceneLoadTask
 from gui.sensor_data_viewer import SensorDataViewer
 from physics_engine.engine import PhysicsEngine
 from physics_engine.sensor import Sensor
@@ -25,15 +27,16 @@ class MainWindow(QMainWindow):
         self.simulation = Simulation()
         self.file_loader = FileLoader(self.simulation)
 
+        # Configure logging before the log tab attaches its handler, or basicConfig would be a no-op.
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
         self.tab_widget = QTabWidget()
         self.setCentralWidget(self.tab_widget)
 
         self.add_tabs()
         self.create_menu()
 
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
-
     def add_tabs(self):
         self.render_tab = RenderTab(self.simulation)
         self.simulation_tab = SimulationTab(self.simulation)
@@ -45,6 +48,13 @@ class MainWindow(QMainWindow):
         self.tab_widget.addTab(self.log_tab, "Logs")
         self.tab_widget.addTab(self.sensor_tab, "Sensors")
 
+        self.simulation_tab.controls.source_changed.connect(self.set_data_source)
+
+    def set_data_source(self, source):
+        """Point the render and sensor views at live physics or a replayed log."""
+        self.render_tab.set_source(source)
+        self.sensor_tab.set_source(source)
+
     def create_menu(self):
         menu_bar = self.menuBar()
 
@@ -63,21 +73,41 @@ class MainWindow(QMainWindow):
 
     def load_file(self):
         options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getOpenFileName(self, "Load URDF/XML File", "", "URDF Files (*.urdf);;XML Files (*.xml);;All Files (*)", options=options)
-        if file_path:
-            try:
-                self.file_loader.load_file(file_path)
-                self.logger.info(f"Loaded file: {file_path}")
-                QMessageBox.information(self, "Success", f"Successfully loaded file: {file_path}")
-            except Exception as e:
-                self.logger.error(f"Failed to load file: {file_path}, Error: {e}")
-                QMessageBox.critical(self, "Error", f"Failed to load file: {e}")
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Load URDF/XML File", "", "URDF Files (*.urdf);;XML Files (*.xml);;All Files (*)", options=options)
+        if file_paths:
+            # Parsing and loading run on a worker; the dialog only reports progress and offers Cancel.
+            self.load_task = SceneLoadTask(self.file_loader, file_paths)
+            self.load_progress = QProgressDialog("Loading scene...", "Cancel", 0, 0, self)
+            self.load_progress.setWindowModality(Qt.WindowModal)
+            self.load_progress.setMinimumDuration(250)
+            self.load_progress.canceled.connect(self.load_task.cancel)
+            self.load_task.progress.connect(self.update_load_progress)
+            self.load_task.finished.connect(lambda bodies, errors: self.finish_load(file_paths, bodies, errors))
+            self.load_task.start()
+
+    def update_load_progress(self, done, total, message):
+        self.load_progress.setMaximum(total)
+        self.load_progress.setValue(done)
+        self.load_progress.setLabelText(message)
+
+    def finish_load(self, file_paths, bodies, errors):
+        cancelled = self.load_task.cancelled
+        self.load_progress.reset()
+        self.load_task = None
+        if errors:
+            self.logger.error(f"Failed to load file: {', '.join(file_paths)}, Error: {'; '.join(errors)}")
+            QMessageBox.critical(self, "Error", "Failed to load file:\n" + "\n".join(errors))
+        elif cancelled:
+            self.logger.info("Loading cancelled")
+        else:
+            self.logger.info(f"Loaded file: {', '.join(file_paths)}")
+            QMessageBox.information(self, "Success", f"Successfully loaded {len(bodies)} robots from {len(file_paths)} file(s)")
 
     def launch_urdf_design_tool(self):
         """Launch the URDF design tool as a separate process."""
         try:
-            script_path = os.path.join(os.path.dirname(__file__), 'utils', 'urdf.py')
-            subprocess.Popen([sys.executable, script_path])
+            # Run as a module from the repository root, so the tool imports through the utils package.
+            subprocess.Popen([sys.executable, '-m', 'utils.urdf'], cwd=os.path.dirname(os.path.abspath(__file__)))
         except Exception as e:
             self.logger.error(f"Failed to launch URDF design tool: {e}")
             QMessageBox.critical(self, "Error", f"Failed to launch URDF design tool: {e}")
@@ -0,0 +1,111 @@
+import argparse
+import multiprocessing
+import time
+import numpy as np
+import pybullet as p
+from gui.file_loader import FileLoader
+from physics_engine.sensor import Sensor
+from physics_engine.simulation import Simulation
+
+
+def make_job(scene, duration=10.0, time_step=1.0 / 240.0, sensors=()):
+    """Describe one headless run of a URDF/XML scene."""
+    return {
+        'scene': scene,
+        'duration': duration,
+        'time_step': time_step,
+        'sensors': [dict(spec) for spec in sensors],
+    }
+
+
+def run_job(job):
+    """Run one scene in its own DIRECT client and return its sensor traces."""
+    simulation = Simulation(time_step=job['time_step'])
+    simulation.connect(p.DIRECT, default_robot=False)
+    try:
+        FileLoader(simulation).load_file(job['scene'])
+        for spec in job['sensors']:
+            simulation.add_sensor(Sensor(
+                simulation.robot,
+                spec['sensor_type'],
+                spec.get('position', (0, 0, 0)),
+                spec.get('orientation', (0, 0, 0, 1)),
+                rate=spec.get('rate'),
+            ))
+        samples = {sensor.name: [] for sensor in simulation.sensors}
+        times = {sensor.name: [] for sensor in simulation.sensors}
+
+        steps = int(round(job['duration'] / job['time_step']))
+        started = time.perf_counter()
+        for _ in range(steps):
+            simulation.step()
+            # Each sensor is only recorded on the steps its rate made it due.
+            for sensor in simulation.last_sampled:
+                times[sensor.name].append(sensor.timestamp)
+                samples[sensor.name].append(_copy_sample(sensor.get_data()))
+        wall_time = time.perf_counter() - started
+    finally:
+        simulation.engine.disconnect()
+
+    return {
+        'scene': job['scene'],
+        'steps': steps,
+        'wall_time': wall_time,
+        'steps_per_second': steps / wall_time if wall_time > 0 else 0.0,
+        'traces': {name: _stack_samples(times[name], values) for name, values in samples.items()},
+    }
+
+
+def run_batch(jobs, processes=None):
+    """Run jobs across a pool of worker processes, one DIRECT client each."""
+    jobs = [make_job(job) if isinstance(job, str) else job for job in jobs]
+    # Spawned workers never inherit the parent's Qt or PyBullet state.
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes) as pool:
+        return list(pool.imap(run_job, jobs, chunksize=1))
+
+
+def _copy_sample(data):
+    """Copy a reading out of the sensor batch's shared arrays."""
+    if isinstance(data, dict):
+        return {key: np.array(value) if isinstance(value, np.ndarray) else value for key, value in data.items()}
+    return data
+
+
+def _stack_samples(times, samples):
+    """Turn a list of per-sample sensor dicts into one array per channel."""
+    channels = {'time': np.asarray(times)}
+    if not samples or not isinstance(samples[0], dict):
+        channels['data'] = samples
+        return channels
+    for key in samples[0]:
+        values = [sample[key] for sample in samples]
+        try:
+            channels[key] = np.asarray(values, dtype=float)
+        except (TypeError, ValueError):
+            channels[key] = values
+    return channels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run URDF/XML scenes headless across a process pool.")
+    parser.add_argument('scenes', nargs='+', help="URDF or XML scene files")
+    parser.add_argument('--duration', type=float, default=10.0, help="Simulated seconds per scene")
+    parser.add_argument('--time-step', type=float, default=1.0 / 240.0, help="Physics timestep in seconds")
+    parser.add_argument('--processes', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--sensor', action='append', default=[], help="Sensor type to attach to each robot")
+    parser.add_argument('--sensor-rate', type=float, default=None, help="Sensor rate in Hz (default: per type)")
+    args = parser.parse_args()
+
+    sensors = [{'sensor_type': sensor_type, 'rate': args.sensor_rate} for sensor_type in args.sensor]
+    jobs = [make_job(scene, args.duration, args.time_step, sensors) for scene in args.scenes]
+    started = time.perf_counter()
+    results = run_batch(jobs, args.processes)
+    for result in results:
+        print(f"{result['scene']}: {result['steps']} steps in {result['wall_time']:.2f}s "
+              f"({result['steps_per_second']:.0f} steps/s)")
+    print(f"Ran {len(results)} scenes in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
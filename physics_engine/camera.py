@@ -0,0 +1,100 @@
+import numpy as np
+import pybullet as p
+from physics_engine.sensor import Sensor
+
+
+class CameraSensor(Sensor):
+    # Frames are too large to keep a rolling history of by default.
+    record_history = False
+
+    def __init__(self, robot, position=(0, 0, 0), orientation=(0, 0, 0, 1), physics_client=0, link_index=-1,
+                 width=320, height=240, fov=60.0, near=0.05, far=50.0, render_rate=30.0,
+                 segmentation=False, renderer=p.ER_TINY_RENDERER, name=None):
+        super().__init__(robot, 'Camera', position, orientation, physics_client, link_index, render_rate, name)
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self.near = near
+        self.far = far
+        self.segmentation_enabled = segmentation
+        self.renderer = renderer
+
+        self.projection_matrix = p.computeProjectionMatrixFOV(fov, width / height, near, far)
+        self.view_matrix = None
+        self._view_pose = None
+        self._rgb = None
+        self._depth = None
+        self._segmentation = None
+
+    def update(self):
+        """Render a frame; the scheduler calls this at the camera's render rate."""
+        flags = 0 if self.segmentation_enabled else p.ER_NO_SEGMENTATION_MASK
+        _, _, rgb, depth, segmentation = p.getCameraImage(
+            self.width, self.height,
+            viewMatrix=self._compute_view_matrix(),
+            projectionMatrix=self.projection_matrix,
+            renderer=self.renderer,
+            flags=flags,
+            physicsClientId=self.physics_client,
+        )
+        self._rgb = rgb
+        self._depth = depth
+        self._segmentation = segmentation if self.segmentation_enabled else None
+        self.data = None
+
+    def get_data(self):
+        if self.data is None and self._rgb is not None:
+            self.data = {
+                'image': self.rgb(),
+                'depth': self.depth(),
+            }
+            if self._segmentation is not None:
+                self.data['segmentation'] = self.segmentation()
+        return self.data
+
+    def rgb(self):
+        """Latest RGB frame as a (height, width, 3) view of the rendered buffer."""
+        if self._rgb is None:
+            return None
+        return self._as_array(self._rgb, np.uint8, 4)[:, :, :3]
+
+    def depth(self):
+        """Latest raw depth buffer in [0, 1] as a (height, width) array."""
+        if self._depth is None:
+            return None
+        return self._as_array(self._depth, np.float32)
+
+    def linear_depth(self):
+        """Latest depth buffer converted to metres along the view axis."""
+        depth = self.depth()
+        if depth is None:
+            return None
+        return self.far * self.near / (self.far - (self.far - self.near) * depth)
+
+    def segmentation(self):
+        """Latest segmentation mask as a (height, width) array of body/link ids."""
+        if self._segmentation is None:
+            return None
+        return self._as_array(self._segmentation, np.int32)
+
+    def _as_array(self, buffer, dtype, channels=None):
+        # PyBullet built with NumPy hands back arrays, which reshape without copying.
+        shape = (self.height, self.width) if channels is None else (self.height, self.width, channels)
+        return np.asarray(buffer, dtype=dtype).reshape(shape)
+
+    def _compute_view_matrix(self):
+        """View matrix from the mount pose, recomputed only when the pose moves."""
+        if self.link_index < 0:
+            position, orientation = p.getBasePositionAndOrientation(self.robot, physicsClientId=self.physics_client)
+        else:
+            link_state = p.getLinkState(self.robot, self.link_index, physicsClientId=self.physics_client)
+            position, orientation = link_state[4], link_state[5]
+        pose = (tuple(position), tuple(orientation))
+        if pose != self._view_pose:
+            eye, orientation = p.multiplyTransforms(position, orientation, self.position, self.orientation)
+            rotation = np.array(p.getMatrixFromQuaternion(orientation)).reshape(3, 3)
+            # The camera looks down its +x axis with +z up.
+            target = np.asarray(eye) + rotation[:, 0]
+            self.view_matrix = p.computeViewMatrix(eye, target.tolist(), rotation[:, 2].tolist())
+            self._view_pose = pose
+        return self.view_matrix
@@ -0,0 +1,226 @@
+import logging
+import numpy as np
+import pybullet as p
+
+MODES = {'position': p.POSITION_CONTROL, 'velocity': p.VELOCITY_CONTROL, 'torque': p.TORQUE_CONTROL}
+
+
+class JointCommand:
+    """The latest motor targets for one body."""
+
+    __slots__ = ('mode', 'joints', 'values', 'forces', 'position_gains', 'velocity_gains', 'dirty')
+
+    def __init__(self, mode, joints, values, forces=None, position_gains=None, velocity_gains=None):
+        self.mode = mode
+        self.joints = joints
+        self.values = values
+        self.forces = forces
+        self.position_gains = position_gains
+        self.velocity_gains = velocity_gains
+        self.dirty = True
+
+
+class JointControl:
+    """Joint targets for whole robots or groups of them, applied on the physics thread.
+
+    Targets are NumPy arrays, one row per body, and each body's command goes to PyBullet as a
+    single `setJointMotorControlArray` call. Position and velocity motors persist in PyBullet, so
+    they are only re-sent when changed; torques are re-sent every step. Controllers registered
+    with `add_controller` are called as `controller(simulation, sim_time)` before every step.
+    """
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.commands = {}
+        self.controllers = []
+        # Joints whose default velocity motors were switched off for torque control, per body.
+        self._released = {}
+        self.logger = logging.getLogger(__name__)
+
+    def set_targets(self, bodies, mode, values, joints=None, forces=None, position_gains=None, velocity_gains=None):
+        """Command `mode` ('position', 'velocity' or 'torque') targets for one or more bodies.
+
+        `bodies` is a body id or scene name, or a list of them; `values` is a scalar or (dof,) for
+        every body, or (len(bodies), dof). `joints` are indices or names (default: every movable
+        joint), and `forces` and the gains are scalars or per-joint arrays.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown control mode: {mode}")
+        with self.simulation.lock:
+            bodies = [self._body_id(body) for body in _as_list(bodies)]
+            indices = [self._joints(body, joints) for body in bodies]
+            dof = len(indices[0]) if indices else 0
+            if any(len(joint_indices) != dof for joint_indices in indices):
+                raise ValueError("Bodies commanded together need the same number of joints")
+            values = np.asarray(values, dtype=float)
+            try:
+                values = np.broadcast_to(values, (len(bodies), dof))
+            except ValueError:
+                raise ValueError(f"Cannot use targets of shape {values.shape} for {len(bodies)} bodies "
+                                 f"with {dof} joints") from None
+            for body, joint_indices, row in zip(bodies, indices, values):
+                self.commands[body] = JointCommand(mode, joint_indices, row.tolist(), _per_joint(forces, dof),
+                                                   _per_joint(position_gains, dof), _per_joint(velocity_gains, dof))
+
+    def joint_states(self, bodies, joints=None):
+        """(positions, velocities), each (len(bodies), dof), with one getJointStates call per body."""
+        bodies = _as_list(bodies)
+        client = self.simulation.engine.physics_client
+        with self.simulation.lock:
+            rows = []
+            for body in bodies:
+                body = self._body_id(body)
+                states = p.getJointStates(body, self._joints(body, joints), physicsClientId=client)
+                rows.append([(state[0], state[1]) for state in states])
+        states = np.array(rows, dtype=float).reshape(len(bodies), -1, 2)
+        return states[..., 0], states[..., 1]
+
+    def clear(self, body=None):
+        """Drop the commands for one body, or every command and controller."""
+        with self.simulation.lock:
+            if body is None:
+                self.commands.clear()
+                self.controllers.clear()
+                self._released.clear()
+            else:
+                body = self._body_id(body)
+                self.commands.pop(body, None)
+                self._released.pop(body, None)
+
+    def add_controller(self, controller):
+        with self.simulation.lock:
+            self.controllers.append(controller)
+        return controller
+
+    def remove_controller(self, controller):
+        with self.simulation.lock:
+            if controller in self.controllers:
+                self.controllers.remove(controller)
+
+    def apply(self, sim_time):
+        """Run the controllers, then send each changed command; called by Simulation.step under its lock."""
+        for controller in list(self.controllers):
+            try:
+                controller(self.simulation, sim_time)
+            except Exception as e:
+                # A failing controller is dropped rather than stopping the physics thread.
+                self.logger.exception(f"Controller {controller!r} failed and was removed: {e}")
+                self.remove_controller(controller)
+        client = self.simulation.engine.physics_client
+        for body, command in self.commands.items():
+            if not command.dirty and command.mode != 'torque':
+                continue
+            if command.mode == 'torque':
+                self._release(body, command.joints, client)
+            else:
+                self._released.pop(body, None)
+            options = {}
+            if command.mode == 'position':
+                options['targetPositions'] = command.values
+            elif command.mode == 'velocity':
+                options['targetVelocities'] = command.values
+            if command.mode == 'torque':
+                options['forces'] = command.values
+            elif command.forces is not None:
+                options['forces'] = command.forces
+            if command.position_gains is not None:
+                options['positionGains'] = command.position_gains
+            if command.velocity_gains is not None:
+                options['velocityGains'] = command.velocity_gains
+            p.setJointMotorControlArray(body, command.joints, MODES[command.mode], physicsClientId=client, **options)
+            command.dirty = False
+
+    def _release(self, body, joints, client):
+        # PyBullet's default velocity motors would cancel applied torques, so switch them off once.
+        released = self._released.setdefault(body, set())
+        pending = [joint for joint in joints if joint not in released]
+        if pending:
+            p.setJointMotorControlArray(body, pending, p.VELOCITY_CONTROL, forces=[0.0] * len(pending),
+                                        physicsClientId=client)
+            released.update(pending)
+
+    def _body_id(self, body):
+        return self.simulation.scene.body(body) if isinstance(body, str) else int(body)
+
+    def _joints(self, body, joints):
+        if joints is None:
+            tree = self.simulation.kinematics(body)
+            if tree is None:
+                raise ValueError(f"Body {body} has no joints to control")
+            return tree.movable.tolist()
+        return [self.simulation.scene.joint_index(body, joint) if isinstance(joint, str) else int(joint)
+                for joint in joints]
+
+
+class PDController:
+    """Joint-space PD control of a group of bodies, computed in NumPy and applied as torques.
+
+    Gains, targets and `max_torque` broadcast over (bodies, dof).
+    """
+
+    def __init__(self, bodies, targets, kp, kd, joints=None, target_velocities=0.0, max_torque=None):
+        self.bodies = _as_list(bodies)
+        self.joints = joints
+        self.kp = np.asarray(kp, dtype=float)
+        self.kd = np.asarray(kd, dtype=float)
+        self.max_torque = None if max_torque is None else np.asarray(max_torque, dtype=float)
+        self.set_targets(targets, target_velocities)
+
+    def set_targets(self, targets, target_velocities=0.0):
+        self.targets = np.asarray(targets, dtype=float)
+        self.target_velocities = np.asarray(target_velocities, dtype=float)
+
+    def __call__(self, simulation, sim_time):
+        positions, velocities = simulation.control.joint_states(self.bodies, self.joints)
+        torques = self.kp * (self.targets - positions) + self.kd * (self.target_velocities - velocities)
+        if self.max_torque is not None:
+            torques = np.clip(torques, -self.max_torque, self.max_torque)
+        simulation.control.set_targets(self.bodies, 'torque', torques, self.joints)
+
+
+class TrajectoryPlayer:
+    """Plays joint-position waypoints back as position targets, linearly interpolated in sim time.
+
+    `positions` is (waypoints, dof) for every body or (waypoints, bodies, dof); `times` starts
+    from the first step the player runs. Without `loop` it holds the last waypoint and then
+    removes itself.
+    """
+
+    def __init__(self, bodies, times, positions, joints=None, loop=False, **gains):
+        self.bodies = _as_list(bodies)
+        self.times = np.asarray(times, dtype=float)
+        self.positions = np.asarray(positions, dtype=float)
+        if len(self.times) != len(self.positions) or len(self.times) < 1:
+            raise ValueError("A trajectory needs one time per waypoint")
+        self.joints = joints
+        self.loop = loop
+        # forces, position_gains, velocity_gains for the position motors.
+        self.gains = gains
+        self.start_time = None
+
+    def __call__(self, simulation, sim_time):
+        if self.start_time is None:
+            self.start_time = sim_time
+        elapsed = sim_time - self.start_time
+        duration = self.times[-1] - self.times[0]
+        if self.loop and duration > 0:
+            elapsed %= duration
+        t = self.times[0] + elapsed
+        finished = not self.loop and t >= self.times[-1]
+        index = int(np.clip(np.searchsorted(self.times, t, side='right') - 1, 0, len(self.times) - 1))
+        if finished or index == len(self.times) - 1:
+            targets = self.positions[-1]
+        else:
+            fraction = (t - self.times[index]) / (self.times[index + 1] - self.times[index])
+            targets = self.positions[index] + fraction * (self.positions[index + 1] - self.positions[index])
+        simulation.control.set_targets(self.bodies, 'position', targets, self.joints, **self.gains)
+        if finished:
+            simulation.control.remove_controller(self)
+
+
+def _as_list(bodies):
+    return [bodies] if isinstance(bodies, (int, str, np.integer)) else list(bodies)
+
+
+def _per_joint(value, dof):
+    return None if value is None else np.broadcast_to(np.asarray(value, dtype=float), (dof,)).tolist()
@@ -1,65 +1,94 @@
 # physics_engine/engine.py
+import logging
 import pybullet as p
 import pybullet_data
 
 class PhysicsEngine:
+    # Every connected engine keyed by its PyBullet client id.
+    instances = {}
+
     def __init__(self):
         self.physics_client = None
         self.connected = False
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def get(cls, physics_client):
+        """Return the connected engine that owns a client id, if any."""
+        return cls.instances.get(physics_client)
+
+    @classmethod
+    def disconnect_all(cls):
+        """Disconnect every engine in the registry."""
+        for engine in list(cls.instances.values()):
+            engine.disconnect()
 
     def connect(self, mode=p.GUI):
         """Connect to the PyBullet physics server."""
         try:
-            self.physics_client = p.connect(mode)
-            p.setAdditionalSearchPath(pybullet_data.getDataPath())
-            p.setGravity(0, 0, -9.81)
+            physics_client = p.connect(mode)
+            if physics_client < 0:
+                raise RuntimeError("p.connect returned an invalid client id")
+            self.physics_client = physics_client
+            p.setAdditionalSearchPath(pybullet_data.getDataPath(), physicsClientId=self.physics_client)
+            p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client)
             self.connected = True
-            print("Connected to PyBullet physics server.")
+            PhysicsEngine.instances[self.physics_client] = self
+            self.logger.info(f"Connected to PyBullet physics server (client {self.physics_client}).")
         except Exception as e:
-            print(f"Failed to connect to PyBullet: {e}")
+            self.logger.error(f"Failed to connect to PyBullet: {e}")
 
     def disconnect(self):
         """Disconnect from the PyBullet physics server."""
         if self.physics_client is not None and self.connected:
-            p.disconnect(self.physics_client)
+            p.disconnect(physicsClientId=self.physics_client)
+            PhysicsEngine.instances.pop(self.physics_client, None)
             self.physics_client = None
             self.connected = False
-            print("Disconnected from PyBullet physics server.")
+            self.logger.info("Disconnected from PyBullet physics server.")
 
     def step_simulation(self):
         """Step the simulation forward."""
         if self.physics_client is not None and self.connected:
-            p.stepSimulation()
+            p.stepSimulation(physicsClientId=self.physics_client)
+        else:
+            self.logger.warning("Cannot step simulation. Physics client is not connected.")
+
+    def set_time_step(self, time_step):
+        """Set the fixed physics timestep in seconds."""
+        if self.physics_client is not None and self.connected:
+            p.setTimeStep(time_step, physicsClientId=self.physics_client)
         else:
-            print("Cannot step simulation. Physics client is not connected.")
+            self.logger.warning("Cannot set time step. Physics client is not connected.")
 
-    def load_urdf(self, urdf_file, base_position=(0, 0, 0), base_orientation=(0, 0, 0, 1)):
+    def load_urdf(self, urdf_file, base_position=(0, 0, 0), base_orientation=(0, 0, 0, 1), flags=0):
         """Load a URDF file into the simulation."""
         if self.physics_client is not None and self.connected:
-            return p.loadURDF(urdf_file, basePosition=base_position, baseOrientation=base_orientation)
+            return p.loadURDF(urdf_file, basePosition=base_position, baseOrientation=base_orientation, flags=flags,
+                              physicsClientId=self.physics_client)
         else:
-            print("Cannot load URDF. Physics client is not connected.")
+            self.logger.warning("Cannot load URDF. Physics client is not connected.")
             return None
 
     def get_body_info(self, body_id):
         """Get information about a body in the simulation."""
         if self.physics_client is not None and self.connected:
-            return p.getBodyInfo(body_id)
+            return p.getBodyInfo(body_id, physicsClientId=self.physics_client)
         else:
-            print("Cannot get body info. Physics client is not connected.")
+            self.logger.warning("Cannot get body info. Physics client is not connected.")
             return None
 
     def apply_force(self, body_id, link_index, force, position, flags=p.WORLD_FRAME):
         """Apply a force to a body in the simulation."""
         if self.physics_client is not None and self.connected:
-            p.applyExternalForce(body_id, link_index, force, position, flags)
+            p.applyExternalForce(body_id, link_index, force, position, flags, physicsClientId=self.physics_client)
         else:
-            print("Cannot apply force. Physics client is not connected.")
+            self.logger.warning("Cannot apply force. Physics client is not connected.")
 
     def reset_simulation(self):
         """Reset the simulation."""
         if self.physics_client is not None and self.connected:
-            p.resetSimulation()
-            print("Simulation reset.")
+            p.resetSimulation(physicsClientId=self.physics_client)
+            self.logger.info("Simulation reset.")
         else:
-            print("Cannot reset simulation. Physics client is not connected.")
+            self.logger.warning("Cannot reset simulation. Physics client is not connected.")
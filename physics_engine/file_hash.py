@@ -0,0 +1,17 @@
+import hashlib
+import os
+
+# (path, mtime, size) -> content hash, shared by every cache so a file is read at most once.
+_hashes = {}
+
+
+def content_hash(path):
+    """SHA-1 of a file's bytes, memoised by path, mtime and size."""
+    stat = os.stat(path)
+    stamp = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _hashes.get(stamp)
+    if digest is None:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        _hashes[stamp] = digest
+    return digest
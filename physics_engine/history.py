@@ -0,0 +1,193 @@
+import logging
+import math
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity, shape=(), dtype=float):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((capacity,) + tuple(shape), dtype=dtype)
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def shape(self):
+        """Shape of a single sample."""
+        return self.values.shape[1:]
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes
+
+    def append(self, time, value):
+        """Store one sample, overwriting the oldest once full."""
+        self.times[self.head] = time
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def latest(self, count=None):
+        """The newest samples as (times, values), oldest first."""
+        count = self.count if count is None else min(count, self.count)
+        return self._slice(self.count - count, self.count)
+
+    def window(self, start_time, end_time=None):
+        """Samples with start_time <= t <= end_time as (times, values), oldest first."""
+        start = self._search(start_time, 'left')
+        stop = self.count if end_time is None else self._search(end_time, 'right')
+        return self._slice(start, max(start, stop))
+
+    def _first(self):
+        return (self.head - self.count) % self.capacity
+
+    def _search(self, time, side):
+        # Samples arrive in time order, so the two physical segments are each sorted.
+        first = self._first()
+        first_length = min(self.count, self.capacity - first)
+        index = np.searchsorted(self.times[first:first + first_length], time, side)
+        if index < first_length:
+            return int(index)
+        return first_length + int(np.searchsorted(self.times[:self.count - first_length], time, side))
+
+    def _slice(self, start, stop):
+        """Logical [start, stop) as views when contiguous, copies when it wraps."""
+        begin = (self._first() + start) % self.capacity
+        length = stop - start
+        if begin + length <= self.capacity:
+            return self.times[begin:begin + length], self.values[begin:begin + length]
+        split = self.capacity - begin
+        return (
+            np.concatenate((self.times[begin:], self.times[:length - split])),
+            np.concatenate((self.values[begin:], self.values[:length - split])),
+        )
+
+
+class SensorHistory:
+    """Rolling per-channel history of sensor readings within a fixed memory budget.
+
+    Each sensor keeps `seconds` of samples (by default the longest sensor plot window), capped at
+    `sensor_bytes` so one wide channel, such as a lidar scan, cannot starve the others of
+    `max_bytes`. `span(name)` tells how much sim time a sensor's buffers actually cover.
+    """
+
+    def __init__(self, seconds=3600.0, default_capacity=4096, max_bytes=256 * 1024 * 1024,
+                 sensor_bytes=32 * 1024 * 1024):
+        self.seconds = seconds
+        self.default_capacity = default_capacity
+        self.max_bytes = max_bytes
+        self.sensor_bytes = sensor_bytes
+        self.spans = {}
+        self.used_bytes = 0
+        self.buffers = {}
+        self._skipped = set()
+        self.logger = logging.getLogger(__name__)
+
+    def record(self, sensors):
+        """Append the latest reading of each sampled sensor."""
+        for sensor in sensors:
+            if not sensor.record_history or sensor.name in self._skipped:
+                continue
+            data = sensor.get_data()
+            if not isinstance(data, dict):
+                continue
+            channels = self.buffers.get(sensor.name)
+            if channels is None:
+                channels = self._allocate(sensor, data)
+                if channels is None:
+                    continue
+            for key, buffer in channels.items():
+                value = data.get(key)
+                if value is not None and np.shape(value) == buffer.shape:
+                    buffer.append(sensor.timestamp, value)
+
+    def span(self, name):
+        """Seconds of sim time a sensor's history can hold, or None if unknown or not recorded."""
+        return self.spans.get(name)
+
+    def channels(self, name):
+        """Channel names recorded for a sensor."""
+        return list(self.buffers.get(name, {}))
+
+    def latest(self, name, channel, count=None):
+        """The newest samples of one channel as (times, values)."""
+        return self.buffers[name][channel].latest(count)
+
+    def window(self, name, channel, start_time, end_time=None):
+        """Samples of one channel between two sim times as (times, values)."""
+        return self.buffers[name][channel].window(start_time, end_time)
+
+    def last_seconds(self, name, channel, seconds):
+        """Samples of one channel from the last `seconds` of sim time."""
+        buffer = self.buffers[name][channel]
+        if not len(buffer):
+            return buffer.latest(0)
+        end_time = buffer.latest(1)[0][0]
+        return buffer.window(end_time - seconds, end_time)
+
+    def clear(self):
+        """Drop all samples but keep the allocated buffers."""
+        for channels in self.buffers.values():
+            for buffer in channels.values():
+                buffer.clear()
+
+    def _allocate(self, sensor, data):
+        """Create fixed-capacity buffers for a sensor's numeric channels within the memory budget."""
+        samples = {}
+        for key, value in data.items():
+            array = np.asarray(value)
+            if array.dtype.kind in 'biuf':
+                samples[key] = array
+        if not samples:
+            self._skipped.add(sensor.name)
+            return None
+
+        wanted = self.default_capacity
+        if sensor.rate:
+            wanted = max(int(math.ceil(sensor.rate * self.seconds)), 1)
+        bytes_per_sample = sum(8 + array.nbytes for array in samples.values())
+        budget = min(self.sensor_bytes, self.max_bytes - self.used_bytes)
+        capacity = min(wanted, budget // bytes_per_sample)
+        if capacity < 1:
+            self.logger.warning(f"Sensor history budget exhausted; not recording {sensor.name}.")
+            self._skipped.add(sensor.name)
+            return None
+        if sensor.rate:
+            self.spans[sensor.name] = capacity / sensor.rate
+            if capacity < wanted:
+                self.logger.info(f"Sensor history for {sensor.name} limited to {capacity / sensor.rate:.0f} s by "
+                                 f"its memory budget.")
+
+        channels = {key: RingBuffer(capacity, array.shape, array.dtype) for key, array in samples.items()}
+        self.used_bytes += sum(buffer.nbytes for buffer in channels.values())
+        self.buffers[sensor.name] = channels
+        return channels
+
+
+def peak_decimate(times, values, max_points):
+    """Thin a trace to at most `max_points` samples, keeping every bucket's minimum and maximum.
+
+    Buckets are aligned to the newest sample, so the tail of a live trace is never dropped;
+    spikes shorter than a bucket therefore still show up in the plot.
+    """
+    count = len(times)
+    if count <= max_points or max_points < 2:
+        return times, values
+    buckets = max_points // 2
+    size = count // buckets
+    start = count - buckets * size
+    shaped = values[start:].reshape((buckets, size) + values.shape[1:])
+    thinned = np.empty((2 * buckets,) + values.shape[1:], dtype=values.dtype)
+    thinned[0::2] = shaped.min(axis=1)
+    thinned[1::2] = shaped.max(axis=1)
+    thinned_times = np.empty(2 * buckets, dtype=times.dtype)
+    thinned_times[0::2] = times[start::size]
+    thinned_times[1::2] = times[start + size - 1::size]
+    return thinned_times, thinned
@@ -0,0 +1,156 @@
+import numpy as np
+import pybullet as p
+from physics_engine.transforms import pose_matrices
+
+MOVABLE_TYPES = (p.JOINT_REVOLUTE, p.JOINT_PRISMATIC)
+# Joint types forward() can reproduce; spherical and planar joints need multi-DoF states.
+SUPPORTED_TYPES = MOVABLE_TYPES + (p.JOINT_FIXED,)
+
+
+class KinematicTree:
+    """The joint tree of one articulated model, with batched forward kinematics and Jacobians.
+
+    Built once per model from `getJointInfo` and `getDynamicsInfo`, then shared by every copy of
+    it. As in PyBullet, link i is the child of joint i and parents always precede their children;
+    frames are indexed with the base at 0 and link i at i + 1. Joint positions are given for the
+    movable joints only, in `movable` order, which is what one `getJointStates` call returns.
+
+    PyBullet describes joints between centre-of-mass frames: joint i sits at `parent_frames[i]`
+    in its parent's inertial frame, and its axis is in the child's inertial frame. The results
+    are URDF link frames, which are the inertial frames moved back by `inertial_frames`.
+    """
+
+    def __init__(self, base_name, joint_names, link_names, parents, joint_types, axes, lower, upper,
+                 parent_frames, inertial_frames):
+        self.base_name = base_name
+        self.joint_names = list(joint_names)
+        self.link_names = list(link_names)
+        self.parents = np.asarray(parents, dtype=np.int64)
+        self.joint_types = np.asarray(joint_types, dtype=np.int64)
+        self.axes = np.asarray(axes, dtype=float).reshape(-1, 3)
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.count = len(self.parents)
+        self.movable = np.flatnonzero(np.isin(self.joint_types, MOVABLE_TYPES))
+        self.supported = bool(np.isin(self.joint_types, SUPPORTED_TYPES).all())
+        self.joint_indices = {name: i for i, name in enumerate(self.joint_names)}
+        self.link_indices = {name: i for i, name in enumerate(self.link_names)}
+        self.link_indices[base_name] = -1
+
+        # inertial_frames[i + 1] is link i's inertial frame in its URDF link frame (base at 0).
+        self.inertial_frames = np.asarray(inertial_frames, dtype=float).reshape(-1, 4, 4)
+        self.base_inertial_inverse = np.linalg.inv(self.inertial_frames[0])
+        # A child's link frame is its parent's link frame, times the parent's inertial frame, times
+        # the joint frame, times the joint's motion, times the child's inverse inertial rotation: the
+        # joint pivot is the link origin, so the inertial offset cancels and only its rotation remains.
+        self.joint_offsets = self.inertial_frames[self.parents + 1] @ np.asarray(parent_frames, dtype=float).reshape(-1, 4, 4)
+        self.child_rotations = np.zeros((self.count, 4, 4))
+        self.child_rotations[:, :3, :3] = self.inertial_frames[1:, :3, :3].transpose(0, 2, 1)
+        self.child_rotations[:, 3, 3] = 1.0
+
+        depth = np.zeros(self.count, dtype=np.int64)
+        # ancestors[i, j] is true when joint j moves link i.
+        self.ancestors = np.zeros((self.count, self.count), dtype=bool)
+        for i, parent in enumerate(self.parents):
+            if parent >= 0:
+                depth[i] = depth[parent] + 1
+                self.ancestors[i] = self.ancestors[parent]
+            self.ancestors[i, i] = True
+        # Links at one depth only depend on shallower ones, so each level is one batched product.
+        self.levels = [np.flatnonzero(depth == d) for d in range(depth.max() + 1)] if self.count else []
+
+    @classmethod
+    def from_body(cls, body, physics_client):
+        joints = [p.getJointInfo(body, i, physicsClientId=physics_client)
+                  for i in range(p.getNumJoints(body, physicsClientId=physics_client))]
+        inertial = [p.getDynamicsInfo(body, link, physicsClientId=physics_client)[3:5]
+                    for link in range(-1, len(joints))]
+        base_name = p.getBodyInfo(body, physicsClientId=physics_client)[0].decode('utf-8')
+        return cls(
+            base_name,
+            [info[1].decode('utf-8') for info in joints],
+            [info[12].decode('utf-8') for info in joints],
+            [info[16] for info in joints],
+            [info[2] for info in joints],
+            [info[13] for info in joints],
+            [info[8] for info in joints],
+            [info[9] for info in joints],
+            # getJointInfo reports the inverse of the parent-to-joint rotation.
+            pose_matrices([info[14] for info in joints],
+                          [(-x, -y, -z, w) for x, y, z, w in (info[15] for info in joints)]).reshape(-1, 4, 4),
+            pose_matrices([frame[0] for frame in inertial], [frame[1] for frame in inertial]),
+        )
+
+    def joint_positions(self, body, physics_client):
+        """Positions of the movable joints of one body, read with a single getJointStates call."""
+        if not len(self.movable):
+            return np.zeros(0)
+        states = p.getJointStates(body, self.movable.tolist(), physicsClientId=physics_client)
+        return np.array([state[0] for state in states])
+
+    def forward(self, base_positions, base_orientations, joint_positions):
+        """World URDF link frames for a batch of bodies, shaped (bodies, count + 1, 4, 4).
+
+        `base_positions` and `base_orientations` are base centre-of-mass poses as PyBullet
+        reports them, (bodies, 3) and (bodies, 4); `joint_positions` is (bodies, len(movable)).
+        """
+        base = pose_matrices(np.reshape(base_positions, (-1, 3)), np.reshape(base_orientations, (-1, 4)))
+        batch = len(base)
+        q = np.zeros((batch, self.count))
+        q[:, self.movable] = np.reshape(joint_positions, (batch, len(self.movable)))
+
+        # Every joint gets a rotation and a translation; the one its type does not use is zero.
+        revolute = self.joint_types == p.JOINT_REVOLUTE
+        prismatic = self.joint_types == p.JOINT_PRISMATIC
+        motion = np.zeros((batch, self.count, 4, 4))
+        motion[..., :3, :3] = _axis_angle(self.axes, q * revolute)
+        motion[..., :3, 3] = self.axes * (q * prismatic)[..., None]
+        motion[..., 3, 3] = 1.0
+        local = self.joint_offsets @ motion @ self.child_rotations
+
+        frames = np.empty((batch, self.count + 1, 4, 4))
+        frames[:, 0] = base @ self.base_inertial_inverse
+        for level in self.levels:
+            frames[:, level + 1] = frames[:, self.parents[level] + 1] @ local[:, level]
+        return frames
+
+    def jacobian(self, frames, link, local_point=(0, 0, 0)):
+        """Geometric Jacobians (bodies, 6, len(movable)) of a point on `link` for a fixed base.
+
+        `frames` come from forward() and `local_point` is in the link's URDF frame. Rows are linear
+        then angular velocity in world coordinates, and columns follow `movable`. (PyBullet's
+        calculateJacobian instead reports in the base's inertial frame and takes the point along
+        the link's inertial axes.)
+        """
+        if isinstance(link, str):
+            link = self.link_indices[link]
+        jacobians = np.zeros((len(frames), 6, len(self.movable)))
+        if link < 0 or not len(self.movable):
+            return jacobians
+        target = frames[:, link + 1, :3, :3] @ np.asarray(local_point, dtype=float) + frames[:, link + 1, :3, 3]
+        columns = np.flatnonzero(self.ancestors[link, self.movable])
+        joints = self.movable[columns]
+        # Joint j acts at the origin of link j's frame, about or along its axis in link j's inertial frame.
+        joint_frames = frames[:, joints + 1]
+        rotations = joint_frames[..., :3, :3] @ self.inertial_frames[joints + 1, :3, :3]
+        axes = np.einsum('bjkl,jl->bjk', rotations, self.axes[joints])
+        origins = joint_frames[..., :3, 3]
+        revolute = self.joint_types[joints] == p.JOINT_REVOLUTE
+        linear = np.where(revolute[None, :, None], np.cross(axes, target[:, None] - origins), axes)
+        angular = np.where(revolute[None, :, None], axes, 0.0)
+        jacobians[:, :3, columns] = linear.transpose(0, 2, 1)
+        jacobians[:, 3:, columns] = angular.transpose(0, 2, 1)
+        return jacobians
+
+
+def _axis_angle(axes, angles):
+    """Rotation matrices (batch, joints, 3, 3) for `axes` (joints, 3) and `angles` (batch, joints)."""
+    lengths = np.linalg.norm(axes, axis=-1, keepdims=True)
+    # Fixed joints report a zero axis; their angle is zero too, so any unit axis will do.
+    axes = np.divide(axes, lengths, out=np.zeros_like(axes), where=lengths > 0)
+    x, y, z = axes[:, 0], axes[:, 1], axes[:, 2]
+    zero = np.zeros_like(x)
+    skew = np.stack([np.stack([zero, -z, y], -1), np.stack([z, zero, -x], -1), np.stack([-y, x, zero], -1)], -2)
+    sin = np.sin(angles)[..., None, None]
+    cos = np.cos(angles)[..., None, None]
+    return np.eye(3) + sin * skew + (1 - cos) * (skew @ skew)
@@ -0,0 +1,90 @@
+import numpy as np
+import pybullet as p
+from physics_engine.sensor import Sensor
+
+
+def cast_rays(ray_from, ray_to, physics_client=0):
+    """Fire rays through rayTestBatch in chunks; return hit fractions and body ids."""
+    count = len(ray_from)
+    fractions = np.ones(count)
+    body_ids = np.full(count, -1, dtype=int)
+    chunk = p.MAX_RAY_INTERSECTION_BATCH_SIZE
+    for start in range(0, count, chunk):
+        stop = min(start + chunk, count)
+        # numThreads=0 lets Bullet spread the chunk over all cores.
+        results = p.rayTestBatch(ray_from[start:stop], ray_to[start:stop], numThreads=0,
+                                 physicsClientId=physics_client)
+        fractions[start:stop] = [result[2] for result in results]
+        body_ids[start:stop] = [result[0] for result in results]
+    return fractions, body_ids
+
+
+class LidarSensor(Sensor):
+    def __init__(self, robot, position=(0, 0, 0), orientation=(0, 0, 0, 1), physics_client=0, link_index=-1,
+                 horizontal_fov=360.0, horizontal_resolution=1.0, vertical_fov=30.0, channels=16,
+                 min_range=0.1, max_range=30.0, rate=10.0, name=None):
+        super().__init__(robot, 'Lidar', position, orientation, physics_client, link_index, rate, name)
+        self.horizontal_fov = horizontal_fov
+        self.horizontal_resolution = horizontal_resolution
+        self.vertical_fov = vertical_fov
+        self.channels = channels
+        self.min_range = min_range
+        self.max_range = max_range
+
+        self.directions = self._build_beam_pattern()
+        self.ranges = np.full((self.channels, len(self.directions) // self.channels), np.inf)
+        self.data = {'ranges': self.ranges}
+
+    @property
+    def beam_count(self):
+        """Total number of rays per scan."""
+        return len(self.directions)
+
+    def update(self):
+        ray_from, ray_to = self.ray_endpoints()
+        fractions, body_ids = cast_rays(ray_from, ray_to, self.physics_client)
+        self.set_hits(fractions, body_ids)
+
+    def ray_endpoints(self):
+        """Transform the beam pattern by the current mount pose into world-space rays."""
+        if self.link_index < 0:
+            position, orientation = p.getBasePositionAndOrientation(self.robot, physicsClientId=self.physics_client)
+        else:
+            link_state = p.getLinkState(self.robot, self.link_index, physicsClientId=self.physics_client)
+            position, orientation = link_state[4], link_state[5]
+        position, orientation = p.multiplyTransforms(position, orientation, self.position, self.orientation)
+
+        rotation = np.array(p.getMatrixFromQuaternion(orientation)).reshape(3, 3)
+        directions = self.directions @ rotation.T
+        origin = np.asarray(position)
+        # Starting at min_range keeps rays from hitting the robot carrying the sensor.
+        return origin + directions * self.min_range, origin + directions * self.max_range
+
+    def set_hits(self, fractions, body_ids):
+        """Convert hit fractions into ranges; misses read as infinity."""
+        ranges = self.min_range + fractions * (self.max_range - self.min_range)
+        ranges[body_ids < 0] = np.inf
+        # A new array, so readings already handed out are never overwritten.
+        self.ranges = ranges.reshape(self.ranges.shape)
+        self.data = {'ranges': self.ranges}
+
+    def _build_beam_pattern(self):
+        """Unit ray directions in the sensor frame, one row per beam, channel-major."""
+        full_circle = self.horizontal_fov >= 360.0
+        beams = max(int(round(self.horizontal_fov / self.horizontal_resolution)), 1)
+        if not full_circle:
+            beams += 1
+        azimuth = np.radians(np.linspace(-self.horizontal_fov / 2, self.horizontal_fov / 2, beams,
+                                         endpoint=not full_circle))
+        if self.channels > 1:
+            elevation = np.radians(np.linspace(-self.vertical_fov / 2, self.vertical_fov / 2, self.channels))
+        else:
+            elevation = np.zeros(1)
+
+        elevation, azimuth = np.meshgrid(elevation, azimuth, indexing='ij')
+        directions = np.stack([
+            np.cos(elevation) * np.cos(azimuth),
+            np.cos(elevation) * np.sin(azimuth),
+            np.sin(elevation),
+        ], axis=-1)
+        return directions.reshape(-1, 3)
@@ -0,0 +1,305 @@
+import json
+import queue
+import struct
+import threading
+import numpy as np
+import pybullet as p
+
+# File layout: MAGIC, then chunks of (CHUNK_HEADER, payload), then a JSON index and FOOTER.
+# A chunk payload is the step and time columns followed by each data column, each padded
+# to 8 bytes so the reader can view them in place. Schema chunks carry a stream's columns
+# as JSON, so a log whose footer was never written can still be recovered by scanning.
+MAGIC = b'HSLOG\x00\x01\x00'
+FOOTER_MAGIC = b'HSIDX\x00\x01\x00'
+CHUNK_HEADER = struct.Struct('<IIqQ')  # stream id, rows, first step, payload bytes
+FOOTER = struct.Struct('<Q8s')  # index bytes, FOOTER_MAGIC
+SCHEMA_STREAM = 0xFFFFFFFF
+
+
+def _padded(nbytes):
+    return (nbytes + 7) & ~7
+
+
+class _StreamBuffer:
+    """Preallocated rows for one stream, handed to the writer thread when full."""
+
+    def __init__(self, stream_id, name, columns, chunk_rows):
+        self.stream_id = stream_id
+        self.name = name
+        self.columns = columns
+        self.chunk_rows = chunk_rows
+        self._allocate()
+
+    def _allocate(self):
+        self.rows = 0
+        self.steps = np.empty(self.chunk_rows, dtype=np.int64)
+        self.times = np.empty(self.chunk_rows, dtype=np.float64)
+        self.values = {name: np.empty((self.chunk_rows,) + shape, dtype=dtype)
+                       for name, dtype, shape in self.columns}
+
+    def append(self, step, time, values):
+        row = self.rows
+        self.steps[row] = step
+        self.times[row] = time
+        for name, array in self.values.items():
+            array[row] = values[name]
+        self.rows += 1
+        return self.rows == self.chunk_rows
+
+    def take(self):
+        """Detach the filled rows and start a fresh chunk."""
+        rows = self.rows
+        arrays = [self.steps[:rows], self.times[:rows]] + [self.values[name][:rows] for name, _, _ in self.columns]
+        first_step = int(self.steps[0])
+        self._allocate()
+        return rows, first_step, arrays
+
+
+class Recorder:
+    def __init__(self, path, chunk_rows=1024, max_pending_chunks=256, skip_sensor_types=('Camera',)):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.skip_sensor_types = set(skip_sensor_types)
+        self.streams = {}
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.offset = len(MAGIC)
+        self.index = []
+        self.schemas = []
+        self.closed = False
+
+        # The physics thread only fills buffers; all file I/O happens on the writer thread.
+        self.pending = queue.Queue(maxsize=max_pending_chunks)
+        self.writer = threading.Thread(target=self._write_loop, name="LogWriter", daemon=True)
+        self.writer.start()
+
+    def record(self, stream, step, time, values):
+        """Append one row of named arrays to a stream, creating it on first use."""
+        buffer = self.streams.get(stream)
+        if buffer is None:
+            buffer = self._open_stream(stream, values)
+        values = {name: value for name, value in values.items() if name in buffer.values}
+        for name, dtype, shape in buffer.columns:
+            if name not in values or np.shape(values[name]) != shape:
+                return
+        if buffer.append(step, time, values):
+            self._flush(buffer)
+
+    def record_step(self, simulation, sensors=()):
+        """Record every tracked body's state and the sensors sampled this step."""
+        client = simulation.engine.physics_client
+        for body, (positions, orientations) in simulation.get_link_poses().items():
+            state = self._body_state(body, len(positions) - 1, client)
+            state['link_positions'] = positions
+            state['link_orientations'] = orientations
+            self.record(f"body/{body}", simulation.step_count, simulation.sim_time, state)
+        for sensor in sensors:
+            if sensor.sensor_type in self.skip_sensor_types:
+                continue
+            data = sensor.get_data()
+            if isinstance(data, dict):
+                values = {key: value for key, value in data.items() if np.asarray(value).dtype.kind in 'biuf'}
+                if values:
+                    self.record(f"sensor/{sensor.name}", simulation.step_count, sensor.timestamp, values)
+
+    def close(self):
+        """Flush partial chunks, write the index and close the file."""
+        if self.closed:
+            return
+        self.closed = True
+        for buffer in self.streams.values():
+            if buffer.rows:
+                self._flush(buffer)
+        self.pending.put(None)
+        self.writer.join()
+
+        index = json.dumps({'streams': self.schemas, 'chunks': self.index}).encode('utf-8')
+        self.file.write(index)
+        self.file.write(FOOTER.pack(len(index), FOOTER_MAGIC))
+        self.file.close()
+
+    def _body_state(self, body, joint_count, client):
+        position, orientation = p.getBasePositionAndOrientation(body, physicsClientId=client)
+        linear, angular = p.getBaseVelocity(body, physicsClientId=client)
+        state = {
+            'base_position': position,
+            'base_orientation': orientation,
+            'base_velocity': linear + angular,
+        }
+        if joint_count:
+            joints = p.getJointStates(body, range(joint_count), physicsClientId=client)
+            state['joint_positions'] = [joint[0] for joint in joints]
+            state['joint_velocities'] = [joint[1] for joint in joints]
+        return state
+
+    def _open_stream(self, stream, values):
+        columns = []
+        for name, value in values.items():
+            array = np.asarray(value)
+            columns.append((name, array.dtype, array.shape))
+        buffer = _StreamBuffer(len(self.streams), stream, columns, self.chunk_rows)
+        self.streams[stream] = buffer
+        schema = {
+            'id': buffer.stream_id,
+            'name': stream,
+            'columns': [{'name': name, 'dtype': dtype.str, 'shape': list(shape)} for name, dtype, shape in columns],
+        }
+        self.schemas.append(schema)
+        self.pending.put(('schema', json.dumps(schema).encode('utf-8')))
+        return buffer
+
+    def _flush(self, buffer):
+        rows, first_step, arrays = buffer.take()
+        self.pending.put(('chunk', buffer.stream_id, rows, first_step, arrays))
+
+    def _write_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            if item[0] == 'schema':
+                self._write_chunk(SCHEMA_STREAM, 0, 0, [np.frombuffer(item[1], dtype=np.uint8)])
+            else:
+                _, stream_id, rows, first_step, arrays = item
+                offset = self._write_chunk(stream_id, rows, first_step, arrays)
+                self.index.append([stream_id, offset, rows, first_step])
+
+    def _write_chunk(self, stream_id, rows, first_step, arrays):
+        offset = self.offset
+        payload = sum(_padded(array.nbytes) for array in arrays)
+        self.file.write(CHUNK_HEADER.pack(stream_id, rows, first_step, payload))
+        for array in arrays:
+            data = np.ascontiguousarray(array).tobytes()
+            self.file.write(data)
+            self.file.write(b'\x00' * (_padded(len(data)) - len(data)))
+        self.offset += CHUNK_HEADER.size + payload
+        return offset
+
+
+class LogReader:
+    def __init__(self, path):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(self.data[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Not a HermiSim log: {path}")
+        self.streams = {}
+        if not self._read_index():
+            self._scan()
+
+        for stream in self.streams.values():
+            stream['chunks'].sort(key=lambda chunk: chunk[2])
+            stream['first_steps'] = np.array([chunk[2] for chunk in stream['chunks']], dtype=np.int64)
+            stream['row_starts'] = np.cumsum([0] + [chunk[1] for chunk in stream['chunks']])
+
+    def stream_names(self):
+        return list(self.streams)
+
+    def num_rows(self, stream):
+        return int(self.streams[stream]['row_starts'][-1])
+
+    @property
+    def first_step(self):
+        starts = [stream['first_steps'][0] for stream in self.streams.values() if len(stream['first_steps'])]
+        return int(min(starts)) if starts else 0
+
+    @property
+    def last_step(self):
+        return max((int(self.column_chunk(name, -1)['step'][-1]) for name, stream in self.streams.items()
+                    if stream['chunks']), default=0)
+
+    def column_chunk(self, stream, chunk_index):
+        """One chunk of a stream as a dict of read-only views into the mapped file."""
+        schema = self.streams[stream]
+        offset, rows, _ = schema['chunks'][chunk_index]
+        offset += CHUNK_HEADER.size
+        columns = [('step', np.dtype(np.int64), ()), ('time', np.dtype(np.float64), ())] + schema['columns']
+        chunk = {}
+        for name, dtype, shape in columns:
+            count = rows * int(np.prod(shape, dtype=np.int64))
+            chunk[name] = np.frombuffer(self.data, dtype=dtype, count=count, offset=offset).reshape((rows,) + shape)
+            offset += _padded(count * dtype.itemsize)
+        return chunk
+
+    def row(self, stream, row_index):
+        """A single row by its position in the stream."""
+        schema = self.streams[stream]
+        chunk_index = int(np.searchsorted(schema['row_starts'], row_index, 'right')) - 1
+        chunk = self.column_chunk(stream, chunk_index)
+        local = row_index - schema['row_starts'][chunk_index]
+        return {name: values[local] for name, values in chunk.items()}
+
+    def at_step(self, stream, step):
+        """The latest row recorded at or before a physics step, or None."""
+        schema = self.streams[stream]
+        chunk_index = int(np.searchsorted(schema['first_steps'], step, 'right')) - 1
+        if chunk_index < 0:
+            return None
+        chunk = self.column_chunk(stream, chunk_index)
+        local = int(np.searchsorted(chunk['step'], step, 'right')) - 1
+        return {name: values[local] for name, values in chunk.items()}
+
+    def column(self, stream, name):
+        """A whole column concatenated across chunks."""
+        chunks = [self.column_chunk(stream, i)[name] for i in range(len(self.streams[stream]['chunks']))]
+        if not chunks:
+            return np.empty(0)
+        return np.concatenate(chunks)
+
+    def to_dataframe(self, stream):
+        """Export a stream to pandas, one column per scalar (vectors become name_0, name_1, ...)."""
+        import pandas as pd
+
+        schema = self.streams[stream]
+        frame = {'step': self.column(stream, 'step'), 'time': self.column(stream, 'time')}
+        for name, _, shape in schema['columns']:
+            values = self.column(stream, name).reshape(len(frame['step']), -1)
+            if not shape:
+                frame[name] = values[:, 0]
+            else:
+                for i in range(values.shape[1]):
+                    frame[f"{name}_{i}"] = values[:, i]
+        return pd.DataFrame(frame)
+
+    def close(self):
+        # Views handed out earlier keep the mapping alive until they are released.
+        self.data = None
+
+    def _add_stream(self, schema):
+        columns = [(column['name'], np.dtype(column['dtype']), tuple(column['shape'])) for column in schema['columns']]
+        self.streams[schema['name']] = {'id': schema['id'], 'columns': columns, 'chunks': []}
+
+    def _read_index(self):
+        if len(self.data) < len(MAGIC) + FOOTER.size:
+            return False
+        index_bytes, magic = FOOTER.unpack(bytes(self.data[-FOOTER.size:]))
+        if magic != FOOTER_MAGIC:
+            return False
+        start = len(self.data) - FOOTER.size - index_bytes
+        index = json.loads(bytes(self.data[start:start + index_bytes]).decode('utf-8'))
+        for schema in index['streams']:
+            self._add_stream(schema)
+        self._attach_chunks(index['chunks'])
+        return True
+
+    def _scan(self):
+        """Rebuild the index from chunk headers when the log was not closed cleanly."""
+        chunks = []
+        offset = len(MAGIC)
+        while offset + CHUNK_HEADER.size <= len(self.data):
+            stream_id, rows, first_step, payload = CHUNK_HEADER.unpack(
+                bytes(self.data[offset:offset + CHUNK_HEADER.size]))
+            end = offset + CHUNK_HEADER.size + payload
+            if end > len(self.data):
+                break
+            if stream_id == SCHEMA_STREAM:
+                body = bytes(self.data[offset + CHUNK_HEADER.size:end]).rstrip(b'\x00')
+                self._add_stream(json.loads(body.decode('utf-8')))
+            else:
+                chunks.append([stream_id, offset, rows, first_step])
+            offset = end
+        self._attach_chunks(chunks)
+
+    def _attach_chunks(self, chunks):
+        by_id = {stream['id']: stream for stream in self.streams.values()}
+        for stream_id, offset, rows, first_step in chunks:
+            by_id[stream_id]['chunks'].append((offset, rows, first_step))
@@ -0,0 +1,109 @@
+import os
+
+
+class SceneEntry:
+    """What the registry knows about one body."""
+
+    __slots__ = ('body', 'name', 'source', 'model_name', 'base_name', 'kinematics')
+
+    def __init__(self, body, name, source, model_name, base_name, kinematics):
+        self.body = body
+        self.name = name
+        self.source = source
+        self.model_name = model_name
+        self.base_name = base_name
+        self.kinematics = kinematics
+
+
+class SceneRegistry:
+    """Every body in the scene with its source file, indexed by name.
+
+    Body names are unique within the scene: the URDF robot name for the first copy, then with a
+    numeric suffix. Link and joint names resolve through the model's KinematicTree, whose dicts
+    are built once per model and shared by its copies, so every lookup is a hash-map access.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.names = {}
+        self.sources = {}
+        # Next suffix to try per name, so naming many copies stays linear.
+        self._copies = {}
+
+    def add(self, body, source, model_name, base_name, kinematics=None):
+        """Register a body and return the unique name it was given."""
+        # Bodies built from shapes have no URDF names, so fall back to the file they came from.
+        name = model_name or base_name or (os.path.splitext(os.path.basename(source))[0] if source else f"body_{body}")
+        if name in self.names:
+            suffix = self._copies.get(name, 1)
+            while f"{name}_{suffix}" in self.names:
+                suffix += 1
+            self._copies[name] = suffix + 1
+            name = f"{name}_{suffix}"
+        self.entries[body] = SceneEntry(body, name, source, model_name, base_name, kinematics)
+        self.names[name] = body
+        self.sources.setdefault(source, []).append(body)
+        return name
+
+    def remove(self, body):
+        entry = self.entries.pop(body, None)
+        if entry is None:
+            return
+        del self.names[entry.name]
+        bodies = self.sources[entry.source]
+        bodies.remove(body)
+        if not bodies:
+            del self.sources[entry.source]
+
+    def clear(self):
+        self.entries.clear()
+        self.names.clear()
+        self.sources.clear()
+        self._copies.clear()
+
+    def __contains__(self, body):
+        return body in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def body(self, name):
+        """Body id registered under `name`; raises KeyError if there is none."""
+        return self.names[name]
+
+    def name(self, body):
+        return self.entries[body].name
+
+    def source(self, body):
+        return self.entries[body].source
+
+    def bodies_from(self, source):
+        """Bodies loaded from one file, in load order."""
+        return list(self.sources.get(source, ()))
+
+    def link_index(self, body, link_name):
+        """PyBullet link index of a named link on a body; the base link is -1."""
+        entry = self._entry(body)
+        if link_name == entry.base_name:
+            return -1
+        if entry.kinematics is None:
+            raise KeyError(f"{entry.name} has no link named {link_name}")
+        try:
+            return entry.kinematics.link_indices[link_name]
+        except KeyError:
+            raise KeyError(f"{entry.name} has no link named {link_name}") from None
+
+    def joint_index(self, body, joint_name):
+        """PyBullet joint index of a named joint on a body."""
+        entry = self._entry(body)
+        try:
+            return entry.kinematics.joint_indices[joint_name]
+        except (AttributeError, KeyError):
+            raise KeyError(f"{entry.name} has no joint named {joint_name}") from None
+
+    def joint_indices(self, body, joint_names):
+        return [self.joint_index(body, name) for name in joint_names]
+
+    def _entry(self, body):
+        # Bodies can be given by id or by scene name.
+        return self.entries[self.names[body] if isinstance(body, str) else body]
@@ -0,0 +1,150 @@
+import time
+import numpy as np
+from physics_engine.history import peak_decimate
+from physics_engine.recorder import LogReader
+from physics_engine.snapshot import blend
+
+
+class ReplaySource:
+    def __init__(self, path):
+        self.path = path
+        self.reader = LogReader(path)
+        self.bodies = [int(name.split('/', 1)[1]) for name in self.reader.stream_names() if name.startswith('body/')]
+        self.sensor_names = [name.split('/', 1)[1] for name in self.reader.stream_names() if name.startswith('sensor/')]
+        self.first_step = self.reader.first_step
+        self.last_step = self.reader.last_step
+        self.time_step = self._infer_time_step()
+        self.speed = 1.0
+        self.playing = False
+        # (stream, channel) -> (steps, times, values) columns, concatenated on first use.
+        self._traces = {}
+        # Body stream -> its step column, for finding the rows either side of a fractional step.
+        self._steps = {}
+        self._anchor_step = self.first_step
+        self._anchor_wall = time.perf_counter()
+
+    @property
+    def current_step(self):
+        """The step on screen, derived from the wall clock while playing."""
+        return int(self._position())
+
+    def play(self):
+        """Play forward from the current step."""
+        if self.current_step >= self.last_step:
+            self._anchor_step = self.first_step
+        self._rebase()
+        self.playing = True
+
+    def pause(self):
+        """Hold the current step."""
+        self._rebase()
+        self.playing = False
+
+    def seek(self, step):
+        """Jump straight to a step; lookups go through the log's step index."""
+        self._anchor_step = min(max(int(step), self.first_step), self.last_step)
+        self._anchor_wall = time.perf_counter()
+
+    def set_speed(self, speed):
+        """Set the playback speed as a multiple of real time."""
+        self._rebase()
+        self.speed = speed
+
+    def get_link_poses(self, interpolated=False):
+        """World poses of every recorded body's base and links at the current step, base first.
+
+        With `interpolated`, poses are blended between the recorded rows either side of the
+        fractional step the wall clock has reached, so slow playback and sparse logs move smoothly.
+        """
+        position = self._position()
+        poses = {}
+        for body in self.bodies:
+            stream = f"body/{body}"
+            steps = self._steps.get(stream)
+            if steps is None:
+                steps = self._steps[stream] = self.reader.column(stream, 'step')
+            index = int(np.searchsorted(steps, int(position), side='right')) - 1
+            if index < 0:
+                continue
+            row = self.reader.row(stream, index)
+            pose = (row['link_positions'], row['link_orientations'])
+            if interpolated and index + 1 < len(steps) and position > steps[index]:
+                following = self.reader.row(stream, index + 1)
+                if following['link_positions'].shape == pose[0].shape:
+                    alpha = min((position - steps[index]) / (steps[index + 1] - steps[index]), 1.0)
+                    pose = blend(*pose, following['link_positions'], following['link_orientations'], alpha)
+            poses[body] = pose
+        return poses
+
+    def get_visual_shapes(self, body):
+        """Logs carry poses only, so replayed bodies are drawn as link points."""
+        return []
+
+    def get_sensor_data(self):
+        """The latest recorded reading of every sensor at the current step, keyed by sensor name."""
+        step = self.current_step
+        data = {}
+        for name in self.sensor_names:
+            row = self.reader.at_step(f"sensor/{name}", step)
+            if row is not None:
+                data[name] = {key: value for key, value in row.items() if key not in ('step', 'time')}
+        return data
+
+    def get_sensor_timestamps(self):
+        """Readings only change with the replayed step, so every sensor is stamped with it."""
+        step = self.current_step
+        return {name: step for name in self.sensor_names}
+
+    def get_sensor_channels(self):
+        """Shapes of every recorded sensor channel, as {sensor name: {channel: shape}}."""
+        return {name: {column: shape for column, _, shape in self.reader.streams[f"sensor/{name}"]['columns']}
+                for name in self.sensor_names}
+
+    def get_sensor_trace(self, name, channel, seconds, max_points=None):
+        """The `seconds` of one channel leading up to the current step as (times, values)."""
+        stream = f"sensor/{name}"
+        trace = self._traces.get((stream, channel))
+        if trace is None:
+            trace = self._traces[(stream, channel)] = (
+                self.reader.column(stream, 'step'), self.reader.column(stream, 'time'), self.reader.column(stream, channel))
+        steps, times, values = trace
+        end = int(np.searchsorted(steps, self.current_step, side='right'))
+        if end == 0:
+            return times[:0], values[:0]
+        start = int(np.searchsorted(times, times[end - 1] - seconds, side='left'))
+        times, values = times[start:end], values[start:end]
+        if max_points is not None:
+            times, values = peak_decimate(times, values, max_points)
+        return times, values
+
+    def close(self):
+        self.playing = False
+        self._traces = {}
+        self._steps = {}
+        self.reader.close()
+
+    def _position(self):
+        """The step on screen as a float, fractional between steps while playing."""
+        if not self.playing:
+            return float(self._anchor_step)
+        elapsed = (time.perf_counter() - self._anchor_wall) * self.speed
+        position = self._anchor_step + elapsed / self.time_step
+        if position >= self.last_step:
+            self._anchor_step = self.last_step
+            self.playing = False
+            return float(self.last_step)
+        return position
+
+    def _rebase(self):
+        self._anchor_step = self.current_step
+        self._anchor_wall = time.perf_counter()
+
+    def _infer_time_step(self):
+        for body in self.bodies:
+            stream = f"body/{body}"
+            if self.reader.num_rows(stream) >= 2:
+                first, second = self.reader.row(stream, 0), self.reader.row(stream, 1)
+                steps = int(second['step'] - first['step'])
+                if steps > 0:
+                    return float(second['time'] - first['time']) / steps
+        return 1.0 / 240.0
@@ -0,0 +1,52 @@
+from physics_engine.sensor_batch import SensorBatch
+
+
+class SensorScheduler:
+    def __init__(self):
+        # Sensors sharing a rate share one batch, so bulk queries still apply.
+        self.batches = {}
+        self.next_due = {}
+
+    def add(self, sensor):
+        """Schedule a sensor at its declared rate."""
+        batch = self.batches.get(sensor.rate)
+        if batch is None:
+            batch = self.batches[sensor.rate] = SensorBatch()
+            self.next_due[sensor.rate] = None
+        batch.add(sensor)
+
+    def remove(self, sensor):
+        """Stop scheduling a sensor."""
+        batch = self.batches[sensor.rate]
+        batch.remove(sensor)
+        if not batch.sensors:
+            del self.batches[sensor.rate]
+            del self.next_due[sensor.rate]
+
+    def invalidate(self):
+        """Rebuild every batch's groups on the next update."""
+        for batch in self.batches.values():
+            batch.invalidate()
+
+    def reset(self):
+        """Make every sensor due on the next update, e.g. after sim time restarts."""
+        for rate in self.next_due:
+            self.next_due[rate] = None
+
+    def update(self, sim_time):
+        """Sample the sensors that are due at this sim time and return them."""
+        sampled = []
+        for rate, batch in self.batches.items():
+            due = self.next_due[rate]
+            if due is not None and sim_time + 1e-9 < due:
+                continue
+            batch.update(sim_time)
+            sampled.extend(batch.sensors)
+            if rate:
+                period = 1.0 / rate
+                due = (sim_time if due is None else due) + period
+                if due <= sim_time:
+                    # Drop samples we can no longer take rather than bursting to catch up.
+                    due = sim_time + period
+                self.next_due[rate] = due
+        return sampled
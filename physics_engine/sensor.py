@@ -1,12 +1,28 @@
 import pybullet as p
 
+# Sample rates in Hz for sensors that do not declare one; None samples every step.
+DEFAULT_RATES = {
+    'IMU': 200.0,
+    'Lidar': 10.0,
+    'Camera': 30.0,
+}
+
 class Sensor:
-    def __init__(self, robot, sensor_type, position, orientation):
+    # Whether SensorHistory keeps a ring buffer of this sensor's readings.
+    record_history = True
+
+    def __init__(self, robot, sensor_type, position, orientation, physics_client=0, link_index=-1, rate=None,
+                 name=None):
         self.robot = robot
+        self.name = name
+        self.physics_client = physics_client
+        self.link_index = link_index
         self.sensor_type = sensor_type
         self.position = position
         self.orientation = orientation
+        self.rate = rate if rate is not None else DEFAULT_RATES.get(sensor_type)
         self.data = None
+        self.timestamp = None
 
     def update(self):
         if self.sensor_type == 'IMU':
@@ -23,7 +39,12 @@ class Sensor:
 
     def _get_imu_data(self):
         # Realistic IMU data retrieval
-        linear_acceleration, angular_velocity = p.getBaseVelocity(self.robot)
+        if self.link_index < 0:
+            linear_acceleration, angular_velocity = p.getBaseVelocity(self.robot, physicsClientId=self.physics_client)
+        else:
+            link_state = p.getLinkState(self.robot, self.link_index, computeLinkVelocity=1,
+                                        physicsClientId=self.physics_client)
+            linear_acceleration, angular_velocity = link_state[6], link_state[7]
         return {
             'acceleration': linear_acceleration,
             'gyro': angular_velocity
@@ -31,7 +52,7 @@ class Sensor:
 
     def _get_lidar_data(self):
         # Realistic Lidar data retrieval
-        points = p.getClosestPoints(self.robot, 100, 0.1)
+        points = p.getClosestPoints(self.robot, 100, 0.1, physicsClientId=self.physics_client)
         distances = [point[8] for point in points]  # 8 is the distance
         return {
             'distances': distances
@@ -39,7 +60,7 @@ class Sensor:
 
     def _get_camera_data(self):
         # Realistic Camera data retrieval
-        width, height, rgb_img, depth_img, seg_img = p.getCameraImage(640, 480)
+        width, height, rgb_img, depth_img, seg_img = p.getCameraImage(640, 480, physicsClientId=self.physics_client)
         return {
             'image': rgb_img
         }
\ No newline at end of file
@@ -0,0 +1,138 @@
+import numpy as np
+import pybullet as p
+from physics_engine.lidar import LidarSensor, cast_rays
+from physics_engine.sensor import Sensor
+
+
+class SensorBatch:
+    def __init__(self, sensors=()):
+        self.sensors = list(sensors)
+        self.groups = None
+
+    def add(self, sensor):
+        """Add a sensor; groups are rebuilt on the next update."""
+        self.sensors.append(sensor)
+        self.groups = None
+
+    def remove(self, sensor):
+        """Remove a sensor; groups are rebuilt on the next update."""
+        self.sensors.remove(sensor)
+        self.groups = None
+
+    def invalidate(self):
+        """Force groups to be rebuilt, e.g. after sensors change body or client."""
+        self.groups = None
+
+    def update(self, sim_time=None):
+        """Sample every sensor with one bulk query per group."""
+        if self.groups is None:
+            self.groups = self._build_groups()
+        for group in self.groups:
+            group.update()
+        for sensor in self.sensors:
+            sensor.timestamp = sim_time
+
+    def _build_groups(self):
+        by_type = {}
+        for sensor in self.sensors:
+            by_type.setdefault((type(sensor), sensor.sensor_type), []).append(sensor)
+        return [GROUP_TYPES.get(key, SerialGroup)(sensors) for key, sensors in by_type.items()]
+
+
+class SerialGroup:
+    """Fallback for sensor types without a bulk query."""
+
+    def __init__(self, sensors):
+        self.sensors = sensors
+
+    def update(self):
+        for sensor in self.sensors:
+            sensor.update()
+
+
+class ImuGroup:
+    """IMUs sampled with one velocity query per body, written into one pair of arrays per update."""
+
+    def __init__(self, sensors):
+        self.sensors = sensors
+        self.linear_velocity = np.zeros((len(sensors), 3))
+        self.angular_velocity = np.zeros((len(sensors), 3))
+
+        # (client, body) -> base rows, and link rows with the unique links they read.
+        self.bodies = {}
+        for row, sensor in enumerate(sensors):
+            entry = self.bodies.setdefault((sensor.physics_client, sensor.robot), {'base': [], 'rows': [], 'links': []})
+            if sensor.link_index < 0:
+                entry['base'].append(row)
+            else:
+                entry['rows'].append(row)
+                entry['links'].append(sensor.link_index)
+        for entry in self.bodies.values():
+            links = sorted(set(entry['links']))
+            entry['columns'] = np.array([links.index(link) for link in entry['links']], dtype=int)
+            entry['links'] = links
+            entry['base'] = np.array(entry['base'], dtype=int)
+            entry['rows'] = np.array(entry['rows'], dtype=int)
+
+        self._publish()
+
+    def update(self):
+        # Fresh arrays each update, so readings already handed out are never overwritten.
+        self.linear_velocity = np.empty_like(self.linear_velocity)
+        self.angular_velocity = np.empty_like(self.angular_velocity)
+        for (client, body), entry in self.bodies.items():
+            if len(entry['base']):
+                linear, angular = p.getBaseVelocity(body, physicsClientId=client)
+                self.linear_velocity[entry['base']] = linear
+                self.angular_velocity[entry['base']] = angular
+            if entry['links']:
+                states = p.getLinkStates(body, entry['links'], computeLinkVelocity=1, physicsClientId=client)
+                self.linear_velocity[entry['rows']] = np.array([state[6] for state in states])[entry['columns']]
+                self.angular_velocity[entry['rows']] = np.array([state[7] for state in states])[entry['columns']]
+        self._publish()
+
+    def _publish(self):
+        # Readings are row views of the current arrays.
+        for row, sensor in enumerate(self.sensors):
+            sensor.data = {
+                'acceleration': self.linear_velocity[row],
+                'gyro': self.angular_velocity[row],
+            }
+
+
+class LidarGroup:
+    """Every lidar on a client fired through one chunked rayTestBatch."""
+
+    def __init__(self, sensors):
+        self.sensors = sensors
+        self.clients = {}
+        for sensor in sensors:
+            self.clients.setdefault(sensor.physics_client, []).append(sensor)
+        self.ray_from = {}
+        self.ray_to = {}
+        for client, members in self.clients.items():
+            count = sum(sensor.beam_count for sensor in members)
+            self.ray_from[client] = np.empty((count, 3))
+            self.ray_to[client] = np.empty((count, 3))
+
+    def update(self):
+        for client, members in self.clients.items():
+            ray_from, ray_to = self.ray_from[client], self.ray_to[client]
+            offset = 0
+            for sensor in members:
+                stop = offset + sensor.beam_count
+                ray_from[offset:stop], ray_to[offset:stop] = sensor.ray_endpoints()
+                offset = stop
+
+            fractions, body_ids = cast_rays(ray_from, ray_to, client)
+            offset = 0
+            for sensor in members:
+                stop = offset + sensor.beam_count
+                sensor.set_hits(fractions[offset:stop], body_ids[offset:stop])
+                offset = stop
+
+
+GROUP_TYPES = {
+    (Sensor, 'IMU'): ImuGroup,
+    (LidarSensor, 'Lidar'): LidarGroup,
+}
@@ -1,72 +1,387 @@
+import logging
+import threading
+import time
+import numpy as np
 import pybullet as p
+from physics_engine.control import JointControl
 from physics_engine.engine import PhysicsEngine
+from physics_engine.history import SensorHistory, peak_decimate
+from physics_engine.kinematics import KinematicTree
+from physics_engine.recorder import Recorder
+from physics_engine.registry import SceneRegistry
 from physics_engine.sensor import Sensor
+from physics_engine.scheduler import SensorScheduler
+from physics_engine.snapshot import SnapshotBuffer, StateSnapshot, interpolate
+from physics_engine.transforms import matrix_to_quaternion
+from physics_engine.urdf_cache import UrdfCache
+from physics_engine.worker import PhysicsWorker
 
 class Simulation:
-    def __init__(self):
+    def __init__(self, time_step=1.0 / 240.0):
         self.engine = PhysicsEngine()
         self.robot = None
+        self.bodies = []
+        self.body_info = {}
+        # Every body in the world, including the environment, by name and source file.
+        self.scene = SceneRegistry()
+        # Joint targets and per-step controllers, applied on the physics thread before each step.
+        self.control = JointControl(self)
         self.simulation_speed = 1
+        self.time_step = time_step
+        self.sim_time = 0.0
+        self.step_count = 0
         self.sensors = []
+        self.sensor_scheduler = SensorScheduler()
+        self.last_sampled = []
+        self.history = SensorHistory()
+        self.recorder = None
+        # Poses published once per step; the GUI reads these instead of querying PyBullet.
+        self.snapshots = SnapshotBuffer()
+        # Parsed URDFs and shared shapes, so repeated spawns of one model parse it once.
+        self.urdf_cache = UrdfCache()
         self.running = False
+        self.worker = None
+        self.lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+
+    def connect(self, mode=p.GUI, default_robot=True):
+        """Connect to the physics server and load the environment."""
+        self.engine.connect(mode)
+        # Client ids are reused after a disconnect, so shapes cached for an old world must go.
+        self.urdf_cache.release(self.engine.physics_client)
+        self.engine.set_time_step(self.time_step)
+        for sensor in self.sensors:
+            sensor.physics_client = self.engine.physics_client
+        self.sensor_scheduler.invalidate()
+        self.sensor_scheduler.reset()
+        self.history.clear()
+        self.bodies = []
+        self.body_info = {}
+        self.scene.clear()
+        # Commands and controllers refer to bodies of the old world.
+        self.control.clear()
+        self.snapshots.clear()
+        self._load_environment(default_robot)
+        self.sim_time = 0.0
+        self.step_count = 0
 
     def start(self):
-        """Start the simulation."""
+        """Start the simulation on a background physics thread."""
         if not self.running:
-            self.engine.connect()
-            self._load_environment()
+            self.connect()
             self.running = True
-            try:
-                while self.running:
-                    self.engine.step_simulation()
-                    self._update_sensors()
-                    p.setTimeStep(1.0 / self.simulation_speed)
-            except KeyboardInterrupt:
-                self.stop()
+            self.worker = PhysicsWorker(self, self.time_step, real_time_factor=self.simulation_speed)
+            self.worker.start()
 
     def stop(self):
         """Stop the simulation."""
         if self.running:
-            self.engine.disconnect()
             self.running = False
+            if self.worker is not None:
+                self.worker.stop()
+                if self.worker is not threading.current_thread():
+                    self.worker.join()
+                self.worker = None
+            with self.lock:
+                self.stop_recording()
+                self.engine.disconnect()
 
     def reset(self):
         """Reset the simulation."""
         self.stop()
         self.start()
 
+    def pause(self):
+        """Pause the physics thread."""
+        if self.worker is not None:
+            self.worker.pause()
+
+    def resume(self):
+        """Resume the physics thread."""
+        if self.worker is not None:
+            self.worker.resume()
+
+    def step_n(self, count=1):
+        """Queue a fixed number of physics steps on the physics thread."""
+        if self.worker is not None:
+            self.worker.step(count)
+
+    def step(self):
+        """Advance the physics world by one fixed timestep."""
+        with self.lock:
+            self.control.apply(self.sim_time)
+            self.engine.step_simulation()
+            self.sim_time += self.time_step
+            self.step_count += 1
+            self._publish_snapshot()
+            self.last_sampled = self._update_sensors()
+            self.history.record(self.last_sampled)
+            if self.recorder is not None:
+                self.recorder.record_step(self, self.last_sampled)
+
+    @property
+    def steps_per_second(self):
+        """Physics steps achieved per wall-clock second."""
+        return self.worker.steps_per_second if self.worker is not None else 0.0
+
     def load_robot(self, urdf_path, base_position=(0, 0, 1)):
         """Load a robot URDF into the simulation."""
-        self.robot = self.engine.load_urdf(urdf_path, base_position)
+        if not self.engine.connected:
+            self.logger.error("Cannot load robot. Physics client is not connected.")
+            return
+        with self.lock:
+            self.robot = self.urdf_cache.load(self.engine, urdf_path, base_position)
+            if self.robot is not None:
+                self._track_body(self.robot, source=urdf_path)
         if self.robot is not None:
-            print(f"Robot loaded: {urdf_path}")
+            self.logger.info(f"Robot loaded: {urdf_path}")
         else:
-            print(f"Failed to load robot: {urdf_path}")
+            self.logger.error(f"Failed to load robot: {urdf_path}")
+
+    def load_robots(self, groups, cancelled=None):
+        """Load spawn groups in one locked batch with rendering paused.
+
+        Each group is a dict with a 'urdf' path, (n, 3) 'positions', (n, 4) 'orientations' and
+        per-instance 'overrides' ({index: {'rgba': ..., 'mass': ...}}), as planned by FileLoader.
+        If `cancelled()` turns true part-way, the bodies loaded so far are removed again and
+        nothing is added.
+        """
+        bodies = []
+        with self.lock:
+            if not self.engine.connected:
+                self.logger.error("Cannot load robots. Physics client is not connected.")
+                return bodies
+            client = self.engine.physics_client
+            p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, 0, physicsClientId=client)
+            try:
+                spawned = []
+                for group in groups:
+                    if cancelled is not None and cancelled():
+                        break
+                    group_bodies = self.urdf_cache.load_many(self.engine, group['urdf'], group['positions'],
+                                                             group.get('orientations'))
+                    bodies.extend(group_bodies)
+                    spawned.append((group['urdf'], group_bodies))
+                    for index, override in group.get('overrides', {}).items():
+                        self._apply_override(group_bodies[index], override)
+                else:
+                    for source, group_bodies in spawned:
+                        # Copies of one model share their tracking info, so it is queried once per group.
+                        info = None
+                        for body in group_bodies:
+                            info = self._track_body(body, publish=False, template=info, source=source)
+                    if bodies:
+                        self.robot = bodies[-1]
+                        self._publish_snapshot()
+                    self.logger.info(f"Loaded {len(bodies)} robots")
+                    return bodies
+            except Exception:
+                self._remove_bodies(bodies)
+                raise
+            finally:
+                p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, 1, physicsClientId=client)
+            self._remove_bodies(bodies)
+        self.logger.info("Robot loading cancelled")
+        return []
+
+    def _apply_override(self, body, override):
+        """Per-instance changes that do not affect pose: colour and mass."""
+        client = self.engine.physics_client
+        if 'rgba' in override:
+            for link in range(-1, p.getNumJoints(body, physicsClientId=client)):
+                p.changeVisualShape(body, link, rgbaColor=override['rgba'], physicsClientId=client)
+        if 'mass' in override:
+            p.changeDynamics(body, -1, mass=override['mass'], physicsClientId=client)
+
+    def _remove_bodies(self, bodies):
+        """Remove bodies from PyBullet and from everything that tracks or names them."""
+        removed = set(bodies)
+        for body in bodies:
+            p.removeBody(body, physicsClientId=self.engine.physics_client)
+            self.scene.remove(body)
+            self.body_info.pop(body, None)
+            self.control.clear(body)
+        self.bodies = [body for body in self.bodies if body not in removed]
+
+    def _track_body(self, body, publish=True, template=None, source=None):
+        """Cache what per-frame pose queries need to know about a newly loaded body, and register it.
+
+        `template` is the info of another copy of the same model, which saves the queries.
+        """
+        if template is None:
+            client = self.engine.physics_client
+            dynamics = p.getDynamicsInfo(body, -1, physicsClientId=client)
+            joint_count = p.getNumJoints(body, physicsClientId=client)
+            template = {
+                'names': self._body_names(body),
+                'joint_count': joint_count,
+                # PyBullet reports the base at its centre of mass; this maps it back to the URDF link frame.
+                'base_offset': p.invertTransform(dynamics[3], dynamics[4]),
+                'kinematics': KinematicTree.from_body(body, client) if joint_count else None,
+            }
+        self.bodies.append(body)
+        self.body_info[body] = dict(template, visual_shapes=None)
+        self.scene.add(body, source, *template['names'], kinematics=template['kinematics'])
+        # Publish straight away so the body shows up even while the physics thread is paused.
+        if publish:
+            self._publish_snapshot()
+        return self.body_info[body]
+
+    def _body_names(self, body):
+        """(robot name, base link name) from the URDF, as getBodyInfo reports them."""
+        names = self.urdf_cache.body_names(self.engine.physics_client, body)
+        if names is not None:
+            return names
+        base_name, model_name = p.getBodyInfo(body, physicsClientId=self.engine.physics_client)
+        return model_name.decode('utf-8'), base_name.decode('utf-8')
+
+    def start_recording(self, path, **options):
+        """Stream body states and sensor samples to a binary log from the next step on."""
+        with self.lock:
+            self.stop_recording()
+            self.recorder = Recorder(path, **options)
+        self.logger.info(f"Recording to {path}")
+
+    def stop_recording(self):
+        """Finish the current log, if any."""
+        with self.lock:
+            if self.recorder is not None:
+                self.recorder.close()
+                self.logger.info(f"Recording saved to {self.recorder.path}")
+                self.recorder = None
 
     def set_speed(self, speed):
-        """Set the simulation speed."""
+        """Set the simulation speed as a real-time factor."""
         self.simulation_speed = speed
+        if self.worker is not None:
+            self.worker.set_real_time_factor(speed)
+
+    def kinematics(self, body=None):
+        """The cached KinematicTree of a body (the current robot by default), or None without joints."""
+        entry = self.scene.entries.get(self.robot if body is None else body)
+        return entry.kinematics if entry is not None else None
+
+    def get_link_poses(self, interpolated=False):
+        """World poses of every tracked body's URDF link frames, base first, from the latest snapshot.
+
+        With `interpolated`, poses are blended between the last two snapshots by wall-clock time,
+        so a display refreshing faster than the physics still moves smoothly.
+        """
+        previous, latest = self.snapshots.pair()
+        if latest is None:
+            return {}
+        if not interpolated:
+            return latest.link_poses()
+        return latest.link_poses(*interpolate(previous, latest, time.perf_counter()))
+
+    def _publish_snapshot(self):
+        """Read every tracked body's link poses into a new immutable snapshot.
+
+        Articulated bodies are solved with their KinematicTree from one getJointStates call each,
+        all copies of one model in a single batched forward pass.
+        """
+        client = self.engine.physics_client
+        offsets = np.zeros(len(self.bodies) + 1, dtype=np.int64)
+        for i, body in enumerate(self.bodies):
+            offsets[i + 1] = offsets[i] + self.body_info[body]['joint_count'] + 1
+        positions = np.empty((offsets[-1], 3))
+        orientations = np.empty((offsets[-1], 4))
+        batches = {}
+        for i, body in enumerate(self.bodies):
+            start = offsets[i]
+            info = self.body_info[body]
+            count = info['joint_count']
+            tree = info['kinematics']
+            position, orientation = p.getBasePositionAndOrientation(body, physicsClientId=client)
+            positions[start], orientations[start] = p.multiplyTransforms(position, orientation, *info['base_offset'])
+            if tree is not None and tree.supported:
+                batches.setdefault(tree, []).append((start, position, orientation, tree.joint_positions(body, client)))
+            elif count:
+                states = p.getLinkStates(body, range(count), physicsClientId=client)
+                positions[start + 1:start + count + 1] = [state[4] for state in states]
+                orientations[start + 1:start + count + 1] = [state[5] for state in states]
+        for tree, entries in batches.items():
+            starts, base_positions, base_orientations, joint_positions = zip(*entries)
+            frames = tree.forward(base_positions, base_orientations, np.array(joint_positions))
+            rows = np.array(starts)[:, None] + np.arange(1, tree.count + 1)
+            positions[rows] = frames[:, 1:, :3, 3]
+            orientations[rows] = matrix_to_quaternion(frames[:, 1:])
+        self.snapshots.publish(StateSnapshot(self.step_count, self.sim_time, time.perf_counter(),
+                                             self.bodies, offsets, positions, orientations))
+
+    def get_visual_shapes(self, body):
+        """Visual geometry of a body as dicts, queried once and cached."""
+        with self.lock:
+            info = self.body_info.get(body)
+            if info is None or not self.engine.connected:
+                return []
+            if info['visual_shapes'] is None:
+                shapes = p.getVisualShapeData(body, physicsClientId=self.engine.physics_client)
+                info['visual_shapes'] = [{
+                    'link_index': shape[1],
+                    'geometry_type': shape[2],
+                    'dimensions': shape[3],
+                    'mesh_file': shape[4].decode('utf-8') if isinstance(shape[4], bytes) else shape[4],
+                    'position': shape[5],
+                    'orientation': shape[6],
+                    'color': shape[7],
+                } for shape in shapes]
+            return info['visual_shapes']
 
     def get_sensor_data(self):
-        """Get data from all sensors."""
+        """Get the latest cached reading from every sensor, keyed by sensor name."""
         data = {}
-        for sensor in self.sensors:
-            sensor.update()
-            data[sensor.sensor_type] = sensor.get_data()
+        with self.lock:
+            for sensor in self.sensors:
+                data[sensor.name] = sensor.get_data()
         return data
 
+    def get_sensor_timestamps(self):
+        """Sim time of every sensor's latest reading, keyed by sensor name; cheap enough to poll per frame."""
+        with self.lock:
+            return {sensor.name: sensor.timestamp for sensor in self.sensors}
+
+    def get_sensor_channels(self):
+        """Shapes of the channels kept in history, as {sensor name: {channel: shape}}."""
+        with self.lock:
+            return {name: {channel: buffer.shape for channel, buffer in channels.items()}
+                    for name, channels in self.history.buffers.items()}
+
+    def get_sensor_trace(self, name, channel, seconds, max_points=None):
+        """Copy the last `seconds` of one sensor channel as (times, values), peak-decimated to `max_points`."""
+        with self.lock:
+            times, values = self.history.last_seconds(name, channel, seconds)
+            if max_points is not None:
+                times, values = peak_decimate(times, values, max_points)
+            return np.array(times), np.array(values)
+
     def add_sensor(self, sensor):
         """Add a sensor to the simulation."""
-        self.sensors.append(sensor)
-        print(f"Sensor added: {sensor.sensor_type}")
+        # The physics thread iterates the sensors and scheduler every step.
+        with self.lock:
+            if sensor.name is None:
+                count = sum(1 for existing in self.sensors if existing.sensor_type == sensor.sensor_type)
+                sensor.name = f"{sensor.sensor_type}_{count}"
+            if any(existing.name == sensor.name for existing in self.sensors):
+                raise ValueError(f"Duplicate sensor name: {sensor.name}")
+            if self.engine.physics_client is not None:
+                sensor.physics_client = self.engine.physics_client
+            self.sensors.append(sensor)
+            self.sensor_scheduler.add(sensor)
+        self.logger.info(f"Sensor added: {sensor.name} ({sensor.sensor_type})")
 
-    def _load_environment(self):
+    def _load_environment(self, default_robot=True):
         """Load the simulation environment."""
-        p.loadURDF("plane.urdf")
-        p.loadURDF("r2d2.urdf", [0, 0, 1])
-        print("Environment loaded")
+        for path, position in [("plane.urdf", (0, 0, 0))] + ([("r2d2.urdf", (0, 0, 1))] if default_robot else []):
+            body = self.engine.load_urdf(path, position)
+            if body is not None:
+                # Not drawn by the viewer, but named and controllable like any other body.
+                client = self.engine.physics_client
+                joint_count = p.getNumJoints(body, physicsClientId=client)
+                kinematics = KinematicTree.from_body(body, client) if joint_count else None
+                self.scene.add(body, path, *self._body_names(body), kinematics=kinematics)
+        self.logger.info("Environment loaded")
 
     def _update_sensors(self):
-        """Update all sensors."""
-        for sensor in self.sensors:
-            sensor.update()
\ No newline at end of file
+        """Sample the sensors that are due at the current sim time."""
+        return self.sensor_scheduler.update(self.sim_time)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class StateSnapshot:
+    """Poses of every tracked body at one physics step; the arrays are read-only."""
+
+    __slots__ = ('step', 'sim_time', 'wall_time', 'bodies', 'offsets', 'positions', 'orientations')
+
+    def __init__(self, step, sim_time, wall_time, bodies, offsets, positions, orientations):
+        positions.setflags(write=False)
+        orientations.setflags(write=False)
+        self.step = step
+        self.sim_time = sim_time
+        self.wall_time = wall_time
+        self.bodies = tuple(bodies)
+        # Body i owns rows offsets[i]:offsets[i + 1], base first.
+        self.offsets = offsets
+        self.positions = positions
+        self.orientations = orientations
+
+    def link_poses(self, positions=None, orientations=None):
+        """Split the packed arrays into {body: (positions, orientations)} views."""
+        positions = self.positions if positions is None else positions
+        orientations = self.orientations if orientations is None else orientations
+        return {body: (positions[self.offsets[i]:self.offsets[i + 1]], orientations[self.offsets[i]:self.offsets[i + 1]])
+                for i, body in enumerate(self.bodies)}
+
+
+class SnapshotBuffer:
+    """The two newest snapshots, replaced by a single reference swap so neither side ever waits."""
+
+    def __init__(self):
+        self._pair = (None, None)
+
+    def publish(self, snapshot):
+        self._pair = (self._pair[1], snapshot)
+
+    def clear(self):
+        self._pair = (None, None)
+
+    def latest(self):
+        return self._pair[1]
+
+    def pair(self):
+        """(previous, latest), read together in one assignment."""
+        return self._pair
+
+
+def interpolate(previous, latest, now):
+    """Poses blended from previous to latest, trailing the physics by one publish interval."""
+    if previous is None or previous.bodies != latest.bodies or previous.positions.shape != latest.positions.shape:
+        return latest.positions, latest.orientations
+    interval = latest.wall_time - previous.wall_time
+    if interval <= 0:
+        return latest.positions, latest.orientations
+    alpha = min(max((now - latest.wall_time) / interval, 0.0), 1.0)
+    return blend(previous.positions, previous.orientations, latest.positions, latest.orientations, alpha)
+
+
+def blend(start_positions, start_orientations, end_positions, end_orientations, alpha):
+    """Poses a fraction `alpha` of the way from one set of (n, 3) positions and (n, 4) quaternions to another."""
+    positions = start_positions + (end_positions - start_positions) * alpha
+
+    # Normalised lerp, flipping quaternions into the same hemisphere first.
+    start = np.array(start_orientations, dtype=float)
+    flip = np.einsum('ij,ij->i', start, end_orientations) < 0
+    start[flip] *= -1
+    orientations = start + (end_orientations - start) * alpha
+    orientations /= np.linalg.norm(orientations, axis=1, keepdims=True)
+    return positions, orientations
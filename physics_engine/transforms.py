@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def quaternion_to_matrix(quaternions):
+    """Rotation matrices for (..., 4) xyzw quaternions, shaped (..., 3, 3)."""
+    q = np.asarray(quaternions, dtype=float)
+    x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    matrices = np.empty(q.shape[:-1] + (3, 3))
+    matrices[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    matrices[..., 0, 1] = 2 * (x * y - z * w)
+    matrices[..., 0, 2] = 2 * (x * z + y * w)
+    matrices[..., 1, 0] = 2 * (x * y + z * w)
+    matrices[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    matrices[..., 1, 2] = 2 * (y * z - x * w)
+    matrices[..., 2, 0] = 2 * (x * z - y * w)
+    matrices[..., 2, 1] = 2 * (y * z + x * w)
+    matrices[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return matrices
+
+
+def pose_matrices(positions, orientations):
+    """Homogeneous 4x4 transforms for (..., 3) positions and (..., 4) xyzw quaternions."""
+    positions = np.asarray(positions, dtype=float)
+    matrices = np.zeros(positions.shape[:-1] + (4, 4))
+    matrices[..., :3, :3] = quaternion_to_matrix(orientations)
+    matrices[..., :3, 3] = positions
+    matrices[..., 3, 3] = 1.0
+    return matrices
+
+
+def matrix_to_quaternion(matrices):
+    """xyzw quaternions for (..., 3, 3) rotation or (..., 4, 4) pose matrices, shaped (..., 4)."""
+    m = np.asarray(matrices, dtype=float)[..., :3, :3]
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+    # Shepperd's method: derive the quaternion from whichever component is largest, for stability.
+    squares = np.stack([1 + m00 + m11 + m22, 1 + m00 - m11 - m22, 1 - m00 + m11 - m22, 1 - m00 - m11 + m22], axis=-1)
+    roots = 0.5 * np.sqrt(np.maximum(squares, 1e-12))
+    quarter = 0.25 / roots
+    w, x, y, z = (roots[..., i] for i in range(4))
+    qw, qx, qy, qz = (quarter[..., i] for i in range(4))
+    candidates = np.stack([
+        np.stack([(m21 - m12) * qw, (m02 - m20) * qw, (m10 - m01) * qw, w], axis=-1),
+        np.stack([x, (m01 + m10) * qx, (m02 + m20) * qx, (m21 - m12) * qx], axis=-1),
+        np.stack([(m01 + m10) * qy, y, (m12 + m21) * qy, (m02 - m20) * qy], axis=-1),
+        np.stack([(m02 + m20) * qz, (m12 + m21) * qz, z, (m10 - m01) * qz], axis=-1),
+    ], axis=-2)
+    best = np.argmax(squares, axis=-1)[..., None, None]
+    quaternions = np.take_along_axis(candidates, best, axis=-2)[..., 0, :]
+    return quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)
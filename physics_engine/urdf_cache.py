@@ -0,0 +1,412 @@
+import json
+import logging
+import os
+import xml.etree.ElementTree as ET
+import pybullet as p
+import pybullet_data
+from physics_engine.file_hash import content_hash
+
+# Bump when the parsed model layout changes, so stale on-disk entries are ignored.
+FORMAT_VERSION = 2
+# URDF <contact> settings that getDynamicsInfo reports and changeDynamics can copy.
+CONTACT_PARAMETERS = ('lateral_friction', 'rolling_friction', 'spinning_friction', 'restitution', 'stiffness',
+                      'damping')
+# Copies per batched createMultiBody call, keeping each command well inside PyBullet's shared-memory limits.
+BATCH_SIZE = 1024
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'hermisim', 'urdf')
+
+
+class UrdfCache:
+    """A parse cache for URDF files, and shared shapes for spawning many copies of simple props.
+
+    A URDF's parsed model depends only on its bytes, so it is kept in memory and as JSON on disk
+    under the SHA-1 of the file. Single-link props built from primitives and OBJ meshes are then
+    spawned with `createMultiBody` on collision and visual shapes created once per physics client
+    (and recreated if a referenced mesh changes). The first copy in each world is loaded with
+    `loadURDF` and the shared copies get its inertia, margin and contact parameters.
+
+    Only those props are instanced. Articulated robots go through `loadURDF` once per copy, since
+    `createMultiBody` cannot carry their link and joint names or joint limits, so for them this is
+    only a parse cache. So do props the shared copies could not match (visuals of different
+    colours, contact settings other than friction, restitution, stiffness and damping). Those
+    copies are loaded with PyBullet's cached graphics shapes enabled.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.logger = logging.getLogger(__name__)
+        # URDF content hash -> parsed model.
+        self.models = {}
+        # (physics client, model hash + mesh hashes) -> (collision shape, visual shape).
+        self.shapes = {}
+        # (physics client, body) -> (robot name, base link name) of shared copies, which PyBullet
+        # neither names after the URDF nor, for batched copies, reports through getBodyInfo.
+        self.names = {}
+
+    def model(self, urdf_path):
+        """The parsed model of a URDF file, from memory, disk, or a fresh parse. Raises ValueError."""
+        path = resolve_data_path(urdf_path)
+        if path is None:
+            raise ValueError(f"URDF file not found: {urdf_path}")
+        digest = content_hash(path)
+        model = self.models.get(digest)
+        if model is None:
+            model = self._read_cached(digest)
+            if model is None:
+                model = parse_urdf(path)
+                model['hash'] = digest
+                self._write_cached(digest, model)
+            self.models[digest] = model
+        # Mesh paths are resolved against wherever this copy of the file lives.
+        if model.get('directory') != os.path.dirname(path):
+            model = dict(model, directory=os.path.dirname(path))
+            self.models[digest] = model
+        return model
+
+    def mesh_paths(self, model):
+        """Resolved paths of every mesh a model references; missing files are left out."""
+        paths = []
+        for filename in model['meshes']:
+            path = resolve_data_path(filename, model['directory'])
+            if path is not None:
+                paths.append(path)
+        return paths
+
+    def load(self, engine, urdf_path, base_position=(0, 0, 0), base_orientation=(0, 0, 0, 1)):
+        """Spawn a URDF into an engine's world, instancing cached shapes when the model allows it."""
+        bodies = self.load_many(engine, urdf_path, [base_position], [base_orientation])
+        return bodies[0] if bodies else None
+
+    def load_many(self, engine, urdf_path, positions, orientations=None):
+        """Spawn copies of one URDF at many poses; instanceable models take one batched call per chunk."""
+        positions = [tuple(float(v) for v in position) for position in positions]
+        if orientations is None:
+            orientations = [(0.0, 0.0, 0.0, 1.0)] * len(positions)
+        orientations = [tuple(float(v) for v in orientation) for orientation in orientations]
+        try:
+            model = self.model(urdf_path)
+        except (OSError, ValueError) as e:
+            # Leave the error reporting to PyBullet, which may still find the file on its search path.
+            self.logger.debug(f"Not caching {urdf_path}: {e}")
+            model = None
+        if model is None or not model['instanceable']:
+            return [engine.load_urdf(urdf_path, position, orientation, flags=p.URDF_ENABLE_CACHED_GRAPHICS_SHAPES)
+                    for position, orientation in zip(positions, orientations)]
+
+        client = engine.physics_client
+        key = (client, model['hash'] + ''.join(content_hash(path) for path in self.mesh_paths(model)))
+        bodies = []
+        shapes = self.shapes.get(key)
+        if shapes is None:
+            # The first copy in a world comes from loadURDF, and shared copies are matched to it, so
+            # inertia, margins and contact parameters are whatever loadURDF makes of the file.
+            reference = engine.load_urdf(urdf_path, positions[0], orientations[0],
+                                         flags=p.URDF_ENABLE_CACHED_GRAPHICS_SHAPES)
+            if reference is None:
+                return []
+            bodies.append(reference)
+            positions, orientations = positions[1:], orientations[1:]
+            shapes = self.shapes[key] = self._create_shapes(model, client) + (
+                p.getDynamicsInfo(reference, -1, physicsClientId=client),)
+        if not positions:
+            return bodies
+        inertial = model['links'][0]['inertial']
+        inertial_orientation = p.getQuaternionFromEuler(inertial['rpy'])
+        options = dict(baseMass=inertial['mass'],
+                       baseCollisionShapeIndex=shapes[0],
+                       baseVisualShapeIndex=shapes[1],
+                       baseInertialFramePosition=inertial['xyz'],
+                       baseInertialFrameOrientation=inertial_orientation,
+                       physicsClientId=client)
+
+        copies = []
+        for start in range(0, len(positions), BATCH_SIZE):
+            chunk = positions[start:start + BATCH_SIZE]
+            orientation = orientations[start]
+            if len(chunk) == 1:
+                copies.append(p.createMultiBody(basePosition=chunk[0], baseOrientation=orientation, **options))
+                continue
+            created = p.createMultiBody(basePosition=chunk[0], baseOrientation=orientation, batchPositions=chunk,
+                                        **options)
+            copies.extend(created)
+            # A batch shares one base orientation; copies that differ are turned afterwards.
+            for body, position, body_orientation in zip(created, chunk, orientations[start:start + BATCH_SIZE]):
+                if body_orientation != orientation:
+                    # resetBasePositionAndOrientation places the centre of mass, not the link frame.
+                    p.resetBasePositionAndOrientation(
+                        body, *p.multiplyTransforms(position, body_orientation, inertial['xyz'], inertial_orientation),
+                        physicsClientId=client)
+
+        names = (model['name'] or '', model['links'][0]['name'])
+        for body in copies:
+            self.names[(client, body)] = names
+
+        dynamics = _dynamics_changes(shapes[2], p.getDynamicsInfo(copies[0], -1, physicsClientId=client))
+        # Shapes in a visual array take no colour of their own.
+        visuals = model['links'][0]['visuals']
+        recolour = len(visuals) > 1
+        if dynamics or recolour:
+            for body in copies:
+                if dynamics:
+                    p.changeDynamics(body, -1, physicsClientId=client, **dynamics)
+                if recolour:
+                    p.changeVisualShape(body, -1, rgbaColor=visuals[0]['rgba'], physicsClientId=client)
+        return bodies + copies
+
+    def body_names(self, physics_client, body):
+        """(robot name, base link name) of a shared copy, or None for bodies loadURDF made."""
+        return self.names.get((physics_client, body))
+
+    def release(self, physics_client):
+        """Forget what was created in a client; its ids are meaningless once it disconnects or resets."""
+        for cache in (self.shapes, self.names):
+            for key in [key for key in cache if key[0] == physics_client]:
+                del cache[key]
+
+    def _create_shapes(self, model, client):
+        link = model['links'][0]
+        collision = -1
+        if len(link['collisions']) == 1:
+            arrays = _shape_arrays(link['collisions'], model['directory'])
+            collision = p.createCollisionShape(arrays['shapeTypes'][0], radius=arrays['radii'][0],
+                                               halfExtents=arrays['halfExtents'][0], height=arrays['lengths'][0],
+                                               fileName=arrays['fileNames'][0], meshScale=arrays['meshScales'][0],
+                                               collisionFramePosition=arrays['collisionFramePositions'][0],
+                                               collisionFrameOrientation=arrays['collisionFrameOrientations'][0],
+                                               physicsClientId=client)
+        elif link['collisions']:
+            collision = p.createCollisionShapeArray(**_shape_arrays(link['collisions'], model['directory']),
+                                                    physicsClientId=client)
+        visual = -1
+        if len(link['visuals']) == 1:
+            geometry = link['visuals'][0]
+            arrays = _shape_arrays([geometry], model['directory'])
+            visual = p.createVisualShape(arrays['shapeTypes'][0], radius=arrays['radii'][0],
+                                         halfExtents=arrays['halfExtents'][0], length=arrays['lengths'][0],
+                                         fileName=arrays['fileNames'][0], meshScale=arrays['meshScales'][0],
+                                         rgbaColor=geometry['rgba'],
+                                         visualFramePosition=arrays['collisionFramePositions'][0],
+                                         visualFrameOrientation=arrays['collisionFrameOrientations'][0],
+                                         physicsClientId=client)
+        elif link['visuals']:
+            arrays = _shape_arrays(link['visuals'], model['directory'])
+            visual = p.createVisualShapeArray(shapeTypes=arrays['shapeTypes'], radii=arrays['radii'],
+                                              halfExtents=arrays['halfExtents'], lengths=arrays['lengths'],
+                                              fileNames=arrays['fileNames'], meshScales=arrays['meshScales'],
+                                              visualFramePositions=arrays['collisionFramePositions'],
+                                              visualFrameOrientations=arrays['collisionFrameOrientations'],
+                                              physicsClientId=client)
+        return collision, visual
+
+    def _cache_file(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read_cached(self, digest):
+        try:
+            with open(self._cache_file(digest), 'r') as f:
+                model = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return model if model.get('format') == FORMAT_VERSION else None
+
+    def _write_cached(self, digest, model):
+        path = self._cache_file(digest)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, 'w') as f:
+                json.dump(model, f)
+            os.replace(temporary, path)
+        except OSError as e:
+            self.logger.warning(f"Cannot write URDF cache entry {path}: {e}")
+
+
+def resolve_data_path(path, base_directory=None):
+    """Find a file the way PyBullet would: as given, next to its parent file, or in pybullet_data."""
+    if path.startswith('package://'):
+        path = path[len('package://'):]
+    candidates = [path]
+    if base_directory is not None and not os.path.isabs(path):
+        candidates.insert(0, os.path.join(base_directory, path))
+    candidates.append(os.path.join(pybullet_data.getDataPath(), path))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def parse_urdf(path):
+    """Read a URDF into plain dicts: links with inertial, collision and visual geometry, and joints."""
+    try:
+        root = ET.parse(path).getroot()
+    except ET.ParseError as e:
+        raise ValueError(f"Error parsing URDF file {path}: {e}")
+    if root.tag != 'robot':
+        raise ValueError(f"Not a URDF robot description: {path}")
+
+    # Materials can be defined inside one visual and referenced by name from others.
+    materials = {}
+    for material in root.iter('material'):
+        color = material.find('color')
+        if material.get('name') and color is not None:
+            materials[material.get('name')] = _floats(color.get('rgba'), [1, 1, 1, 1])
+
+    links = []
+    meshes = []
+    instanceable = True
+    for link in root.findall('link'):
+        inertial = _inertial(link.find('inertial'))
+        instanceable &= _contact_supported(link.find('contact'))
+        collisions = []
+        visuals = []
+        for element in link.findall('collision'):
+            geometry = _geometry(element)
+            if geometry is not None:
+                collisions.append(geometry)
+        for element in link.findall('visual'):
+            geometry = _geometry(element)
+            if geometry is None:
+                continue
+            geometry['rgba'] = _material_color(element.find('material'), materials)
+            visuals.append(geometry)
+        for geometry in collisions + visuals:
+            if geometry['type'] == 'mesh':
+                meshes.append(geometry['filename'])
+                # Shapes created directly only read Wavefront OBJ reliably.
+                instanceable &= geometry['filename'].lower().endswith('.obj')
+        # Shapes in a visual array can only be coloured together.
+        instanceable &= len({tuple(visual['rgba']) for visual in visuals}) <= 1
+        links.append({
+            'name': link.get('name'),
+            'inertial': inertial,
+            'collisions': collisions,
+            'visuals': visuals,
+        })
+
+    joints = []
+    for joint in root.findall('joint'):
+        origin = joint.find('origin')
+        axis = joint.find('axis')
+        joints.append({
+            'name': joint.get('name'),
+            'type': joint.get('type'),
+            'parent': _link_reference(joint, 'parent'),
+            'child': _link_reference(joint, 'child'),
+            'xyz': _floats(origin.get('xyz') if origin is not None else None, [0, 0, 0]),
+            'rpy': _floats(origin.get('rpy') if origin is not None else None, [0, 0, 0]),
+            'axis': _floats(axis.get('xyz') if axis is not None else None, [1, 0, 0]),
+        })
+
+    return {
+        'format': FORMAT_VERSION,
+        'name': root.get('name'),
+        'directory': os.path.dirname(path),
+        'links': links,
+        'joints': joints,
+        'meshes': sorted(set(meshes)),
+        # Only one rigid link can be spawned from shared shapes without rebuilding joint semantics.
+        'instanceable': instanceable and len(links) == 1 and not joints,
+    }
+
+
+def _link_reference(joint, tag):
+    element = joint.find(tag)
+    if element is None or not element.get('link'):
+        raise ValueError(f"Joint {joint.get('name')} has no {tag} link")
+    return element.get('link')
+
+
+def _inertial(element):
+    if element is None:
+        return {'mass': 0.0, 'xyz': [0, 0, 0], 'rpy': [0, 0, 0], 'inertia': [0, 0, 0]}
+    origin = element.find('origin')
+    mass = element.find('mass')
+    inertia = element.find('inertia')
+    return {
+        'mass': float(mass.get('value', 0)) if mass is not None else 0.0,
+        'xyz': _floats(origin.get('xyz') if origin is not None else None, [0, 0, 0]),
+        'rpy': _floats(origin.get('rpy') if origin is not None else None, [0, 0, 0]),
+        'inertia': [float(inertia.get(name, 0)) for name in ('ixx', 'iyy', 'izz')] if inertia is not None else [0, 0, 0],
+    }
+
+
+def _contact_supported(element):
+    """Whether changeDynamics can carry a link's <contact> settings over to shared copies."""
+    return element is None or all(child.tag in CONTACT_PARAMETERS for child in element)
+
+
+def _dynamics_changes(reference, copy):
+    """changeDynamics arguments that turn a shared copy's getDynamicsInfo into the reference's."""
+    changes = {}
+    for index, name in ((1, 'lateralFriction'), (2, 'localInertiaDiagonal'), (5, 'restitution'),
+                        (6, 'rollingFriction'), (7, 'spinningFriction'), (11, 'collisionMargin')):
+        if not _close(reference[index], copy[index]):
+            changes[name] = reference[index]
+    # Contact stiffness and damping are only ever set as a pair; -1 means they were not.
+    if reference[9] >= 0 and not (_close(reference[8], copy[8]) and _close(reference[9], copy[9])):
+        changes['contactDamping'] = reference[8]
+        changes['contactStiffness'] = reference[9]
+    return changes
+
+
+def _close(a, b):
+    a, b = (a, b) if isinstance(a, tuple) else ((a,), (b,))
+    return all(abs(x - y) <= 1e-12 + 1e-9 * abs(x) for x, y in zip(a, b))
+
+
+def _geometry(element):
+    geometry = element.find('geometry')
+    if geometry is None or not len(geometry):
+        return None
+    shape = geometry[0]
+    origin = element.find('origin')
+    result = {
+        'type': shape.tag,
+        'xyz': _floats(origin.get('xyz') if origin is not None else None, [0, 0, 0]),
+        'rpy': _floats(origin.get('rpy') if origin is not None else None, [0, 0, 0]),
+    }
+    if shape.tag == 'box':
+        result['size'] = _floats(shape.get('size'), [1, 1, 1])
+    elif shape.tag == 'sphere':
+        result['radius'] = float(shape.get('radius', 0.5))
+    elif shape.tag in ('cylinder', 'capsule'):
+        result['radius'] = float(shape.get('radius', 0.5))
+        result['length'] = float(shape.get('length', 1))
+    elif shape.tag == 'mesh':
+        result['filename'] = shape.get('filename', '')
+        result['scale'] = _floats(shape.get('scale'), [1, 1, 1])
+    else:
+        return None
+    return result
+
+
+def _material_color(material, materials):
+    if material is None:
+        return [1, 1, 1, 1]
+    color = material.find('color')
+    if color is not None:
+        return _floats(color.get('rgba'), [1, 1, 1, 1])
+    return materials.get(material.get('name'), [1, 1, 1, 1])
+
+
+def _shape_arrays(geometries, directory):
+    """Keyword arrays for createCollisionShapeArray; the visual variants take the same values."""
+    types = {'box': p.GEOM_BOX, 'sphere': p.GEOM_SPHERE, 'cylinder': p.GEOM_CYLINDER,
+             'capsule': p.GEOM_CAPSULE, 'mesh': p.GEOM_MESH}
+    arrays = {key: [] for key in ('shapeTypes', 'radii', 'halfExtents', 'lengths', 'fileNames', 'meshScales',
+                                  'collisionFramePositions', 'collisionFrameOrientations')}
+    for geometry in geometries:
+        arrays['shapeTypes'].append(types[geometry['type']])
+        arrays['radii'].append(geometry.get('radius', 0.5))
+        arrays['halfExtents'].append([value / 2 for value in geometry.get('size', [1, 1, 1])])
+        arrays['lengths'].append(geometry.get('length', 1.0))
+        filename = geometry.get('filename')
+        arrays['fileNames'].append(resolve_data_path(filename, directory) or filename if filename else '')
+        arrays['meshScales'].append(geometry.get('scale', [1, 1, 1]))
+        arrays['collisionFramePositions'].append(geometry['xyz'])
+        arrays['collisionFrameOrientations'].append(p.getQuaternionFromEuler(geometry['rpy']))
+    return arrays
+
+
+def _floats(text, default):
+    return [float(value) for value in text.split()] if text else list(default)
@@ -0,0 +1,107 @@
+import logging
+import queue
+import threading
+import time
+
+
+class PhysicsWorker(threading.Thread):
+    def __init__(self, simulation, time_step=1.0 / 240.0, real_time_factor=1.0, max_substeps=8):
+        super().__init__(name="PhysicsWorker", daemon=True)
+        self.logger = logging.getLogger(__name__)
+        self.simulation = simulation
+        self.time_step = time_step
+        self.real_time_factor = real_time_factor
+        self.max_substeps = max_substeps
+        self.commands = queue.Queue()
+        self.paused = False
+        self.steps_per_second = 0.0
+        self._stopped = False
+
+    def pause(self):
+        """Pause stepping without tearing down the physics world."""
+        self.commands.put(('pause', ()))
+
+    def resume(self):
+        """Resume stepping after a pause."""
+        self.commands.put(('resume', ()))
+
+    def step(self, count=1):
+        """Advance the simulation by a fixed number of steps."""
+        self.commands.put(('step', (count,)))
+
+    def set_real_time_factor(self, factor):
+        """Set how many simulated seconds elapse per wall-clock second."""
+        self.commands.put(('real_time_factor', (factor,)))
+
+    def stop(self):
+        """Ask the worker to exit its loop."""
+        self.commands.put(('stop', ()))
+
+    def run(self):
+        previous = time.perf_counter()
+        accumulator = 0.0
+        window_start = previous
+        window_steps = 0
+        try:
+            while not self._stopped:
+                if self.paused:
+                    self._process_commands(timeout=None)
+                    previous = time.perf_counter()
+                    accumulator = 0.0
+                    continue
+
+                now = time.perf_counter()
+                accumulator += (now - previous) * self.real_time_factor
+                previous = now
+
+                substeps = min(int(accumulator / self.time_step), self.max_substeps)
+                for _ in range(substeps):
+                    self.simulation.step()
+                accumulator -= substeps * self.time_step
+                if accumulator >= self.time_step:
+                    # Physics cannot keep up; drop the backlog instead of spiralling.
+                    accumulator %= self.time_step
+
+                window_steps += substeps
+                if now - window_start >= 1.0:
+                    self.steps_per_second = window_steps / (now - window_start)
+                    window_start = now
+                    window_steps = 0
+
+                wait = (self.time_step - accumulator) / self.real_time_factor
+                self._process_commands(timeout=max(wait, 0.0))
+        except Exception as e:
+            self.logger.exception(f"Physics worker stopped after an error: {e}")
+        finally:
+            self.steps_per_second = 0.0
+
+    def _process_commands(self, timeout):
+        try:
+            if timeout == 0.0:
+                command, args = self.commands.get_nowait()
+            else:
+                command, args = self.commands.get(timeout=timeout)
+        except queue.Empty:
+            return
+        self._handle_command(command, args)
+        while True:
+            try:
+                command, args = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            self._handle_command(command, args)
+
+    def _handle_command(self, command, args):
+        if command == 'pause':
+            self.paused = True
+        elif command == 'resume':
+            self.paused = False
+        elif command == 'step':
+            for _ in range(args[0]):
+                self.simulation.step()
+        elif command == 'real_time_factor':
+            self.real_time_factor = max(args[0], 1e-3)
+        elif command == 'stop':
+            self._stopped = True
+        else:
+            raise ValueError(f"Unknown worker command: {command}")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+p = pytest.importorskip("pybullet")
+pytest.importorskip("pybullet_data")
+
+from physics_engine.control import TrajectoryPlayer
+from physics_engine.simulation import Simulation
+
+
+@pytest.fixture
+def simulation():
+    simulation = Simulation()
+    simulation.connect(p.DIRECT)
+    yield simulation
+    simulation.engine.disconnect()
+
+
+def test_position_targets_converge_on_named_joints(simulation):
+    simulation.control.set_targets("physics", 'position', [-0.3], joints=["head_swivel"])
+    for _ in range(240):
+        simulation.step()
+    positions, _ = simulation.control.joint_states("physics", ["head_swivel"])
+    np.testing.assert_allclose(positions, [[-0.3]], atol=1e-2)
+    body = simulation.scene.body("physics")
+    assert simulation.control.commands[body].joints == [simulation.kinematics(body).joint_indices["head_swivel"]]
+
+
+def test_scalar_targets_broadcast_over_bodies_and_joints(simulation):
+    bodies = simulation.load_robots([{"urdf": "r2d2.urdf", "positions": [(2, 0, 1), (3, 0, 1)]}])
+    simulation.control.set_targets(bodies, 'position', 0.1)
+    dof = len(simulation.kinematics(bodies[0]).movable)
+    for body in bodies:
+        assert simulation.control.commands[body].values == [0.1] * dof
+    with pytest.raises(ValueError):
+        simulation.control.set_targets(bodies, 'position', [0.1, 0.2])
+
+
+def test_trajectory_player_removes_itself_when_finished(simulation):
+    player = simulation.control.add_controller(
+        TrajectoryPlayer("physics", [0.0, 0.1], [[0.0], [0.4]], joints=["head_swivel"]))
+    for _ in range(12):
+        simulation.step()
+    assert player in simulation.control.controllers
+    for _ in range(20):
+        simulation.step()
+    assert player not in simulation.control.controllers
+    body = simulation.scene.body("physics")
+    assert simulation.control.commands[body].values == [0.4]
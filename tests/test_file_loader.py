@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+p = pytest.importorskip("pybullet")
+pytest.importorskip("pybullet_data")
+
+from gui.file_loader import FileLoader
+from physics_engine.simulation import Simulation
+
+SCENE = """<scene>
+  <robot urdf="r2d2.urdf" position="0 0 2" rpy="0 0 1.5707963"/>
+  <instances urdf="sphere2.urdf" layout="grid" count="2 3" spacing="1 2 0" origin="10 0 1">
+    <override index="1" skip="true"/>
+    <override index="2" position="0 0 5" rgba="1 0 0 1" mass="4"/>
+  </instances>
+  <instances urdf="sphere2.urdf" layout="array" count="3" spacing="0 0.5 0" origin="0 5 1"/>
+</scene>
+"""
+
+
+@pytest.fixture
+def scene(tmp_path):
+    path = tmp_path / "scene.xml"
+    path.write_text(SCENE)
+    return str(path)
+
+
+def test_layouts_and_overrides_are_planned(scene):
+    robot, grid, array = FileLoader(Simulation()).plan_file(scene)
+
+    np.testing.assert_allclose(robot['positions'], [(0, 0, 2)])
+    np.testing.assert_allclose(robot['orientations'], [p.getQuaternionFromEuler((0, 0, 1.5707963))])
+
+    # A 2 x 3 grid, with copy 1 skipped and copy 2 (now 1) moved.
+    np.testing.assert_allclose(grid['positions'], [(10, 0, 1), (0, 0, 5), (11, 0, 1), (11, 2, 1), (11, 4, 1)])
+    assert grid['overrides'] == {1: {'rgba': (1, 0, 0, 1), 'mass': 4.0}}
+    np.testing.assert_allclose(grid['orientations'], np.tile((0, 0, 0, 1), (5, 1)))
+
+    np.testing.assert_allclose(array['positions'], [(0, 5, 1), (0, 5.5, 1), (0, 6, 1)])
+    assert array['overrides'] == {}
+
+
+def test_override_outside_the_layout_is_rejected(tmp_path):
+    path = tmp_path / "bad.xml"
+    path.write_text('<scene><instances urdf="sphere2.urdf" layout="array" count="2">'
+                    '<override index="2" skip="true"/></instances></scene>')
+    with pytest.raises(ValueError):
+        FileLoader(Simulation()).plan_file(str(path))
+
+
+def test_loading_applies_overrides(scene):
+    simulation = Simulation()
+    simulation.connect(p.DIRECT, default_robot=False)
+    try:
+        bodies = FileLoader(simulation).load_file(scene)
+        assert len(bodies) == 1 + 5 + 3
+        client = simulation.engine.physics_client
+        moved = bodies[2]
+        assert p.getDynamicsInfo(moved, -1, physicsClientId=client)[0] == 4.0
+        np.testing.assert_allclose(p.getVisualShapeData(moved, physicsClientId=client)[0][7], (1, 0, 0, 1))
+        np.testing.assert_allclose(p.getBasePositionAndOrientation(moved, physicsClientId=client)[0], (0, 0, 5))
+    finally:
+        simulation.engine.disconnect()
+
+
+def test_loading_without_a_connection_is_an_error(scene):
+    with pytest.raises(RuntimeError):
+        FileLoader(Simulation()).load_file(scene)
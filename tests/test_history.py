@@ -0,0 +1,50 @@
+import numpy as np
+
+from physics_engine.history import RingBuffer, peak_decimate
+
+
+def _filled(capacity, samples):
+    buffer = RingBuffer(capacity, shape=(2,))
+    for i in range(samples):
+        buffer.append(0.1 * i, (i, -i))
+    return buffer
+
+
+def test_reads_across_the_wrap_point():
+    # Ten samples through seven slots: the oldest three were overwritten.
+    buffer = _filled(7, 10)
+    assert len(buffer) == 7
+    times, values = buffer.latest()
+    np.testing.assert_allclose(times, 0.1 * np.arange(3, 10))
+    np.testing.assert_array_equal(values[:, 0], np.arange(3, 10))
+    times, values = buffer.window(0.45, 0.75)
+    np.testing.assert_allclose(times, [0.5, 0.6, 0.7])
+    np.testing.assert_array_equal(values, [[5, -5], [6, -6], [7, -7]])
+    np.testing.assert_array_equal(buffer.latest(2)[1][:, 0], [8, 9])
+
+
+def test_windows_longer_than_the_buffer_return_what_it_holds():
+    buffer = _filled(5, 12)
+    times, values = buffer.window(-100.0, 100.0)
+    np.testing.assert_allclose(times, 0.1 * np.arange(7, 12))
+    np.testing.assert_array_equal(values[:, 0], np.arange(7, 12))
+    times, _ = buffer.window(0.75)
+    np.testing.assert_allclose(times, [0.8, 0.9, 1.0, 1.1])
+    assert len(buffer.window(5.0)[0]) == 0
+    assert len(buffer.latest(50)[0]) == 5
+
+
+def test_peak_decimate_keeps_extremes_and_the_newest_sample():
+    times = np.arange(1001, dtype=float)
+    values = np.sin(times / 50.0)
+    values[333] = 10.0
+    values[777] = -10.0
+    thinned_times, thinned = peak_decimate(times, values, 100)
+    assert len(thinned) <= 100
+    assert thinned.max() == 10.0 and thinned.min() == -10.0
+    assert thinned_times[-1] == times[-1]
+    assert np.all(np.diff(thinned_times) >= 0)
+
+    # Short traces are left alone.
+    short_times, short = peak_decimate(times[:50], values[:50], 100)
+    np.testing.assert_array_equal(short, values[:50])
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+p = pytest.importorskip("pybullet")
+pybullet_data = pytest.importorskip("pybullet_data")
+
+from physics_engine.kinematics import KinematicTree
+from physics_engine.transforms import matrix_to_quaternion
+
+# Models with rotated inertial frames (r2d2, minitaur, racecar), several prismatic joints (panda)
+# and a long revolute chain (kuka).
+MODELS = [
+    "kuka_iiwa/model.urdf",
+    "r2d2.urdf",
+    "franka_panda/panda.urdf",
+    "racecar/racecar.urdf",
+    "quadruped/minitaur.urdf",
+]
+
+ROTATED_INERTIALS = """<robot name="rotated">
+  <link name="base">
+    <inertial><origin xyz="0.1 0 0" rpy="0.3 0.5 0.2"/><mass value="1"/>
+      <inertia ixx="1" ixy="0" ixz="0" iyy="2" iyz="0" izz="3"/></inertial>
+  </link>
+  <link name="arm">
+    <inertial><origin xyz="0 0.1 0.05" rpy="0.4 -0.2 0.7"/><mass value="1"/>
+      <inertia ixx="1" ixy="0" ixz="0" iyy="2" iyz="0" izz="3"/></inertial>
+  </link>
+  <link name="slider">
+    <inertial><origin xyz="0.05 0 0.1" rpy="-0.3 0.2 0.1"/><mass value="1"/>
+      <inertia ixx="1" ixy="0" ixz="0" iyy="2" iyz="0" izz="3"/></inertial>
+  </link>
+  <link name="tip">
+    <inertial><origin xyz="0 0 0.02" rpy="0.1 0.1 -0.4"/><mass value="0.5"/>
+      <inertia ixx="1" ixy="0" ixz="0" iyy="1" iyz="0" izz="1"/></inertial>
+  </link>
+  <joint name="shoulder" type="revolute"><parent link="base"/><child link="arm"/>
+    <origin xyz="0 0 0.3" rpy="0.1 0.2 0.3"/><axis xyz="0 1 0"/>
+    <limit lower="-2" upper="2" effort="1" velocity="1"/></joint>
+  <joint name="slide" type="prismatic"><parent link="arm"/><child link="slider"/>
+    <origin xyz="0.2 0 0.1" rpy="0 0.4 0"/><axis xyz="1 0 0"/>
+    <limit lower="-2" upper="2" effort="1" velocity="1"/></joint>
+  <joint name="wrist" type="fixed"><parent link="slider"/><child link="tip"/>
+    <origin xyz="0 0.1 0" rpy="0.5 0 0"/></joint>
+</robot>
+"""
+
+
+@pytest.fixture
+def client():
+    client = p.connect(p.DIRECT)
+    p.setAdditionalSearchPath(pybullet_data.getDataPath(), physicsClientId=client)
+    yield client
+    p.disconnect(physicsClientId=client)
+
+
+@pytest.fixture
+def rotated_urdf(tmp_path):
+    path = tmp_path / "rotated.urdf"
+    path.write_text(ROTATED_INERTIALS)
+    return str(path)
+
+
+def _posed_body(client, path, fixed_base=False, seed=0):
+    body = p.loadURDF(path, [0.3, -0.2, 0.5], p.getQuaternionFromEuler([0.2, 0.1, 0.4]),
+                      useFixedBase=fixed_base, physicsClientId=client)
+    tree = KinematicTree.from_body(body, client)
+    rng = np.random.default_rng(seed)
+    for joint in tree.movable:
+        p.resetJointState(body, int(joint), rng.uniform(-1, 1), physicsClientId=client)
+    return body, tree
+
+
+@pytest.mark.parametrize("model", MODELS + ["rotated"])
+def test_forward_matches_link_states(client, rotated_urdf, model):
+    body, tree = _posed_body(client, rotated_urdf if model == "rotated" else model)
+    position, orientation = p.getBasePositionAndOrientation(body, physicsClientId=client)
+    frames = tree.forward([position], [orientation], tree.joint_positions(body, client)[None])
+    states = p.getLinkStates(body, range(tree.count), computeForwardKinematics=True, physicsClientId=client)
+
+    np.testing.assert_allclose(frames[0, 1:, :3, 3], [state[4] for state in states], atol=1e-6)
+    quaternions = matrix_to_quaternion(frames[0, 1:])
+    # q and -q are the same rotation.
+    alignment = np.abs(np.sum(quaternions * np.array([state[5] for state in states]), axis=1))
+    np.testing.assert_allclose(alignment, 1.0, atol=1e-6)
+    base_position, base_orientation = p.multiplyTransforms(position, orientation,
+                                                           *p.invertTransform(*p.getDynamicsInfo(body, -1, physicsClientId=client)[3:5]))
+    np.testing.assert_allclose(frames[0, 0, :3, 3], base_position, atol=1e-6)
+
+
+def test_forward_batches_copies(client):
+    bodies = [_posed_body(client, "franka_panda/panda.urdf", seed=seed) for seed in range(3)]
+    tree = bodies[0][1]
+    poses = [p.getBasePositionAndOrientation(body, physicsClientId=client) for body, _ in bodies]
+    joints = np.array([tree.joint_positions(body, client) for body, _ in bodies])
+    frames = tree.forward([pose[0] for pose in poses], [pose[1] for pose in poses], joints)
+    for (body, _), body_frames in zip(bodies, frames):
+        states = p.getLinkStates(body, range(tree.count), computeForwardKinematics=True, physicsClientId=client)
+        np.testing.assert_allclose(body_frames[1:, :3, 3], [state[4] for state in states], atol=1e-6)
+
+
+@pytest.mark.parametrize("model", ["kuka_iiwa/model.urdf", "franka_panda/panda.urdf", "rotated"])
+def test_jacobian_matches_calculate_jacobian(client, rotated_urdf, model):
+    body, tree = _posed_body(client, rotated_urdf if model == "rotated" else model, fixed_base=True)
+    position, orientation = p.getBasePositionAndOrientation(body, physicsClientId=client)
+    q = tree.joint_positions(body, client)
+    frames = tree.forward([position], [orientation], q[None])
+    point = np.array([0.01, -0.02, 0.03])
+    zeros = [0.0] * len(q)
+    # calculateJacobian reports in the base's inertial frame, and takes the point from the link
+    # origin along the link's inertial axes; jacobian() uses world and URDF link frames.
+    to_base = _rotation(orientation).T
+    for link in range(tree.count):
+        linear, angular = p.calculateJacobian(body, link, point.tolist(), q.tolist(), zeros, zeros,
+                                              physicsClientId=client)
+        inertial = _rotation(p.getDynamicsInfo(body, link, physicsClientId=client)[4])
+        jacobian = tree.jacobian(frames, link, inertial @ point)
+        assert jacobian.shape == (1, 6, len(q))
+        np.testing.assert_allclose(to_base @ jacobian[0, :3], linear, atol=1e-6)
+        np.testing.assert_allclose(to_base @ jacobian[0, 3:], angular, atol=1e-6)
+
+
+def test_jacobian_batches_copies(client):
+    bodies = [_posed_body(client, "kuka_iiwa/model.urdf", fixed_base=True, seed=seed) for seed in range(7)]
+    tree = bodies[0][1]
+    poses = [p.getBasePositionAndOrientation(body, physicsClientId=client) for body, _ in bodies]
+    joints = np.array([tree.joint_positions(body, client) for body, _ in bodies])
+    frames = tree.forward([pose[0] for pose in poses], [pose[1] for pose in poses], joints)
+    # As many bodies as joints, so swapped axes would not fail on shape alone.
+    jacobians = tree.jacobian(frames, 6)
+    for i, (body, _) in enumerate(bodies):
+        np.testing.assert_allclose(jacobians[i], tree.jacobian(frames[i:i + 1], 6)[0])
+        zeros = [0.0] * len(joints[i])
+        linear, _ = p.calculateJacobian(body, 6, (0, 0, 0), joints[i].tolist(), zeros, zeros, physicsClientId=client)
+        np.testing.assert_allclose(_rotation(poses[i][1]).T @ jacobians[i, :3], linear, atol=1e-6)
+
+
+def _rotation(quaternion):
+    return np.array(p.getMatrixFromQuaternion(quaternion)).reshape(3, 3)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+p = pytest.importorskip("pybullet")
+pytest.importorskip("pybullet_data")
+
+from physics_engine.recorder import LogReader
+from physics_engine.sensor import Sensor
+from physics_engine.simulation import Simulation
+
+STEPS = 50
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """Record a falling sphere with an IMU, returning the log path and what was recorded."""
+    path = str(tmp_path / "fall.log")
+    simulation = Simulation()
+    simulation.connect(p.DIRECT)
+    body = simulation.load_robots([{"urdf": "sphere2.urdf", "positions": [(0, 0, 3)]}])[0]
+    simulation.add_sensor(Sensor(body, 'IMU', (0, 0, 0), (0, 0, 0, 1), name="imu"))
+    simulation.start_recording(path, chunk_rows=8)
+    client = simulation.engine.physics_client
+    positions, readings = {}, {}
+    for _ in range(STEPS):
+        simulation.step()
+        positions[simulation.step_count] = p.getBasePositionAndOrientation(body, physicsClientId=client)[0]
+        if any(sensor.name == "imu" for sensor in simulation.last_sampled):
+            readings[simulation.step_count] = np.array(simulation.get_sensor_data()["imu"]['acceleration'])
+    simulation.stop_recording()
+    simulation.engine.disconnect()
+    return path, body, positions, readings
+
+
+def test_round_trip(recording):
+    path, body, positions, readings = recording
+    reader = LogReader(path)
+    try:
+        assert sorted(reader.stream_names()) == sorted([f"body/{body}", "sensor/imu"])
+        stream = f"body/{body}"
+        assert reader.num_rows(stream) == STEPS
+        np.testing.assert_array_equal(reader.column(stream, 'step'), sorted(positions))
+        np.testing.assert_allclose(reader.column(stream, 'base_position'),
+                                   [positions[step] for step in sorted(positions)])
+        np.testing.assert_array_equal(reader.column("sensor/imu", 'step'), sorted(readings))
+        np.testing.assert_allclose(reader.column("sensor/imu", 'acceleration'),
+                                   [readings[step] for step in sorted(readings)])
+        assert (reader.first_step, reader.last_step) == (1, STEPS)
+    finally:
+        reader.close()
+
+
+def test_at_step_returns_the_latest_row_at_or_before_a_step(recording):
+    path, _, _, readings = recording
+    reader = LogReader(path)
+    try:
+        sampled = sorted(readings)
+        assert reader.at_step("sensor/imu", sampled[0] - 1) is None
+        # Steps the IMU skipped read back its previous sample.
+        skipped = next(step for step in range(sampled[0], STEPS) if step not in readings)
+        previous = max(step for step in sampled if step < skipped)
+        row = reader.at_step("sensor/imu", skipped)
+        assert row['step'] == previous
+        np.testing.assert_allclose(row['acceleration'], readings[previous])
+        assert reader.at_step("sensor/imu", STEPS + 100)['step'] == sampled[-1]
+    finally:
+        reader.close()
+
+
+def test_truncated_log_is_recovered_up_to_the_last_whole_chunk(recording, tmp_path):
+    path, body, positions, _ = recording
+    with open(path, 'rb') as f:
+        data = f.read()
+    truncated = str(tmp_path / "truncated.log")
+    # Drop the index, the footer and everything from part-way through the body's last chunk,
+    # as a crash mid-write would.
+    reader = LogReader(path)
+    last_chunk = reader.streams[f"body/{body}"]['chunks'][-1][0]
+    reader.close()
+    with open(truncated, 'wb') as f:
+        f.write(data[:last_chunk + 40])
+
+    reader = LogReader(truncated)
+    try:
+        stream = f"body/{body}"
+        rows = reader.num_rows(stream)
+        assert 0 < rows < STEPS and rows % 8 == 0
+        np.testing.assert_allclose(reader.column(stream, 'base_position'),
+                                   [positions[step] for step in sorted(positions)[:rows]])
+    finally:
+        reader.close()
@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+import pytest
+
+p = pytest.importorskip("pybullet")
+pytest.importorskip("pybullet_data")
+
+from physics_engine.replay import ReplaySource
+from physics_engine.simulation import Simulation
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = str(tmp_path / "fall.log")
+    simulation = Simulation()
+    simulation.connect(p.DIRECT)
+    simulation.load_robots([{"urdf": "sphere2.urdf", "positions": [(0, 0, 3)]}])
+    simulation.start_recording(path)
+    for _ in range(40):
+        simulation.step()
+    simulation.stop_recording()
+    simulation.engine.disconnect()
+    return path
+
+
+def test_interpolated_poses_lie_between_recorded_steps(log_path):
+    source = ReplaySource(log_path)
+    try:
+        body = source.bodies[-1]
+        source.seek(10)
+        before = source.get_link_poses()[body][0][0, 2]
+        assert source.get_link_poses(interpolated=True)[body][0][0, 2] == before
+        source.seek(11)
+        after = source.get_link_poses()[body][0][0, 2]
+
+        # Half a step into slow-motion playback from step 10.
+        source.seek(10)
+        source.speed = 1e-3
+        source.playing = True
+        source._anchor_wall = time.perf_counter() - 0.5 * source.time_step / source.speed
+        blended = source.get_link_poses(interpolated=True)[body]
+        source.playing = False
+        assert after < blended[0][0, 2] < before
+        np.testing.assert_allclose(np.linalg.norm(blended[1], axis=1), 1.0)
+    finally:
+        source.close()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+p = pytest.importorskip("pybullet")
+pytest.importorskip("pybullet_data")
+
+from physics_engine.lidar import LidarSensor
+from physics_engine.sensor import Sensor
+from physics_engine.simulation import Simulation
+
+GROUPS = [
+    {"urdf": "r2d2.urdf", "positions": [(2, 0, 1), (3, 0, 1)]},
+    {"urdf": "sphere2.urdf", "positions": [(0, 2, 1)]},
+]
+
+
+@pytest.fixture
+def simulation():
+    simulation = Simulation()
+    simulation.connect(p.DIRECT)
+    yield simulation
+    simulation.engine.disconnect()
+
+
+def test_environment_bodies_are_named_and_controllable(simulation):
+    robot = simulation.scene.body("physics")
+    tree = simulation.kinematics(robot)
+    assert tree is not None
+    assert simulation.scene.joint_index("physics", "head_swivel") == tree.joint_indices["head_swivel"]
+    simulation.control.set_targets("physics", "position", [0.1] * len(tree.movable))
+
+
+def test_cancelled_load_leaves_no_trace(simulation):
+    before = dict(simulation.scene.names)
+    calls = []
+
+    def cancelled():
+        calls.append(None)
+        return len(calls) > 1
+
+    assert simulation.load_robots(GROUPS, cancelled) == []
+    assert simulation.scene.names == before
+    assert simulation.bodies == []
+    assert p.getNumBodies(physicsClientId=simulation.engine.physics_client) == len(before)
+
+    bodies = simulation.load_robots(GROUPS)
+    assert len(bodies) == 3
+    assert sorted(simulation.scene.names) == ["physics", "physics_1", "physics_2", "plane", "urdf_robot"]
+
+
+def test_shared_copies_are_registered_under_the_urdf_names(simulation):
+    # The second group is all shared copies, with nothing loaded by loadURDF to take names from.
+    bodies = simulation.load_robots([{"urdf": "sphere2.urdf", "positions": [(0, 2, 1)]}])
+    bodies += simulation.load_robots([{"urdf": "sphere2.urdf", "positions": [(1, 2, 1), (2, 2, 1), (3, 2, 1)]}])
+    names = ["urdf_robot"] + [f"urdf_robot_{i}" for i in range(1, 4)]
+    assert [simulation.scene.body(name) for name in names] == bodies
+
+
+def test_imu_readings_are_not_overwritten_by_later_steps(simulation):
+    sphere = simulation.load_robots([{"urdf": "sphere2.urdf", "positions": [(0, 2, 3)]}])[0]
+    simulation.add_sensor(Sensor(sphere, 'IMU', (0, 0, 0), (0, 0, 0, 1), name="imu"))
+    simulation.step()
+    reading = simulation.get_sensor_data()["imu"]
+    before = np.array(reading['acceleration'])
+    for _ in range(20):
+        simulation.step()
+    np.testing.assert_array_equal(reading['acceleration'], before)
+    assert simulation.get_sensor_data()["imu"]['acceleration'][2] < before[2]
+
+
+def test_lidar_ranges_are_not_overwritten_by_later_steps(simulation):
+    sphere = simulation.load_robots([{"urdf": "sphere2.urdf", "positions": [(0, 2, 3)]}])[0]
+    simulation.add_sensor(LidarSensor(sphere, orientation=p.getQuaternionFromEuler((0, np.pi / 2, 0)), channels=1,
+                                      horizontal_fov=10.0, name="lidar"))
+    simulation.step()
+    reading = simulation.get_sensor_data()["lidar"]
+    before = np.array(reading['ranges'])
+    for _ in range(60):
+        simulation.step()
+    np.testing.assert_array_equal(reading['ranges'], before)
+    assert np.all(simulation.get_sensor_data()["lidar"]['ranges'] < before)
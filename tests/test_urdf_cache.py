@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+p = pytest.importorskip("pybullet")
+pytest.importorskip("pybullet_data")
+
+from physics_engine.engine import PhysicsEngine
+from physics_engine.urdf_cache import UrdfCache
+
+# Primitives, a compound of spheres, a static OBJ mesh, and contact friction and restitution.
+PROPS = [
+    "block.urdf",
+    "sphere2.urdf",
+    "sphere_with_restitution.urdf",
+    "sphere8cube.urdf",
+    "samurai.urdf",
+]
+
+TWO_VISUALS = """<robot name="two_visuals">
+  <link name="body">
+    <contact><lateral_friction value="0.8"/><stiffness value="3000"/><damping value="30"/></contact>
+    <inertial><origin xyz="0.1 0 0" rpy="0 0.3 0"/><mass value="2"/>
+      <inertia ixx="1" ixy="0" ixz="0" iyy="1" iyz="0" izz="1"/></inertial>
+    <visual><geometry><box size="1 0.5 0.2"/></geometry>
+      <material name="red"><color rgba="1 0 0 1"/></material></visual>
+    <visual><origin xyz="0 0 0.3"/><geometry><sphere radius="0.2"/></geometry><material name="red"/></visual>
+    <collision><geometry><box size="1 0.5 0.2"/></geometry></collision>
+    <collision><origin xyz="0 0 0.3" rpy="0.2 0 0"/><geometry><cylinder radius="0.2" length="0.3"/></geometry></collision>
+  </link>
+</robot>
+"""
+
+
+@pytest.fixture
+def engine():
+    engine = PhysicsEngine()
+    engine.connect(p.DIRECT)
+    yield engine
+    engine.disconnect()
+
+
+def _assert_same_body(original, copy, client):
+    a = p.getDynamicsInfo(original, -1, physicsClientId=client)
+    b = p.getDynamicsInfo(copy, -1, physicsClientId=client)
+    for x, y in zip(a, b):
+        np.testing.assert_allclose(np.hstack([x]), np.hstack([y]), rtol=1e-6, atol=1e-12)
+    visuals = zip(p.getVisualShapeData(original, physicsClientId=client),
+                  p.getVisualShapeData(copy, physicsClientId=client))
+    for x, y in visuals:
+        assert x[2] == y[2]
+        np.testing.assert_allclose(x[7], y[7])
+
+
+@pytest.mark.parametrize("urdf", PROPS + ["two_visuals"])
+def test_shared_copies_match_load_urdf(engine, tmp_path, urdf):
+    if urdf == "two_visuals":
+        urdf = str(tmp_path / "two_visuals.urdf")
+        with open(urdf, "w") as f:
+            f.write(TWO_VISUALS)
+    cache = UrdfCache(str(tmp_path / "cache"))
+    assert cache.model(urdf)["instanceable"]
+    client = engine.physics_client
+    orientation = (0.0, 0.0, 0.3826834, 0.9238795)
+    copies = cache.load_many(engine, urdf, [(0, 0, 1), (1, 0, 1), (2, 0, 1)], [orientation] * 3)
+    copies += cache.load_many(engine, urdf, [(3, 0, 1)], [orientation])
+    original = engine.load_urdf(urdf, (4, 0, 1), orientation)
+    for offset, copy in enumerate(copies):
+        _assert_same_body(original, copy, client)
+        position, turned = p.getBasePositionAndOrientation(copy, physicsClientId=client)
+        expected, _ = p.getBasePositionAndOrientation(original, physicsClientId=client)
+        np.testing.assert_allclose(np.subtract(position, expected), (offset - 4, 0, 0), atol=1e-6)
+        np.testing.assert_allclose(turned, p.getBasePositionAndOrientation(original, physicsClientId=client)[1],
+                                   atol=1e-6)
+
+
+def test_unsupported_contact_settings_use_load_urdf(tmp_path):
+    cache = UrdfCache(str(tmp_path / "cache"))
+    # cube.urdf sets contact_cfm and contact_erp, which changeDynamics cannot copy.
+    assert not cache.model("cube.urdf")["instanceable"]
+    assert not cache.model("r2d2.urdf")["instanceable"]
+
+
+def test_loading_without_a_connection_spawns_nothing(tmp_path):
+    cache = UrdfCache(str(tmp_path / "cache"))
+    engine = PhysicsEngine()
+    assert cache.load_many(engine, "sphere2.urdf", [(0, 0, 1), (1, 0, 1)]) == []
+    assert cache.load(engine, "sphere2.urdf") is None
+    assert cache.shapes == {}
+
+
+def test_shared_copies_are_named_like_load_urdf(engine, tmp_path):
+    cache = UrdfCache(str(tmp_path / "cache"))
+    client = engine.physics_client
+    copies = cache.load_many(engine, "sphere2.urdf", [(0, 0, 1), (1, 0, 1), (2, 0, 1), (3, 0, 1)])
+    base_name, model_name = p.getBodyInfo(copies[0], physicsClientId=client)
+    names = (model_name.decode('utf-8'), base_name.decode('utf-8'))
+    assert cache.body_names(client, copies[0]) is None
+    assert [cache.body_names(client, copy) for copy in copies[1:]] == [names] * 3
+    cache.release(client)
+    assert cache.body_names(client, copies[1]) is None
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pytest
+
+p = pytest.importorskip("pybullet")
+pybullet_data = pytest.importorskip("pybullet_data")
+
+from utils.urdf_model import Joint, Link, RobotModel, parse_shape
+
+MODELS = [
+    "r2d2.urdf",
+    "kuka_iiwa/model.urdf",
+    "franka_panda/panda.urdf",
+    "racecar/racecar.urdf",
+]
+
+
+@pytest.fixture
+def client():
+    client = p.connect(p.DIRECT)
+    yield client
+    p.disconnect(client)
+
+
+def _two_links(name):
+    model = RobotModel(name)
+    model.add_link(Link("a"))
+    model.add_link(Link("b"))
+    model.add_joint(Joint(f"{name}_joint", "revolute", "a", "b"))
+    return model
+
+
+def test_load_into_does_not_reuse_earlier_models(client):
+    first = _two_links("first").load_into(client)
+    model = _two_links("second")
+    model.add_link(Link("c"))
+    model.add_joint(Joint("extra", "prismatic", "b", "c"))
+    second = model.load_into(client)
+    assert p.getNumJoints(first, physicsClientId=client) == 1
+    assert p.getNumJoints(second, physicsClientId=client) == 2
+    assert p.getJointInfo(second, 0, physicsClientId=client)[1] == b"second_joint"
+
+
+def test_rename_checks_duplicates_before_changing_anything():
+    model = _two_links("robot")
+    model.update_link("b", name="c")
+    assert list(model.links) == ["a", "c"]
+    assert model.joints["robot_joint"].child == "c"
+    with pytest.raises(ValueError):
+        model.update_link("c", name="a", mass=5.0)
+    assert model.links["c"].mass == 1.0
+
+
+@pytest.mark.parametrize("text", ["box 1 2", "sphere 1 2", "cylinder 1", "sphere -1", "box a b c"])
+def test_parse_shape_rejects_bad_dimensions(text):
+    with pytest.raises(ValueError):
+        parse_shape(text)
+
+
+def test_parse_shape():
+    assert parse_shape("cylinder 0.1 0.2") == ("cylinder", (0.1, 0.2))
+    assert parse_shape("sphere") == ("sphere", None)
+    assert parse_shape("meshes/arm.obj") == ("meshes/arm.obj", None)
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_saved_models_load_like_the_original(client, tmp_path, model):
+    path = os.path.join(pybullet_data.getDataPath(), model)
+    saved = str(tmp_path / "saved.urdf")
+    RobotModel.read(path).save(saved)
+    original = p.loadURDF(path, physicsClientId=client)
+    copy = p.loadURDF(saved, physicsClientId=client)
+    count = p.getNumJoints(original, physicsClientId=client)
+    assert p.getNumJoints(copy, physicsClientId=client) == count
+    for link in range(-1, count):
+        a = p.getDynamicsInfo(original, link, physicsClientId=client)
+        b = p.getDynamicsInfo(copy, link, physicsClientId=client)
+        np.testing.assert_allclose(np.hstack(a[:5]), np.hstack(b[:5]), atol=1e-6)
+        assert len(p.getCollisionShapeData(original, link, physicsClientId=client)) == \
+            len(p.getCollisionShapeData(copy, link, physicsClientId=client))
+    for joint in range(count):
+        a = p.getJointInfo(original, joint, physicsClientId=client)
+        b = p.getJointInfo(copy, joint, physicsClientId=client)
+        assert a[1] == b[1]
+        np.testing.assert_allclose(np.hstack(a[6:11] + a[13:16]), np.hstack(b[6:11] + b[13:16]), atol=1e-9)
+    visuals = zip(p.getVisualShapeData(original, physicsClientId=client),
+                  p.getVisualShapeData(copy, physicsClientId=client))
+    for a, b in visuals:
+        assert a[1:3] == b[1:3]
+        np.testing.assert_allclose(a[7], b[7])
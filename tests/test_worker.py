@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+p = pytest.importorskip("pybullet")
+pytest.importorskip("pybullet_data")
+
+from physics_engine.simulation import Simulation
+from physics_engine.worker import PhysicsWorker
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_paused_worker_steps_exactly_on_request_and_stops_cleanly():
+    simulation = Simulation()
+    simulation.connect(p.DIRECT)
+    worker = PhysicsWorker(simulation, simulation.time_step)
+    worker.paused = True
+    worker.start()
+    simulation.running, simulation.worker = True, worker
+    try:
+        simulation.step_n(25)
+        _wait_for(lambda: simulation.step_count == 25)
+        # Paused, so nothing beyond the requested steps runs.
+        time.sleep(0.1)
+        assert simulation.step_count == 25
+        assert simulation.sim_time == pytest.approx(25 * simulation.time_step)
+
+        simulation.step_n(5)
+        _wait_for(lambda: simulation.step_count == 30)
+        assert simulation.sim_time == pytest.approx(30 * simulation.time_step)
+    finally:
+        simulation.stop()
+    assert not worker.is_alive()
+    assert simulation.worker is None and not simulation.engine.connected
@@ -1,18 +1,152 @@
+import os
+import queue
 import sys
+import threading
+import numpy as np
 import pybullet as p
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QFileDialog, QMessageBox, QLabel, QLineEdit, QTextEdit,
     QVBoxLayout, QHBoxLayout, QWidget, QTabWidget, QTableWidget, QTableWidgetItem, QComboBox, QHeaderView
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
 import pybullet_data
+from utils.urdf_model import (
+    RobotModel, Link, Joint, SensorMount, JOINT_TYPES, SENSOR_TYPES, DEFAULT_SIZES, format_shape, parse_shape,
+    load_urdf_text
+)
+
+class PreviewSignals(QObject):
+    # Emitted from the render thread; connections to widgets are queued onto the GUI thread.
+    frame_ready = pyqtSignal()
+    load_finished = pyqtSignal(bool, str)
+    model_failed = pyqtSignal(str)
+
+class PreviewWorker(threading.Thread):
+    """Owns a persistent DIRECT preview world and renders it only when something changed.
+
+    Requests are queued and coalesced: after the first one arrives the worker waits `debounce`
+    seconds for more before rebuilding and rendering once, and between requests it blocks on the
+    queue without polling. Frames are written into two preallocated buffers that are swapped under
+    a lock, so the GUI reads the front buffer in place while the next frame fills the back one.
+    """
+
+    def __init__(self, width=640, height=480, debounce=0.15):
+        super().__init__(name="URDFPreview", daemon=True)
+        self.width = width
+        self.height = height
+        self.debounce = debounce
+        self.signals = PreviewSignals()
+        self.requests = queue.Queue()
+        self.frame_lock = threading.Lock()
+        self._buffers = [np.zeros((height, width, 3), dtype=np.uint8) for _ in range(2)]
+        self._front = 0
+        self.physics_client = None
+        self.robot_id = None
+        # (path, mtime) of the robot currently in the world, so an unchanged file is not reloaded.
+        self._robot_source = None
+
+    def load(self, urdf_path):
+        """Replace the previewed robot with a URDF file."""
+        self.requests.put(('load', urdf_path))
+
+    def show_model(self, urdf_text):
+        """Replace the previewed robot with URDF text generated from the edited model."""
+        self.requests.put(('model', urdf_text))
+
+    def request_render(self):
+        """Ask for a fresh frame; bursts of requests collapse into one render."""
+        self.requests.put(('render', None))
+
+    def stop(self):
+        self.requests.put(('stop', None))
+
+    def front_buffer(self):
+        """The latest frame; hold `frame_lock` while reading it."""
+        return self._buffers[self._front]
+
+    def run(self):
+        self.physics_client = p.connect(p.DIRECT)  # Use DIRECT mode for headless rendering
+        p.setAdditionalSearchPath(pybullet_data.getDataPath(), physicsClientId=self.physics_client)
+        p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client)
+        # The plane stays loaded for the life of the worker.
+        p.loadURDF("plane.urdf", physicsClientId=self.physics_client)
+        self.view_matrix = p.computeViewMatrixFromYawPitchRoll(cameraTargetPosition=[0, 0, 0], distance=2, yaw=90,
+                                                               pitch=-15, roll=0, upAxisIndex=2)
+        self.projection_matrix = p.computeProjectionMatrixFOV(fov=60, aspect=self.width / self.height,
+                                                              nearVal=0.1, farVal=100.0)
+        # The first frame shows the plane and whatever model was queued before the worker started.
+        self.request_render()
+        try:
+            while True:
+                batch = [self.requests.get()]
+                # Debounce: gather whatever else arrives shortly after, then act once.
+                while True:
+                    try:
+                        batch.append(self.requests.get(timeout=self.debounce))
+                    except queue.Empty:
+                        break
+                if any(command == 'stop' for command, _ in batch):
+                    return
+                robots = [(command, argument) for command, argument in batch if command in ('load', 'model')]
+                dirty = any(command == 'render' for command, _ in batch)
+                if robots:
+                    dirty |= self._replace_robot(*robots[-1])
+                if dirty:
+                    self._render()
+        finally:
+            p.disconnect(physicsClientId=self.physics_client)
+
+    def _replace_robot(self, command, argument):
+        if command == 'load':
+            try:
+                source = (argument, os.path.getmtime(argument))
+            except OSError:
+                source = None
+            load = lambda: p.loadURDF(argument, [0, 0, 0], p.getQuaternionFromEuler([0, 0, 0]),
+                                      physicsClientId=self.physics_client)
+        else:
+            # Identical text means nothing the preview shows has changed.
+            source = ('model', argument)
+            load = lambda: load_urdf_text(argument, self.physics_client)
+        if source is not None and source == self._robot_source:
+            if command == 'load':
+                self.signals.load_finished.emit(True, argument)
+            return False
+        try:
+            robot_id = load()
+        except p.error as e:
+            if command == 'load':
+                self.signals.load_finished.emit(False, str(e))
+            else:
+                self.signals.model_failed.emit(str(e))
+            return False
+        if self.robot_id is not None:
+            p.removeBody(self.robot_id, physicsClientId=self.physics_client)
+        self.robot_id = robot_id
+        self._robot_source = source
+        if command == 'load':
+            self.signals.load_finished.emit(True, argument)
+        return True
+
+    def _render(self):
+        # Render side view
+        _, _, rgb_img, _, _ = p.getCameraImage(self.width, self.height, viewMatrix=self.view_matrix,
+                                               projectionMatrix=self.projection_matrix,
+                                               physicsClientId=self.physics_client)
+        back = 1 - self._front
+        np.copyto(self._buffers[back], np.reshape(rgb_img, (self.height, self.width, 4))[:, :, :3])
+        with self.frame_lock:
+            self._front = back
+        self.signals.frame_ready.emit()
 
 class URDFGeneratorApp(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.preview = None
+        # The tables edit this model; the preview and saved files are generated from it.
+        self.model = RobotModel()
         self.initUI()
-        self.physics_client = None
-        self.robot_id = None
 
     def initUI(self):
         self.setWindowTitle('URDF Designer')
@@ -81,14 +215,9 @@ class URDFGeneratorApp(QMainWindow):
 
         main_layout.addLayout(content_layout)
 
-        # Initialize PyBullet
+        # Initialize PyBullet; the preview renders on its own thread and only when asked.
         self.init_pybullet()
 
-        # Timer to update PyBullet view
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_pybullet_view)
-        self.timer.start(100)  # Update every 100 ms
-
     def initPropertiesTab(self):
         layout = QVBoxLayout(self.tab_properties)
 
@@ -112,6 +241,9 @@ class URDFGeneratorApp(QMainWindow):
         self.input_description = QTextEdit(self)
         layout.addWidget(self.input_description)
 
+        for widget in (self.input_name, self.input_version, self.input_manufacturer, self.input_description):
+            widget.textChanged.connect(self.update_properties)
+
     def initLinksTab(self):
         layout = QVBoxLayout(self.tab_links)
 
@@ -119,6 +251,7 @@ class URDFGeneratorApp(QMainWindow):
         self.links_table.setColumnCount(3)
         self.links_table.setHorizontalHeaderLabels(['Link Name', 'Mass (kg)', 'Visual'])
         self.links_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.links_table.itemChanged.connect(self.edit_link)
         layout.addWidget(self.links_table)
 
         self.btn_add_link = QPushButton('Add Link', self)
@@ -132,6 +265,7 @@ class URDFGeneratorApp(QMainWindow):
         self.joints_table.setColumnCount(4)
         self.joints_table.setHorizontalHeaderLabels(['Joint Name', 'Type', 'Parent Link', 'Child Link'])
         self.joints_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.joints_table.itemChanged.connect(self.edit_joint)
         layout.addWidget(self.joints_table)
 
         self.btn_add_joint = QPushButton('Add Joint', self)
@@ -145,6 +279,7 @@ class URDFGeneratorApp(QMainWindow):
         self.sensors_table.setColumnCount(3)
         self.sensors_table.setHorizontalHeaderLabels(['Sensor Name', 'Type', 'Attached to Link'])
         self.sensors_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.sensors_table.itemChanged.connect(self.edit_sensor)
         layout.addWidget(self.sensors_table)
 
         self.btn_add_sensor = QPushButton('Add Sensor', self)
@@ -152,80 +287,214 @@ class URDFGeneratorApp(QMainWindow):
         layout.addWidget(self.btn_add_sensor)
 
     def init_pybullet(self):
-        self.physics_client = p.connect(p.DIRECT)  # Use DIRECT mode for headless rendering
-        p.setAdditionalSearchPath(pybullet_data.getDataPath())
-        p.setGravity(0, 0, -9.81, physicsClientId=self.physics_client)
-        p.configureDebugVisualizer(p.COV_ENABLE_GUI, 0, physicsClientId=self.physics_client)
-
-    def update_pybullet_view(self):
-        if self.robot_id is not None:
-            self.refresh_pybullet_view()
+        self.preview = PreviewWorker()
+        self.preview.signals.frame_ready.connect(self.show_preview_frame)
+        self.preview.signals.load_finished.connect(self.robot_loaded)
+        self.preview.signals.model_failed.connect(lambda message: self.statusBar().showMessage(message))
+        self.preview.start()
+
+    def model_changed(self):
+        """Send the edited model to the preview once it is loadable, or say why it is not."""
+        has_links = bool(self.model.links)
+        self.btn_generate.setEnabled(has_links)
+        self.btn_save.setEnabled(has_links)
+        problems = self.model.problems()
+        if problems:
+            self.statusBar().showMessage(problems[0])
+            return
+        self.statusBar().clearMessage()
+        self.preview.show_model(self.model.to_xml())
 
-    def refresh_pybullet_view(self):
-        p.resetSimulation(physicsClientId=self.physics_client)
-        p.loadURDF("plane.urdf", physicsClientId=self.physics_client)  # Load a plane for reference
-        if self.robot_id is not None:
-            p.resetBasePositionAndOrientation(self.robot_id, [0, 0, 0], p.getQuaternionFromEuler([0, 0, 0]), physicsClientId=self.physics_client)
-
-        # Render side view
-        width, height, rgb_img, depth_img, seg_img = p.getCameraImage(
-            640, 480,
-            viewMatrix=p.computeViewMatrixFromYawPitchRoll(cameraTargetPosition=[0, 0, 0], distance=2, yaw=90, pitch=-15, roll=0, upAxisIndex=2),
-            projectionMatrix=p.computeProjectionMatrixFOV(fov=60, aspect=1.0, nearVal=0.1, farVal=100.0),
-            physicsClientId=self.physics_client
-        )
-        self.display_image(rgb_img)
+    def show_preview_frame(self):
+        with self.preview.frame_lock:
+            self.display_image(self.preview.front_buffer())
 
     def display_image(self, img):
         # Convert the image data for displaying in the PyQt label
-        img = img[:, :, :3]  # Remove alpha channel
-        img = img.astype('uint8')
+        img = np.ascontiguousarray(img[:, :, :3], dtype=np.uint8)  # Remove alpha channel
         height, width, channel = img.shape
         bytes_per_line = 3 * width
         qt_image = QImage(img.data, width, height, bytes_per_line, QImage.Format_RGB888)
+        # fromImage copies, so the buffer can be reused as soon as this returns.
         self.pybullet_widget.setPixmap(QPixmap.fromImage(qt_image))
 
+    def closeEvent(self, event):
+        if self.preview is not None:
+            self.preview.stop()
+            self.preview.join(timeout=2.0)
+        super().closeEvent(event)
+
     def add_link(self):
-        row_count = self.links_table.rowCount()
-        self.links_table.insertRow(row_count)
-        self.links_table.setItem(row_count, 0, QTableWidgetItem(f'Link_{row_count+1}'))
-        self.links_table.setItem(row_count, 1, QTableWidgetItem('1.0'))  # Default mass
-        self.links_table.setItem(row_count, 2, QTableWidgetItem('box'))  # Default visual shape
-        self.refresh_pybullet_view()
+        link = self.model.add_link(Link(_unique_name(self.model.links, 'Link')))
+        self._insert_link_row(link)
+        self.model_changed()
 
     def add_joint(self):
-        row_count = self.joints_table.rowCount()
-        self.joints_table.insertRow(row_count)
-        self.joints_table.setItem(row_count, 0, QTableWidgetItem(f'Joint_{row_count+1}'))
-        joint_type = QComboBox()
-        joint_type.addItems(['revolute', 'prismatic', 'fixed', 'continuous'])
-        self.joints_table.setCellWidget(row_count, 1, joint_type)
-        self.joints_table.setItem(row_count, 2, QTableWidgetItem('ParentLink'))
-        self.joints_table.setItem(row_count, 3, QTableWidgetItem('ChildLink'))
-        self.refresh_pybullet_view()
+        # Chain the two newest links by default.
+        links = list(self.model.links)
+        parent, child = (links[-2], links[-1]) if len(links) >= 2 else ('ParentLink', 'ChildLink')
+        joint = self.model.add_joint(Joint(_unique_name(self.model.joints, 'Joint'), 'revolute', parent, child))
+        self._insert_joint_row(joint)
+        self.model_changed()
 
     def add_sensor(self):
-        row_count = self.sensors_table.rowCount()
-        self.sensors_table.insertRow(row_count)
-        self.sensors_table.setItem(row_count, 0, QTableWidgetItem(f'Sensor_{row_count+1}'))
+        link = next(iter(self.model.links), 'AttachedLink')
+        sensor = self.model.add_sensor(SensorMount(_unique_name(self.model.sensors, 'Sensor'), 'camera', link))
+        self._insert_sensor_row(sensor)
+        self.model_changed()
+
+    def _insert_link_row(self, link):
+        self._insert_row(self.links_table, link.name, [_format_mass(link), format_shape(link)])
+
+    def _insert_joint_row(self, joint):
+        row = self._insert_row(self.joints_table, joint.name, [None, joint.parent, joint.child])
+        joint_type = QComboBox()
+        joint_type.addItems(JOINT_TYPES)
+        joint_type.setCurrentText(joint.type)
+        joint_type.currentTextChanged.connect(lambda text, combo=joint_type: self.edit_combo(self.joints_table, combo, text))
+        self.joints_table.setCellWidget(row, 1, joint_type)
+
+    def _insert_sensor_row(self, sensor):
+        row = self._insert_row(self.sensors_table, sensor.name, [None, sensor.link])
         sensor_type = QComboBox()
-        sensor_type.addItems(['camera', 'lidar', 'imu'])
-        self.sensors_table.setCellWidget(row_count, 1, sensor_type)
-        self.sensors_table.setItem(row_count, 2, QTableWidgetItem('AttachedLink'))
-        self.refresh_pybullet_view()
+        sensor_type.addItems(SENSOR_TYPES)
+        sensor_type.setCurrentText(sensor.type)
+        sensor_type.currentTextChanged.connect(lambda text, combo=sensor_type: self.edit_combo(self.sensors_table, combo, text))
+        self.sensors_table.setCellWidget(row, 1, sensor_type)
+
+    def _insert_row(self, table, name, values):
+        # Rows remember the model name they edit, since the name cell itself may be mid-edit.
+        table.blockSignals(True)
+        row = table.rowCount()
+        table.insertRow(row)
+        name_item = QTableWidgetItem(name)
+        name_item.setData(Qt.UserRole, name)
+        table.setItem(row, 0, name_item)
+        for column, value in enumerate(values, 1):
+            if value is not None:
+                table.setItem(row, column, QTableWidgetItem(value))
+        table.blockSignals(False)
+        return row
+
+    def edit_link(self, item):
+        name = self.links_table.item(item.row(), 0).data(Qt.UserRole)
+        column = item.column()
+        text = item.text().strip()
+        if column == 0:
+            self._rename(self.links_table, item, self.model.update_link, name, text)
+            self._refresh_link_references()
+        elif column == 1:
+            # An empty mass leaves the link without an <inertial>, as in the file it came from.
+            self._apply_edit(item, lambda: self.model.update_link(name, mass=float(text) if text else None),
+                             _format_mass(self.model.links[name]))
+        elif column == 2:
+            self._apply_edit(item, lambda: self._set_shape(name, text), format_shape(self.model.links[name]))
+        self.model_changed()
+
+    def _set_shape(self, name, text):
+        shape, size = parse_shape(text)
+        link = self.model.links[name]
+        if size is None:
+            size = link.size if shape == link.shape else DEFAULT_SIZES.get(shape, (1.0, 1.0, 1.0))
+        self.model.update_link(name, shape=shape, size=size)
+
+    def edit_joint(self, item):
+        name = self.joints_table.item(item.row(), 0).data(Qt.UserRole)
+        text = item.text().strip()
+        if item.column() == 0:
+            self._rename(self.joints_table, item, self.model.update_joint, name, text)
+        elif item.column() == 2:
+            self.model.update_joint(name, parent=text)
+        elif item.column() == 3:
+            self.model.update_joint(name, child=text)
+        self.model_changed()
+
+    def edit_sensor(self, item):
+        name = self.sensors_table.item(item.row(), 0).data(Qt.UserRole)
+        text = item.text().strip()
+        if item.column() == 0:
+            self._rename(self.sensors_table, item, self.model.update_sensor, name, text)
+        elif item.column() == 2:
+            self.model.update_sensor(name, link=text)
+        self.model_changed()
+
+    def edit_combo(self, table, combo, text):
+        row = table.indexAt(combo.pos()).row()
+        name = table.item(row, 0).data(Qt.UserRole)
+        if table is self.joints_table:
+            self.model.update_joint(name, type=text)
+        else:
+            self.model.update_sensor(name, type=text)
+        self.model_changed()
+
+    def _rename(self, table, item, update, key, new_name):
+        if self._apply_edit(item, lambda: update(key, name=new_name), key):
+            table.blockSignals(True)
+            item.setData(Qt.UserRole, new_name)
+            table.blockSignals(False)
+
+    def _apply_edit(self, item, edit, previous):
+        """Apply a model edit, restoring the cell to `previous` if the model rejects the value."""
+        try:
+            edit()
+            return True
+        except ValueError as e:
+            table = item.tableWidget()
+            table.blockSignals(True)
+            item.setText(previous)
+            table.blockSignals(False)
+            self.statusBar().showMessage(str(e))
+            return False
+
+    def _refresh_link_references(self):
+        # Renaming a link renames it in the joints and sensors that use it.
+        for table, items, columns in ((self.joints_table, self.model.joints, {2: 'parent', 3: 'child'}),
+                                      (self.sensors_table, self.model.sensors, {2: 'link'})):
+            table.blockSignals(True)
+            for row in range(table.rowCount()):
+                entry = items[table.item(row, 0).data(Qt.UserRole)]
+                for column, field in columns.items():
+                    table.item(row, column).setText(getattr(entry, field))
+            table.blockSignals(False)
+
+    def _populate_tables(self):
+        for table in (self.links_table, self.joints_table, self.sensors_table):
+            table.setRowCount(0)
+        for link in self.model.links.values():
+            self._insert_link_row(link)
+        for joint in self.model.joints.values():
+            self._insert_joint_row(joint)
+        for sensor in self.model.sensors.values():
+            self._insert_sensor_row(sensor)
+
+    def update_properties(self):
+        self.model.name = self.input_name.text().strip() or 'robot'
+        self.model.version = self.input_version.text().strip()
+        self.model.manufacturer = self.input_manufacturer.text().strip()
+        self.model.description = self.input_description.toPlainText().strip()
 
     def load_robot(self):
         file_dialog = QFileDialog()
         file_path, _ = file_dialog.getOpenFileName(self, "Load URDF File", "", "URDF Files (*.urdf);;All Files (*)")
         if file_path:
-            self.robot_id = p.loadURDF(file_path, physicsClientId=self.physics_client)
-            if self.robot_id is None:
-                QMessageBox.critical(self, 'Error', 'Failed to load URDF file.')
-            else:
-                self.btn_generate.setEnabled(True)
-                self.btn_save.setEnabled(True)
-                QMessageBox.information(self, 'Success', 'URDF file loaded successfully.')
-                self.refresh_pybullet_view()
+            try:
+                model = RobotModel.read(file_path)
+            except ValueError as e:
+                QMessageBox.critical(self, 'Error', f'Failed to load URDF file: {e}')
+                return
+            self.model = model
+            self._populate_tables()
+            self.input_name.setText(model.name)
+            # The file itself is previewed until the first edit; robot_loaded reports back.
+            self.preview.load(file_path)
+
+    def robot_loaded(self, success, message):
+        if not success:
+            QMessageBox.critical(self, 'Error', f'Failed to load URDF file: {message}')
+        else:
+            self.btn_generate.setEnabled(True)
+            self.btn_save.setEnabled(True)
+            QMessageBox.information(self, 'Success', 'URDF file loaded successfully.')
 
     def generate_urdf(self):
         if not self.validate_inputs():
@@ -234,10 +503,12 @@ class URDFGeneratorApp(QMainWindow):
         save_dialog = QFileDialog()
         save_path, _ = save_dialog.getSaveFileName(self, "Save URDF File", "", "URDF Files (*.urdf);;All Files (*)")
         if save_path:
-            # Here you can implement saving your URDF based on the inputs given
-            with open(save_path, 'w') as urdf_file:
-                urdf_file.write('<robot name="{}">\n'.format(self.input_name.text()))
-                urdf_file.write('</robot>\n')  # Simplified example, expand as needed
+            problems = self.model.problems()
+            if problems:
+                QMessageBox.warning(self, 'Warning', 'The robot cannot be saved yet:\n' + '\n'.join(problems[:10]))
+                return
+            self.update_properties()
+            self.model.save(save_path)
             QMessageBox.information(self, 'Success', f'URDF file saved successfully at {save_path}.')
 
     def save_urdf(self):
@@ -270,6 +541,15 @@ class URDFGeneratorApp(QMainWindow):
 
         return urdf_options
 
+def _unique_name(items, prefix):
+    index = len(items) + 1
+    while f'{prefix}_{index}' in items:
+        index += 1
+    return f'{prefix}_{index}'
+
+def _format_mass(link):
+    return '' if link.mass is None else str(link.mass)
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     ex = URDFGeneratorApp()
@@ -0,0 +1,506 @@
+import io
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+import pybullet as p
+
+JOINT_TYPES = ('revolute', 'prismatic', 'fixed', 'continuous', 'floating', 'planar')
+SENSOR_TYPES = ('camera', 'lidar', 'imu')
+# Geometry sizes used when a link names a primitive without dimensions.
+DEFAULT_SIZES = {'box': (0.1, 0.1, 0.1), 'sphere': (0.05,), 'cylinder': (0.05, 0.1)}
+
+
+class Geometry:
+    """A visual or collision shape: 'box', 'sphere', 'cylinder' or a mesh filename, with its size and origin."""
+
+    __slots__ = ('shape', 'size', 'xyz', 'rpy', 'rgba')
+
+    def __init__(self, shape, size=None, xyz=(0, 0, 0), rpy=(0, 0, 0), rgba=None):
+        self.shape = shape
+        self.size = tuple(size) if size is not None else DEFAULT_SIZES.get(shape, (1.0, 1.0, 1.0))
+        self.xyz = tuple(xyz)
+        self.rpy = tuple(rpy)
+        self.rgba = tuple(rgba) if rgba is not None else None
+
+
+class Link:
+    """One rigid body: an inertial, a primary visual shape, and collision shapes.
+
+    `shape` None means the link has no visual, and `mass` None that it has no <inertial>.
+    `collisions` None reuses the primary visual for collision, as links made in the designer do;
+    links read from a file keep their own list. Extra visuals and any other child elements
+    (`extras`, raw XML) are written back unchanged.
+    """
+
+    __slots__ = ('name', 'mass', 'shape', 'size', 'rgba', 'xyz', 'rpy', 'inertia', 'inertial_xyz', 'inertial_rpy',
+                 'collisions', 'extra_visuals', 'extras')
+
+    def __init__(self, name, mass=1.0, shape='box', size=None, rgba=(0.8, 0.8, 0.8, 1.0),
+                 xyz=(0, 0, 0), rpy=(0, 0, 0), inertia=None, inertial_xyz=(0, 0, 0), inertial_rpy=(0, 0, 0),
+                 collisions=None, extra_visuals=(), extras=()):
+        self.name = name
+        self.mass = float(mass) if mass is not None else None
+        # 'box', 'sphere', 'cylinder' or a mesh filename.
+        self.shape = shape
+        self.size = tuple(size) if size is not None else DEFAULT_SIZES.get(shape, (1.0, 1.0, 1.0))
+        # None writes no <material>, leaving PyBullet's default colour.
+        self.rgba = tuple(rgba) if rgba is not None else None
+        self.xyz = tuple(xyz)
+        self.rpy = tuple(rpy)
+        # (ixx, ixy, ixz, iyy, iyz, izz); None derives a solid-body inertia from the shape.
+        self.inertia = tuple(inertia) if inertia is not None else None
+        self.inertial_xyz = tuple(inertial_xyz)
+        self.inertial_rpy = tuple(inertial_rpy)
+        self.collisions = list(collisions) if collisions is not None else None
+        self.extra_visuals = list(extra_visuals)
+        self.extras = list(extras)
+
+    def inertia_tensor(self):
+        if self.inertia is not None:
+            return self.inertia
+        m = self.mass or 0.0
+        if self.shape is None:
+            return (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        if self.shape == 'sphere':
+            i = 0.4 * m * self.size[0] ** 2
+            return (i, 0.0, 0.0, i, 0.0, i)
+        if self.shape == 'cylinder':
+            radius, length = self.size[0], self.size[1]
+            side = m * (3 * radius ** 2 + length ** 2) / 12
+            return (side, 0.0, 0.0, side, 0.0, 0.5 * m * radius ** 2)
+        x, y, z = (tuple(self.size) + (1.0, 1.0, 1.0))[:3]
+        return (m * (y * y + z * z) / 12, 0.0, 0.0, m * (x * x + z * z) / 12, 0.0, m * (x * x + y * y) / 12)
+
+
+class Joint:
+    """A joint between two links, with its origin in the parent frame."""
+
+    __slots__ = ('name', 'type', 'parent', 'child', 'xyz', 'rpy', 'axis', 'lower', 'upper', 'effort', 'velocity',
+                 'damping', 'friction', 'extras')
+
+    def __init__(self, name, type='revolute', parent='', child='', xyz=(0, 0, 0), rpy=(0, 0, 0), axis=(0, 0, 1),
+                 lower=-3.14159, upper=3.14159, effort=10.0, velocity=1.0, damping=None, friction=None, extras=()):
+        self.name = name
+        self.type = type
+        self.parent = parent
+        self.child = child
+        self.xyz = tuple(xyz)
+        self.rpy = tuple(rpy)
+        self.axis = tuple(axis)
+        self.lower = float(lower)
+        self.upper = float(upper)
+        self.effort = float(effort)
+        self.velocity = float(velocity)
+        # <dynamics> values; None leaves the element out.
+        self.damping = damping
+        self.friction = friction
+        # Other child elements (mimic, safety_controller, ...) as raw XML.
+        self.extras = list(extras)
+
+
+class SensorMount:
+    """A sensor attached to a link; written as a URDF <sensor> element, which PyBullet ignores."""
+
+    __slots__ = ('name', 'type', 'link', 'xyz', 'rpy')
+
+    def __init__(self, name, type='camera', link='', xyz=(0, 0, 0), rpy=(0, 0, 0)):
+        self.name = name
+        self.type = type
+        self.link = link
+        self.xyz = tuple(xyz)
+        self.rpy = tuple(rpy)
+
+
+class RobotModel:
+    """An editable robot description, independent of Qt.
+
+    Links, joints and sensors are kept in insertion-ordered dicts keyed by name, so single edits
+    are constant time and renames keep their position. `revision` counts changes, letting views
+    tell whether anything needs to be rewritten or reloaded.
+    """
+
+    def __init__(self, name='robot', version='', manufacturer='', description=''):
+        self.name = name
+        self.version = version
+        self.manufacturer = manufacturer
+        self.description = description
+        self.links = {}
+        self.joints = {}
+        self.sensors = {}
+        # Top-level elements other than links, joints and sensors (materials, transmissions, ...) as raw XML.
+        self.extras = []
+        # Directory relative mesh filenames are resolved against, e.g. that of a file it was read from.
+        self.base_directory = None
+        self.revision = 0
+
+    def add_link(self, link):
+        return self._add(self.links, link)
+
+    def add_joint(self, joint):
+        return self._add(self.joints, joint)
+
+    def add_sensor(self, sensor):
+        return self._add(self.sensors, sensor)
+
+    def update_link(self, key, **changes):
+        """Change fields of the link named `key`; a `name` change renames it."""
+        return self._update(self.links, key, changes)
+
+    def update_joint(self, key, **changes):
+        return self._update(self.joints, key, changes)
+
+    def update_sensor(self, key, **changes):
+        return self._update(self.sensors, key, changes)
+
+    def remove_link(self, name):
+        del self.links[name]
+        self.revision += 1
+
+    def remove_joint(self, name):
+        del self.joints[name]
+        self.revision += 1
+
+    def remove_sensor(self, name):
+        del self.sensors[name]
+        self.revision += 1
+
+    def _add(self, items, item):
+        if item.name in items:
+            raise ValueError(f"Duplicate name: {item.name}")
+        items[item.name] = item
+        self.revision += 1
+        return item
+
+    def _update(self, items, key, changes):
+        item = items[key]
+        new_name = changes.pop('name', key)
+        # Validate before touching anything, so a rejected edit leaves the item as it was.
+        if new_name != key and new_name in items:
+            raise ValueError(f"Duplicate name: {new_name}")
+        if not new_name:
+            raise ValueError("Names cannot be empty")
+        for field in changes:
+            if field not in type(item).__slots__:
+                raise ValueError(f"Unknown field: {field}")
+        for field, value in changes.items():
+            setattr(item, field, value)
+        if new_name != key:
+            item.name = new_name
+            # Rebuild the dict so the renamed item keeps its place in the file.
+            renamed = {(new_name if name == key else name): value for name, value in items.items()}
+            items.clear()
+            items.update(renamed)
+            if items is self.links:
+                self._rename_link_references(key, new_name)
+        self.revision += 1
+        return item
+
+    def _rename_link_references(self, old, new):
+        for joint in self.joints.values():
+            if joint.parent == old:
+                joint.parent = new
+            if joint.child == old:
+                joint.child = new
+        for sensor in self.sensors.values():
+            if sensor.link == old:
+                sensor.link = new
+
+    def problems(self):
+        """Reasons PyBullet would reject the model; empty when it can be loaded."""
+        problems = []
+        if not self.links:
+            problems.append("The robot has no links")
+        children = set()
+        for joint in self.joints.values():
+            for role, link in (('parent', joint.parent), ('child', joint.child)):
+                if link not in self.links:
+                    problems.append(f"Joint {joint.name}: {role} link '{link}' does not exist")
+            if joint.type not in JOINT_TYPES:
+                problems.append(f"Joint {joint.name}: unknown type '{joint.type}'")
+            if joint.child in children:
+                problems.append(f"Link {joint.child} is the child of more than one joint")
+            children.add(joint.child)
+        roots = [name for name in self.links if name not in children]
+        if len(self.links) and len(roots) != 1:
+            problems.append(f"Expected one root link, found {len(roots)}: {', '.join(roots[:5])}")
+        for sensor in self.sensors.values():
+            if sensor.link not in self.links:
+                problems.append(f"Sensor {sensor.name}: link '{sensor.link}' does not exist")
+        return problems
+
+    def write(self, stream, mesh_root=None):
+        """Stream the URDF to a text file object element by element, without building a tree.
+
+        Relative mesh filenames are joined to `mesh_root` (default `base_directory`) when one is set.
+        """
+        mesh_root = mesh_root or self.base_directory
+        write = stream.write
+        write('<?xml version="1.0"?>\n')
+        write(f'<robot name={quoteattr(self.name)}>\n')
+        for label, value in (('version', self.version), ('manufacturer', self.manufacturer),
+                             ('description', self.description)):
+            if value:
+                write(f'  <!-- {label}: {escape(value).replace("--", "- -")} -->\n')
+        for link in self.links.values():
+            _write_link(write, link, mesh_root)
+        for joint in self.joints.values():
+            _write_joint(write, joint)
+        for extra in self.extras:
+            write(f'  {extra}\n')
+        for sensor in self.sensors.values():
+            write(f'  <sensor name={quoteattr(sensor.name)} type={quoteattr(sensor.type)}>\n'
+                  f'    <parent link={quoteattr(sensor.link)}/>\n'
+                  f'    <origin xyz="{_fmt(sensor.xyz)}" rpy="{_fmt(sensor.rpy)}"/>\n'
+                  f'  </sensor>\n')
+        write('</robot>\n')
+
+    def to_xml(self, mesh_root=None):
+        stream = io.StringIO()
+        self.write(stream, mesh_root)
+        return stream.getvalue()
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8', buffering=1 << 16) as stream:
+            self.write(stream)
+
+    def load_into(self, physics_client, base_position=(0, 0, 0), base_orientation=(0, 0, 0, 1), flags=0):
+        """Spawn the model in a PyBullet client without saving it first; returns the body id."""
+        problems = self.problems()
+        if problems:
+            raise ValueError("; ".join(problems))
+        return load_urdf_text(self.to_xml(), physics_client, base_position, base_orientation, flags)
+
+    @classmethod
+    def read(cls, path):
+        """Build a model from a URDF file; elements the model does not edit are kept as raw XML."""
+        try:
+            root = ET.parse(path).getroot()
+        except ET.ParseError as e:
+            raise ValueError(f"Error parsing URDF file {path}: {e}")
+        if root.tag != 'robot':
+            raise ValueError(f"Not a URDF robot description: {path}")
+        model = cls(root.get('name', 'robot'))
+        model.base_directory = os.path.dirname(os.path.abspath(path))
+        # Materials can be defined inside one visual and referenced by name from others.
+        materials = {material.get('name'): material.find('color') for material in root.iter('material')
+                     if material.find('color') is not None}
+        model.extras = [_raw(element) for element in root if element.tag not in ('link', 'joint', 'sensor')]
+        for element in root.findall('link'):
+            model.add_link(_read_link(element, materials))
+        for element in root.findall('joint'):
+            model.add_joint(_read_joint(element))
+        for element in root.findall('sensor'):
+            parent = element.find('parent')
+            xyz, rpy = _origin(element.find('origin'))
+            model.add_sensor(SensorMount(element.get('name'), element.get('type', 'camera'),
+                                         parent.get('link', '') if parent is not None else '', xyz, rpy))
+        return model
+
+
+def load_urdf_text(text, physics_client, base_position=(0, 0, 0), base_orientation=(0, 0, 0, 1), flags=0):
+    """Load URDF text into PyBullet through a temporary file, in shared memory where available.
+
+    PyBullet caches parsed URDFs by filename, so every load gets a fresh name. Relative mesh paths
+    in the text resolve against the temporary location, so write the model with a `mesh_root`
+    when it uses them.
+    """
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+    stream = tempfile.NamedTemporaryFile(suffix='.urdf', dir=directory, delete=False)
+    try:
+        with stream:
+            stream.write(text.encode('utf-8'))
+        return p.loadURDF(stream.name, base_position, base_orientation, flags=flags, physicsClientId=physics_client)
+    finally:
+        os.unlink(stream.name)
+
+
+def parse_shape(text):
+    """'box', 'sphere 0.1', 'cylinder 0.05 0.2' or a mesh filename, as (shape, size or None).
+
+    Raises ValueError when a primitive is given the wrong number of dimensions or a bad one.
+    """
+    parts = text.split()
+    if not parts:
+        return 'box', None
+    if parts[0] not in DEFAULT_SIZES:
+        return text.strip(), None
+    shape, values = parts[0], parts[1:]
+    if not values:
+        return shape, None
+    expected = len(DEFAULT_SIZES[shape])
+    if len(values) != expected:
+        raise ValueError(f"A {shape} takes {expected} dimension{'s' if expected > 1 else ''}, got {len(values)}")
+    size = tuple(float(v) for v in values)
+    if any(not v > 0 for v in size):
+        raise ValueError(f"{shape} dimensions must be positive")
+    return shape, size
+
+
+def format_shape(link):
+    if link.shape is None:
+        return ''
+    if link.shape in DEFAULT_SIZES:
+        if link.size == DEFAULT_SIZES[link.shape]:
+            return link.shape
+        return f'{link.shape} {_fmt(link.size)}'
+    return link.shape
+
+
+def _write_link(write, link, mesh_root):
+    write(f'  <link name={quoteattr(link.name)}>\n')
+    if link.mass is not None:
+        ixx, ixy, ixz, iyy, iyz, izz = link.inertia_tensor()
+        write(f'    <inertial>\n'
+              f'      <origin xyz="{_fmt(link.inertial_xyz)}" rpy="{_fmt(link.inertial_rpy)}"/>\n'
+              f'      <mass value="{link.mass!r}"/>\n'
+              f'      <inertia ixx="{ixx!r}" ixy="{ixy!r}" ixz="{ixz!r}" iyy="{iyy!r}" iyz="{iyz!r}" izz="{izz!r}"/>\n'
+              f'    </inertial>\n')
+    primary = Geometry(link.shape, link.size, link.xyz, link.rpy, link.rgba) if link.shape is not None else None
+    visuals = ([primary] if primary else []) + link.extra_visuals
+    for index, visual in enumerate(visuals):
+        material = f'{link.name}_material' + (f'_{index}' if index else '')
+        write(f'    <visual>\n'
+              f'      <origin xyz="{_fmt(visual.xyz)}" rpy="{_fmt(visual.rpy)}"/>\n'
+              f'      <geometry>{_geometry_xml(visual.shape, visual.size, mesh_root)}</geometry>\n')
+        if visual.rgba is not None:
+            write(f'      <material name={quoteattr(material)}><color rgba="{_fmt(visual.rgba)}"/></material>\n')
+        write('    </visual>\n')
+    # Links made in the designer collide with their visual shape.
+    collisions = link.collisions if link.collisions is not None else [primary] if primary else []
+    for collision in collisions:
+        write(f'    <collision>\n'
+              f'      <origin xyz="{_fmt(collision.xyz)}" rpy="{_fmt(collision.rpy)}"/>\n'
+              f'      <geometry>{_geometry_xml(collision.shape, collision.size, mesh_root)}</geometry>\n'
+              f'    </collision>\n')
+    for extra in link.extras:
+        write(f'    {extra}\n')
+    write('  </link>\n')
+
+
+def _write_joint(write, joint):
+    write(f'  <joint name={quoteattr(joint.name)} type={quoteattr(joint.type)}>\n'
+          f'    <parent link={quoteattr(joint.parent)}/>\n'
+          f'    <child link={quoteattr(joint.child)}/>\n'
+          f'    <origin xyz="{_fmt(joint.xyz)}" rpy="{_fmt(joint.rpy)}"/>\n')
+    if joint.type != 'fixed':
+        write(f'    <axis xyz="{_fmt(joint.axis)}"/>\n')
+    if joint.type in ('revolute', 'prismatic'):
+        write(f'    <limit lower="{joint.lower!r}" upper="{joint.upper!r}" effort="{joint.effort!r}" '
+              f'velocity="{joint.velocity!r}"/>\n')
+    if joint.damping is not None or joint.friction is not None:
+        write(f'    <dynamics damping="{float(joint.damping or 0.0)!r}" friction="{float(joint.friction or 0.0)!r}"/>\n')
+    for extra in joint.extras:
+        write(f'    {extra}\n')
+    write('  </joint>\n')
+
+
+def _geometry_xml(shape, size, mesh_root):
+    if shape == 'box':
+        return f'<box size="{_fmt(size)}"/>'
+    if shape == 'sphere':
+        return f'<sphere radius="{size[0]!r}"/>'
+    if shape == 'cylinder':
+        return f'<cylinder radius="{size[0]!r}" length="{size[1]!r}"/>'
+    filename = shape
+    # PyBullet looks package:// paths up relative to the URDF, like plain relative ones.
+    if mesh_root and filename.startswith('package://'):
+        filename = filename[len('package://'):]
+    if mesh_root and not os.path.isabs(filename) and '://' not in filename:
+        filename = os.path.join(mesh_root, filename)
+    return f'<mesh filename={quoteattr(filename)} scale="{_fmt(size)}"/>'
+
+
+def _read_link(element, materials):
+    """A Link as the file describes it: no <inertial> leaves `mass` None and no <visual> `shape` None."""
+    link = Link(element.get('name'), mass=None, shape=None, collisions=())
+    inertial = element.find('inertial')
+    if inertial is not None:
+        mass = inertial.find('mass')
+        link.mass = float(mass.get('value', 0.0)) if mass is not None else 0.0
+        link.inertial_xyz, link.inertial_rpy = _origin(inertial.find('origin'))
+        inertia = inertial.find('inertia')
+        link.inertia = tuple(float(inertia.get(key, 0.0)) if inertia is not None else 0.0
+                             for key in ('ixx', 'ixy', 'ixz', 'iyy', 'iyz', 'izz'))
+    visuals = [visual for visual in (_read_geometry(e, materials) for e in element.findall('visual')) if visual]
+    if visuals:
+        primary = visuals.pop(0)
+        link.shape, link.size, link.xyz, link.rpy, link.rgba = (primary.shape, primary.size, primary.xyz, primary.rpy,
+                                                                primary.rgba)
+        link.extra_visuals = visuals
+    link.collisions = [collision for collision in (_read_geometry(e, materials) for e in element.findall('collision'))
+                       if collision]
+    link.extras = [_raw(child) for child in element if child.tag not in ('inertial', 'visual', 'collision')]
+    return link
+
+
+def _read_geometry(element, materials):
+    geometry = element.find('geometry')
+    shape = geometry[0] if geometry is not None and len(geometry) else None
+    if shape is None:
+        return None
+    if shape.tag == 'box':
+        name, size = 'box', _floats(shape.get('size'), DEFAULT_SIZES['box'])
+    elif shape.tag == 'sphere':
+        name, size = 'sphere', (float(shape.get('radius', 0.05)),)
+    elif shape.tag == 'cylinder':
+        name, size = 'cylinder', (float(shape.get('radius', 0.05)), float(shape.get('length', 0.1)))
+    elif shape.tag == 'mesh':
+        name, size = shape.get('filename', ''), _floats(shape.get('scale'), (1.0, 1.0, 1.0))
+    else:
+        return None
+    rgba = None
+    material = element.find('material')
+    if material is not None:
+        color = material.find('color')
+        if color is None:
+            color = materials.get(material.get('name'))
+        if color is not None:
+            rgba = _floats(color.get('rgba'), (0.8, 0.8, 0.8, 1.0))
+    xyz, rpy = _origin(element.find('origin'))
+    return Geometry(name, size, xyz, rpy, rgba)
+
+
+def _read_joint(element):
+    parent = element.find('parent')
+    child = element.find('child')
+    axis = element.find('axis')
+    limit = element.find('limit')
+    dynamics = element.find('dynamics')
+    xyz, rpy = _origin(element.find('origin'))
+    joint = Joint(element.get('name'), element.get('type', 'fixed'),
+                  parent.get('link', '') if parent is not None else '',
+                  child.get('link', '') if child is not None else '', xyz, rpy,
+                  _floats(axis.get('xyz') if axis is not None else None, (1, 0, 0)))
+    # PyBullet honours the bounds of a limited continuous joint, so its <limit> is kept as it was.
+    if limit is not None and joint.type != 'continuous':
+        joint.lower = float(limit.get('lower', 0.0))
+        joint.upper = float(limit.get('upper', 0.0))
+        joint.effort = float(limit.get('effort', 0.0))
+        joint.velocity = float(limit.get('velocity', 0.0))
+    if dynamics is not None:
+        joint.damping = float(dynamics.get('damping', 0.0))
+        joint.friction = float(dynamics.get('friction', 0.0))
+    joint.extras = [_raw(e) for e in element if e.tag not in ('parent', 'child', 'origin', 'axis', 'dynamics')
+                    and (e.tag != 'limit' or joint.type == 'continuous')]
+    return joint
+
+
+def _raw(element):
+    # Serialised without the whitespace that followed it in the source file.
+    element.tail = None
+    return ET.tostring(element, encoding='unicode').strip()
+
+
+def _origin(element):
+    if element is None:
+        return (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)
+    return _floats(element.get('xyz'), (0, 0, 0)), _floats(element.get('rpy'), (0, 0, 0))
+
+
+def _floats(text, default):
+    return tuple(float(v) for v in text.split()) if text else tuple(float(v) for v in default)
+
+
+def _fmt(values):
+    return ' '.join(map(repr, map(float, values)))